@@ -1,13 +1,22 @@
 # Doc_processing_agent.py (runner)
-import os, json, time
+import os
 from dotenv import load_dotenv
 from azure.identity import DefaultAzureCredential
 from azure.ai.projects import AIProjectClient
-from doc_agent_tools import list_container_files, analyze_blob_with_di, save_json_to_blob
+from doc_agent_tools import list_container_files, analyze_blob_with_di, read_extracted_range, save_json_to_blob
+
+from utils.run_driver import RunDriver, ToolRegistry, print_step
 
 load_dotenv()
 PROJECT_ENDPOINT = os.environ["PROJECT_ENDPOINT"]
 
+# The agent's tools take their arguments as keywords
+tools = ToolRegistry()
+tools.add("list_container_files", lambda args: list_container_files(**args))
+tools.add("analyze_blob_with_di", lambda args: analyze_blob_with_di(**args))
+tools.add("read_extracted_range", lambda args: read_extracted_range(**args))
+tools.add("save_json_to_blob", lambda args: save_json_to_blob(**args))
+
 def main():
     AGENT_ID = os.environ["DOC_AGENT_ID"]  
     project_client = AIProjectClient(
@@ -29,26 +38,9 @@ def main():
             )
 
         project_client.agents.messages.create(thread_id=thread.id, role="user", content=user_message)
-        run = project_client.agents.runs.create(thread_id=thread.id, agent_id=AGENT_ID)
-
-        while run.status in ["queued", "in_progress", "requires_action"]:
-            time.sleep(1)
-            run = project_client.agents.runs.get(thread_id=thread.id, run_id=run.id)
-            if run.status == "requires_action":
-                tool_outputs = []
-                for tc in run.required_action.submit_tool_outputs.tool_calls:
-                    name = tc.function.name
-                    args = json.loads(tc.function.arguments or "{}")
-                    if name == "list_container_files":
-                        out = list_container_files(**args)
-                    elif name == "analyze_blob_with_di":
-                        out = analyze_blob_with_di(**args)
-                    elif name == "save_json_to_blob":
-                        out = save_json_to_blob(**args)
-                    else:
-                        out = {"error": f"Unknown tool {name}"}
-                    tool_outputs.append({"tool_call_id": tc.id, "output": json.dumps(out, ensure_ascii=False)})
-                project_client.agents.runs.submit_tool_outputs(thread_id=thread.id, run_id=run.id, tool_outputs=tool_outputs)
+        # E.g. several analyze_blob_with_di calls of one step run at once, outputs keep their order
+        run, stats = RunDriver(project_client.agents, tools, on_step=print_step).run(thread.id, AGENT_ID)
+        print(stats)
 
         print(f"Run completed with status: {run.status}")
 
@@ -59,6 +51,7 @@ def main():
             content = m.get("content") if isinstance(m, dict) else getattr(m, "content", None)
             print(f"[{role}] {content}")
         print("--- end transcript ---\n")
+        return stats
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,109 @@
+# RFI_batch.py
+"""
+Batch extraction over a whole RFI submissions container, without the agent in the loop.
+Every blob under a prefix is queued, downloaded, analyzed with Document Intelligence and its
+`<name>.extracted.json` written to the results container, `concurrency` documents at a time.
+Blobs that are unchanged since their last extraction, according to the extraction manifest,
+are skipped. Per-document status is written to the results container as well.
+
+Usage:
+    python RFI_batch.py --prefix 2025/ --concurrency 16
+    python RFI_batch.py --force    # re-extract unchanged blobs too
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Optional
+
+from azure.storage.blob import BlobProperties
+
+from RFI_tools import (
+    RESULTS_CONTAINER,
+    extract_submission,
+    get_manifest,
+    list_rfi_blob_properties,
+    upload_result,
+)
+
+
+def extract_blob(name: str, properties: Optional[BlobProperties] = None, force: bool = False) -> Dict:
+    """Download, extract and store one submission. Never raises, failures are reported in the status."""
+    start_time = time.time()
+    status = {"name": name, "status": "running"}
+    try:
+        # The manifest is flushed once by `analyze_container`
+        out = extract_submission(name, properties=properties, force=force, flush_manifest=False)
+        status.update(status="skipped" if out["skipped"] else "succeeded", result_blob=out["result_blob"])
+    except Exception as e:
+        status.update(status="failed", error=str(e))
+    status["run_time"] = time.time() - start_time
+    return status
+
+
+def analyze_container(
+    prefix: str = "",
+    concurrency: int = 8,
+    status_blob: str = "batch_status.json",
+    force: bool = False,
+) -> Dict:
+    """
+    Extract every submission under `prefix` with a bounded pool of workers.
+    The ETags and Content-MD5s of the listing are compared with the extraction manifest, so a
+    re-run only downloads and analyzes new or modified blobs.
+
+    Args:
+        prefix (str): Only blobs whose name starts with this prefix are processed.
+        concurrency (int): The maximum number of documents processed at the same time.
+        status_blob (str): Name of the status report written to the results container.
+        force (bool): Re-extract blobs the manifest lists as unchanged.
+    Returns:
+        summary (Dict): Totals and the status of every document.
+    """
+    start_time = time.time()
+    blobs = list_rfi_blob_properties(prefix)
+    names = [blob.name for blob in blobs]
+    jobs = {name: {"name": name, "status": "queued"} for name in names}
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [pool.submit(extract_blob, blob.name, blob, force) for blob in blobs]
+            for done, future in enumerate(as_completed(futures), start=1):
+                job = future.result()
+                jobs[job["name"]] = job
+                print(f"[{done}/{len(names)}] {job['status']}: {job['name']} ({job['run_time']:.1f}s)")
+    finally:
+        get_manifest().flush()
+
+    statuses = [job["status"] for job in jobs.values()]
+    summary = {
+        "prefix": prefix,
+        "total": len(names),
+        "succeeded": statuses.count("succeeded"),
+        "skipped": statuses.count("skipped"),
+        "failed": statuses.count("failed"),
+        "run_time": time.time() - start_time,
+        "documents": list(jobs.values()),
+    }
+    upload_result(status_blob, json.dumps(summary, indent=2).encode("utf-8"))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract all RFI submissions in a container.")
+    parser.add_argument("--prefix", default="")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--status-blob", default="batch_status.json")
+    parser.add_argument("--force", action="store_true", help="Re-extract unchanged blobs too.")
+    args = parser.parse_args()
+
+    summary = analyze_container(args.prefix, args.concurrency, args.status_blob, args.force)
+    print(
+        f"Processed {summary['total']} documents in {summary['run_time']:.1f}s: "
+        f"{summary['succeeded']} succeeded, {summary['skipped']} unchanged, {summary['failed']} failed. "
+        f"Status written to {RESULTS_CONTAINER}/{args.status_blob}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# RFI_compare.py
+"""
+Requirement scores and the supplier comparison for all normalized records at once. The gap
+checks of every record come from `RFI_schema.gap_checks`, so its rules live in one place; the
+scores and the ranking are column operations over a DataFrame with one row per supplier, so the
+comparison CSV and shortlist no longer depend on the agent. The agent only drafts the prose.
+
+Usage:
+    comparison = compare_suppliers(records)
+    comparison.to_csv(...), shortlist(comparison, top=10)
+"""
+import itertools
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from RFI_schema import REQUIREMENTS, delivery_days, gap_checks
+
+# Columns of the comparison CSV, followed by the gap check and ranking columns
+COMPARISON_COLUMNS = ["supplier_name", "delivery_time_days", "iso_27001", "sla_summary", "pricing_notes"]
+
+SHORTLIST_COLUMNS = [
+    "rank", "supplier_name", "requirement_score", "requirements_met", "delivery_time_days", "iso_27001",
+    "missing", "sources",
+]
+
+# Weight of a requirement of each tier, unless REQUIREMENTS["weights"] has one for its field
+TIER_WEIGHTS = {"must_have": 2.0, "nice_to_have": 1.0}
+
+
+def as_record(item: Dict) -> Dict:
+    """The record of a `normalize_submission` result, other dicts are records already."""
+    record = item.get("record")
+    return record if isinstance(record, dict) else item
+
+
+def records_frame(records: Sequence[Dict], fields: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    One row per record and one object column per schema field, absent fields as None.
+
+    Args:
+        records (Sequence[Dict]): Records of `RFI_SCHEMA_JSON`, or `normalize_submission` results.
+        fields (Sequence[str]): The columns, by default every field any record has.
+    Returns:
+        frame (pd.DataFrame): One column per field.
+    """
+    records = [as_record(item) for item in records]
+    if fields is None:
+        fields = dict.fromkeys(field for record in records for field in record)
+    return pd.DataFrame(
+        {field: pd.Series([record.get(field) for record in records], dtype=object) for field in fields}
+    )
+
+
+def _empty(column: pd.Series) -> np.ndarray:
+    """Where `not value` holds, as for a missing key, None, "", [] or 0."""
+    values = column.to_numpy(dtype=object, copy=True)
+    # Elementwise comparison, so NaN stays truthy as for `not value`
+    values[values == None] = False  # noqa: E711
+    return ~values.astype(bool)
+
+
+def _requirement_weights(requirements: Dict) -> Dict[str, Dict[str, float]]:
+    """{tier: {field: weight}} of the requirements, a tier may list fields or map them to weights."""
+    overrides = requirements.get("weights") or {}
+    weights = {}
+    for tier, default in TIER_WEIGHTS.items():
+        fields = requirements.get(tier) or []
+        if isinstance(fields, dict):
+            weights[tier] = {field: float(weight) for field, weight in fields.items()}
+        else:
+            weights[tier] = {field: float(overrides.get(field, default)) for field in fields}
+    return weights
+
+
+def _met(frame: pd.DataFrame, days: pd.Series, field: str) -> np.ndarray:
+    """Where the requirement on `field` is met: ISO 27001 answered yes, a positive delivery time, else any value."""
+    if field not in frame:
+        return np.zeros(len(frame), dtype=bool)
+    if field == "iso_27001":
+        return frame[field].eq("yes").to_numpy()
+    if field == "delivery_time_days":
+        return (days > 0).to_numpy()
+    return ~_empty(frame[field])
+
+
+def _lists(mask: np.ndarray, labels: Sequence[str]) -> List[List[str]]:
+    """Per row, the labels of the columns of a boolean matrix that are True."""
+    return [list(itertools.compress(labels, row)) for row in mask.tolist()]
+
+
+def _joined(column: pd.Series) -> pd.Series:
+    if column.dtype != object:
+        return column
+    return column.map(lambda values: "; ".join(map(str, values)) if isinstance(values, (list, tuple)) else values)
+
+
+def compare_suppliers(records: Sequence[Dict], requirements: Optional[Dict] = None) -> pd.DataFrame:
+    """
+    The comparison of all suppliers: their answers, gap checks and how well they meet the buyer's
+    requirements, ranked. Suppliers meeting every must-have rank first, then by requirement score,
+    fewer missing fields, shorter delivery time and name.
+
+    Args:
+        records (Sequence[Dict]): Records of `RFI_SCHEMA_JSON`, or `normalize_submission` results.
+        requirements (Dict): `must_have` and `nice_to_have` fields, as lists or mapped to weights, and
+            optional per field `weights`. Defaults to `RFI_schema.REQUIREMENTS`.
+    Returns:
+        comparison (pd.DataFrame): `COMPARISON_COLUMNS`, `missing`, `follow_ups`, `must_have_met`,
+            `requirements_met`, `requirement_score` (0 to 1), `rank` and `sources`, sorted by rank.
+    """
+    weights = _requirement_weights(REQUIREMENTS if requirements is None else requirements)
+    records = [as_record(item) for item in records]
+    required = [field for fields in weights.values() for field in fields]
+    frame = records_frame(records, list(dict.fromkeys(COMPARISON_COLUMNS + ["sources"] + required)))
+    gaps = [gap_checks(record) for record in records]
+    # NaN where the delivery time is not numeric
+    days = pd.Series([delivery_days(record) for record in records], dtype=float)
+
+    comparison = frame[COMPARISON_COLUMNS].copy()
+    # Valid delivery times as integers, the raw answer stays visible in the follow-ups
+    comparison["delivery_time_days"] = days.where(days > 0).astype("Int64")
+    comparison["missing"] = pd.Series([gap["missing"] for gap in gaps], dtype=object)
+    comparison["follow_ups"] = pd.Series([gap["follow_ups"] for gap in gaps], dtype=object)
+
+    score = np.zeros(len(frame))
+    total = 0.0
+    must_have_met = np.ones(len(frame), dtype=bool)
+    met_fields = []
+    for tier, fields in weights.items():
+        for field, weight in fields.items():
+            met = _met(frame, days, field)
+            score += weight * met
+            total += weight
+            met_fields.append((field, met))
+            if tier == "must_have":
+                must_have_met &= met
+    comparison["must_have_met"] = must_have_met
+    comparison["requirements_met"] = (
+        _lists(np.column_stack([met for _, met in met_fields]), [field for field, _ in met_fields])
+        if met_fields else [[] for _ in records]
+    )
+    comparison["requirement_score"] = np.round(score / total, 4) if total else 1.0
+    comparison["sources"] = frame["sources"].map(lambda sources: sources or [])
+
+    comparison["_missing_count"] = comparison["missing"].map(len)
+    comparison = comparison.sort_values(
+        ["must_have_met", "requirement_score", "_missing_count", "delivery_time_days", "supplier_name"],
+        ascending=[False, False, True, True, True],
+        na_position="last",
+        kind="stable",
+    ).drop(columns="_missing_count")
+    comparison.insert(0, "rank", np.arange(1, len(comparison) + 1))
+    return comparison.reset_index(drop=True)
+
+
+def shortlist(comparison: pd.DataFrame, top: int = 10) -> pd.DataFrame:
+    """The `top` ranked suppliers that meet every must-have, in `SHORTLIST_COLUMNS`."""
+    return comparison.loc[comparison["must_have_met"], SHORTLIST_COLUMNS].head(top).reset_index(drop=True)
+
+
+def to_csv(frame: pd.DataFrame) -> bytes:
+    """A comparison or shortlist as UTF-8 CSV, list columns joined with "; "."""
+    return frame.apply(_joined).to_csv(index=False).encode("utf-8")
@@ -0,0 +1,228 @@
+# RFI_fan_out.py
+"""
+Fan-out mode of the RFI agent: instead of one conversation working through the whole container,
+every submission gets its own thread and run, which only extracts and normalizes that submission
+and saves its per-supplier JSON. Up to `concurrency` threads run at the same time, so throughput
+grows with the limit and every conversation stays as small as one submission. The reduce step
+then compares all saved suppliers locally with `compare_suppliers` and, unless disabled, one
+last run drafts the clarification bullets and the internal summary from the comparison only.
+The status of every submission is written to the results container.
+
+Usage:
+    python RFI_fan_out.py --prefix 2025/ --concurrency 8
+    python RFI_fan_out.py --no-summary    # stop after the comparison CSV and shortlist
+"""
+import argparse
+import json
+import os
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from RFI_tools import RESULTS_CONTAINER, compare_suppliers, list_rfi_blobs, upload_result
+from utils.blob_io import map_bounded
+from utils.run_driver import RunDriver
+
+if TYPE_CHECKING:
+    from azure.ai.agents import AgentsClient
+
+SUBMISSION_PROMPT = """
+Process only the RFI submission '{name}', the other submissions are handled in separate threads:
+1) call download_blob with {{"name": "{name}"}}, then extract_text_tables with the blob_path it returns
+2) complete the 'normalized' record it returns per schema: keep its values and only fill the fields
+   listed in normalized.low_confidence, from its 'digest' and read_extracted_range where the digest is not enough
+3) save the record with upload_result as '{record_name}' in the results container, fix and save it again
+   if it is rejected.
+Do not call list_rfi_blobs or compare_suppliers. Reply with the saved path only.
+"""
+
+SUMMARY_PROMPT = """
+All {suppliers} RFI submissions were extracted and compared, the supplier comparison is at {comparison_csv}
+and the shortlist at {shortlist_csv}. Do not call compare_suppliers or extract anything again.
+Shortlist: {shortlist}
+Gaps per supplier: {gaps}
+Submissions that could not be processed: {failed}
+1) draft (a) buyer clarification email stubs per supplier from its gaps (bullet points only), and (b) a 10-line
+   internal summary based on the shortlist
+2) upload the Markdown summary to the results container as '{summary_name}'.
+"""
+
+
+def record_name(submission: str) -> str:
+    """Name of the per-supplier JSON a fan-out thread saves for a submission."""
+    return submission + ".record.json"
+
+
+def _saved_paths(tool_call: Any, output: str) -> List[str]:
+    """The result path an `upload_result` tool call saved, from its output."""
+    if tool_call.function.name != "upload_result":
+        return []
+    try:
+        out = json.loads(output)
+    except ValueError:
+        return []
+    return [out["path"]] if out.get("ok") and "path" in out else []
+
+
+def process_submission(
+    agents: "AgentsClient", agent_id: str, name: str, tools: Callable[[Any], str], stream: Optional[bool] = None
+) -> Dict:
+    """
+    Run the agent on one submission in a thread of its own. Never raises, failures are reported in the status.
+
+    Args:
+        agents (AgentsClient): `AIProjectClient(...).agents`.
+        agent_id (str): The RFI agent.
+        name (str): The submission blob name.
+        tools (Callable): The agent's tools, `run_RFI_agent.tools`.
+        stream (bool): Passed on to `RunDriver`.
+    Returns:
+        status (Dict): `name`, `status`, `thread_id`, `record_blob` if the record was saved, `run` stats or `error`.
+    """
+    start_time = time.time()
+    status = {"name": name, "status": "running"}
+    saved = []
+
+    def tools_recording_uploads(tool_call: Any) -> str:
+        output = tools(tool_call)
+        saved.extend(_saved_paths(tool_call, output))
+        return output
+
+    try:
+        thread = agents.threads.create()
+        status["thread_id"] = thread.id
+        content = SUBMISSION_PROMPT.format(name=name, record_name=record_name(name))
+        agents.messages.create(thread_id=thread.id, role="user", content=content)
+        run, stats = RunDriver(agents, tools_recording_uploads, stream=stream).run(thread.id, agent_id)
+        status["run"] = stats.as_dict()
+        record_blobs = [path for path in saved if path.endswith("/" + record_name(name))]
+        if stats.status == "completed" and record_blobs:
+            status.update(status="succeeded", record_blob=record_blobs[-1])
+        else:
+            error = f"Run {stats.status}" if stats.status != "completed" else "No per-supplier JSON was saved"
+            status.update(status="failed", error=error)
+    except Exception as e:
+        status.update(status="failed", error=f"{type(e).__name__}: {e}")
+    status["run_time"] = time.time() - start_time
+    return status
+
+
+def summarize(
+    agents: "AgentsClient",
+    agent_id: str,
+    comparison: Dict,
+    failed: List[str],
+    tools: Callable[[Any], str],
+    summary_name: str = "rfi_summary.md",
+    stream: Optional[bool] = None,
+) -> Dict:
+    """The reduce run: clarification bullets and internal summary from the comparison, in a new thread."""
+    thread = agents.threads.create()
+    content = SUMMARY_PROMPT.format(
+        suppliers=comparison["suppliers"],
+        comparison_csv=comparison["comparison_csv"],
+        shortlist_csv=comparison["shortlist_csv"],
+        shortlist=json.dumps(comparison["shortlist"]),
+        gaps=json.dumps(comparison["gaps"]),
+        failed=json.dumps(failed),
+        summary_name=summary_name,
+    )
+    agents.messages.create(thread_id=thread.id, role="user", content=content)
+    run, stats = RunDriver(agents, tools, stream=stream).run(thread.id, agent_id)
+    return {"thread_id": thread.id, "run": stats.as_dict()}
+
+
+def fan_out(
+    agents: "AgentsClient",
+    agent_id: str,
+    tools: Callable[[Any], str],
+    prefix: str = "",
+    concurrency: int = 8,
+    summary: bool = True,
+    status_blob: str = "fan_out_status.json",
+    stream: Optional[bool] = None,
+) -> Dict:
+    """
+    Process every submission under `prefix` in its own agent thread, `concurrency` at a time, then
+    compare the saved suppliers locally and draft the summary in one final run.
+
+    Args:
+        agents (AgentsClient): `AIProjectClient(...).agents`.
+        agent_id (str): The RFI agent.
+        tools (Callable): The agent's tools, `run_RFI_agent.tools`.
+        prefix (str): Only blobs whose name starts with this prefix are processed.
+        concurrency (int): The maximum number of agent threads running at the same time.
+        summary (bool): Draft the clarification bullets and summary in a final run after the comparison.
+        status_blob (str): Name of the status report written to the results container.
+        stream (bool): Passed on to `RunDriver`.
+    Returns:
+        result (Dict): Totals, the status of every submission, the `comparison` and the `summary` run.
+    """
+    start_time = time.time()
+    names = list_rfi_blobs(prefix)
+    jobs = {}
+    process = lambda name: process_submission(agents, agent_id, name, tools, stream=stream)
+    for done, (name, job) in enumerate(map_bounded(process, names, max_workers=max(1, concurrency)), start=1):
+        jobs[name] = job
+        print(f"[{done}/{len(names)}] {job['status']}: {name} ({job['run_time']:.1f}s)")
+    map_time = time.time() - start_time
+
+    # Reduce: one local pass over the saved records instead of a conversation holding all submissions
+    documents = [jobs[name] for name in names]
+    record_blobs = [job["record_blob"] for job in documents if job["status"] == "succeeded"]
+    failed = [job["name"] for job in documents if job["status"] != "succeeded"]
+    comparison = compare_suppliers(record_blobs=record_blobs) if record_blobs else None
+    summary_run = None
+    if summary and comparison:
+        summary_run = summarize(agents, agent_id, comparison, failed, tools, stream=stream)
+
+    result = {
+        "prefix": prefix,
+        "concurrency": concurrency,
+        "total": len(names),
+        "succeeded": len(record_blobs),
+        "failed": len(failed),
+        "map_time": map_time,
+        "run_time": time.time() - start_time,
+        "documents": documents,
+        "comparison": comparison,
+        "summary": summary_run,
+    }
+    upload_result(status_blob, json.dumps(result, indent=2).encode("utf-8"))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the RFI agent on every submission in a thread of its own.")
+    parser.add_argument("--prefix", default="")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("RFI_FAN_OUT_CONCURRENCY", "8")))
+    parser.add_argument("--status-blob", default="fan_out_status.json")
+    parser.add_argument("--no-summary", action="store_true", help="Skip the final summary run.")
+    args = parser.parse_args()
+
+    from azure.ai.projects import AIProjectClient
+    from azure.identity import DefaultAzureCredential
+
+    # The tools of the single-thread runner, which reads PROJECT_ENDPOINT and RFI_AGENT_ID
+    from run_RFI_agent import AGENT_ID, PROJECT_ENDPOINT, tools
+
+    client = AIProjectClient(
+        endpoint=PROJECT_ENDPOINT,
+        credential=DefaultAzureCredential(),
+        api_version="2025-05-15-preview",
+    )
+    with client:
+        result = fan_out(
+            client.agents, AGENT_ID, tools, args.prefix, args.concurrency, not args.no_summary, args.status_blob
+        )
+    print(
+        f"Processed {result['total']} submissions in {result['run_time']:.1f}s "
+        f"({result['map_time']:.1f}s in {args.concurrency} parallel threads): "
+        f"{result['succeeded']} succeeded, {result['failed']} failed. "
+        f"Status written to {RESULTS_CONTAINER}/{args.status_blob}"
+    )
+    if result["comparison"]:
+        print(f"Comparison: {result['comparison']['comparison_csv']}, shortlist: {result['comparison']['shortlist_csv']}")
+
+
+if __name__ == "__main__":
+    main()
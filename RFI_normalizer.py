@@ -0,0 +1,353 @@
+# RFI_normalizer.py
+"""
+Deterministic mapping of an extracted RFI submission onto the fields of `RFI_SCHEMA_JSON`,
+without the agent in the loop. Questionnaire tables ("Question | Answer" rows, or one header
+row of field names over one row of answers) and "Label: value" lines are matched against known
+labels of every field, and the values parsed into the schema types. Every field gets a
+confidence in [0, 1] from how well its label matched, how cleanly its value parsed and whether
+other candidates disagree, so only the fields below a threshold need the agent.
+
+Usage:
+    normalized = normalize_submission(extract_text_tables(document), source="acme.pdf")
+    normalized["record"], normalized["confidence"], normalized["low_confidence"]
+"""
+import math
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Labels suppliers use for every schema field, compared after `_normalize_label`
+FIELD_LABELS = {
+    "supplier_name": [
+        "supplier name", "supplier", "company name", "company", "vendor name", "vendor",
+        "legal entity name", "legal name", "bidder", "organisation name", "organization name",
+    ],
+    "contact_email": [
+        "contact email", "contact", "email", "e mail", "email address", "e mail address", "contact e mail",
+        "contact email address",
+    ],
+    "coverage_regions": [
+        "coverage regions", "coverage", "regions", "regions covered", "geographic coverage",
+        "service regions", "countries served", "delivery regions", "service area",
+    ],
+    "delivery_time_days": [
+        "delivery time", "delivery time days", "lead time", "lead time days", "delivery lead time",
+        "time to deliver", "delivery days", "standard delivery time",
+    ],
+    "iso_27001": [
+        "iso 27001", "iso27001", "iso iec 27001", "iso 27001 certified", "iso 27001 certification",
+        "iso 27001 certificate", "information security certification",
+    ],
+    "sla_summary": [
+        "sla", "sla summary", "service level agreement", "service levels", "service level",
+        "support sla", "uptime sla", "slas",
+    ],
+    "pricing_notes": [
+        "pricing", "pricing notes", "price", "prices", "pricing model", "commercial terms", "cost",
+        "costs", "fees", "pricing details",
+    ],
+    "exceptions": ["exceptions", "deviations", "exceptions deviations", "assumptions and exceptions"],
+    "attachments": ["attachments", "attached documents", "enclosures", "supporting documents", "annexes"],
+}
+
+# Value of a field no candidate was found for
+FIELD_DEFAULTS = {
+    "supplier_name": "",
+    "contact_email": "",
+    "coverage_regions": [],
+    "delivery_time_days": None,
+    "iso_27001": "unclear",
+    "sla_summary": "",
+    "pricing_notes": "",
+    "exceptions": [],
+    "attachments": [],
+}
+
+# Fields below this confidence are left to the agent
+DEFAULT_MIN_CONFIDENCE = 0.8
+
+# Base confidence of where a candidate was found
+TABLE_ROW_CONFIDENCE = 1.0
+TABLE_COLUMN_CONFIDENCE = 0.95
+TEXT_LINE_CONFIDENCE = 0.95
+NEXT_LINE_CONFIDENCE = 0.8
+# Confidence of a label that contains a known label instead of being one, e.g. "What is your lead time?"
+PARTIAL_LABEL_CONFIDENCE = 0.85
+# Applied to the best candidate if another one found a different value
+CONFLICT_PENALTY = 0.75
+
+_NON_ALPHANUMERIC = re.compile(r"[^a-z0-9]+")
+_NUMBERING = re.compile(r"^(?:q(?:uestion)?\s*)?\d+(?:\.\d+)*[.)]?\s+")
+_LABEL_LINE = re.compile(r"^(?:[-*•]\s*)?([A-Za-z][^:]{0,80}?)\s*:\s*(\S.*)$")
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_DURATION = re.compile(
+    r"(\d+(?:[.,]\d+)?)\s*(?:(?:-|–|to)\s*(\d+(?:[.,]\d+)?))?\s*"
+    r"(business days?|working days?|calendar days?|days?|d\b|weeks?|wks?|months?)?",
+    re.IGNORECASE,
+)
+_ISO_MENTION = re.compile(r"iso(?:\s*/\s*iec)?\s*27001", re.IGNORECASE)
+_YES = re.compile(r"\b(?:yes|y|certified|compliant|valid|current|accredited)\b")
+_NO = re.compile(r"\b(?:no|n|not|non|without|none)\b")
+_IN_PROGRESS = re.compile(r"\b(?:in progress|planned|pending|working towards|expected|scheduled|underway|roadmap)\b")
+# "Certificate no. 12345" is not a "no"
+_NUMBER_ABBREVIATION = re.compile(r"\bno\.?\s*(?=\d)")
+_LIST_SEPARATORS = re.compile(r"\s*(?:[,;\n/]|\band\b)\s*")
+_ITEM_SEPARATORS = re.compile(r"\s*(?:[;\n]|•)\s*")
+_NONE_VALUES = {"", "none", "n a", "na", "nil", "no", "no exceptions", "not applicable", "tbd", "tba"}
+
+
+@lru_cache(maxsize=4096)
+def _normalize_label(label: str) -> str:
+    """Lower case words without numbering or punctuation, e.g. "1.2 Delivery time (days):" -> "delivery time days"."""
+    label = _NUMBERING.sub("", label.strip().lower())
+    return _NON_ALPHANUMERIC.sub(" ", label).strip()
+
+
+def _build_label_index() -> Tuple[Dict[str, str], List[Tuple[frozenset, int, str]]]:
+    exact, partial = {}, []
+    for field, labels in FIELD_LABELS.items():
+        for label in labels:
+            normalized = _normalize_label(label)
+            exact[normalized] = field
+            words = normalized.split()
+            partial.append((frozenset(words), len(words), field))
+    # Longest labels first, so "contact email" wins over "email" and "iso 27001 certificate" over "iso 27001"
+    partial.sort(key=lambda item: -item[1])
+    return exact, partial
+
+
+_EXACT_LABELS, _PARTIAL_LABELS = _build_label_index()
+
+
+@lru_cache(maxsize=4096)
+def match_label(label: str) -> Optional[Tuple[str, float]]:
+    """
+    The schema field a label stands for and how sure the match is.
+
+    Args:
+        label (str): A table cell or the text before a colon.
+    Returns:
+        match (Tuple[str, float] | None): (field, confidence), None if the label is no known field.
+    """
+    normalized = _normalize_label(label)
+    if not normalized:
+        return None
+    field = _EXACT_LABELS.get(normalized)
+    if field:
+        return field, 1.0
+    words = set(normalized.split())
+    # Long labels are questions or sentences, too loose to match on a single known word
+    if len(words) > 12:
+        return None
+    for label_words, length, field in _PARTIAL_LABELS:
+        # A single word only names the field in a short label, "supplier" in "Supplier's contact person" does not
+        if length == 1 and len(words) > 3:
+            continue
+        if label_words <= words:
+            return field, PARTIAL_LABEL_CONFIDENCE
+    return None
+
+
+def _is_none(value: str) -> bool:
+    return _normalize_label(value) in _NONE_VALUES
+
+
+def _parse_text(value: str, label: str) -> Optional[Tuple[Any, float]]:
+    value = value.strip()
+    if _is_none(value):
+        return "", 0.5
+    return value, 0.9 if len(value) >= 3 else 0.5
+
+
+def _parse_supplier_name(value: str, label: str) -> Optional[Tuple[Any, float]]:
+    value = value.strip()
+    if _is_none(value) or len(value) > 120:
+        return None
+    return value, 0.95
+
+
+def _parse_email(value: str, label: str) -> Optional[Tuple[Any, float]]:
+    emails = _find_emails(value)
+    if not emails:
+        return None
+    return emails[0], 1.0 if len(emails) == 1 else 0.7
+
+
+def _parse_regions(value: str, label: str) -> Optional[Tuple[Any, float]]:
+    regions = [region for region in _LIST_SEPARATORS.split(value.strip().rstrip(".")) if region]
+    if not regions or _is_none(value):
+        return None
+    return regions, 0.95 if len(regions) == 1 else 0.9
+
+
+def _parse_days(value: str, label: str) -> Optional[Tuple[Any, float]]:
+    match = _DURATION.search(value)
+    if not match:
+        return None
+    low, high, unit = match.group(1), match.group(2), (match.group(3) or "").lower()
+    days = float((high or low).replace(",", "."))
+    confidence = 1.0
+    if unit.startswith(("week", "wk")):
+        days *= 7
+    elif unit.startswith("month"):
+        days, confidence = days * 30, 0.75
+    elif unit.startswith(("business", "working")):
+        days, confidence = days * 7 / 5, 0.85
+    elif not unit:
+        # A bare number is in the unit the label names, days if it names none
+        label = _normalize_label(label)
+        if "week" in label:
+            days *= 7
+        elif "month" in label:
+            days *= 30
+        confidence = 0.95 if any(unit in label for unit in ("day", "week", "month")) else 0.6
+    if high:
+        # The upper bound of a range, the agent may want to phrase it differently
+        confidence *= 0.85
+    return int(math.ceil(days)), confidence
+
+
+def _parse_iso(value: str, label: str) -> Optional[Tuple[Any, float]]:
+    if _normalize_label(value) in ("n a", "na", "tbd", "tba", "not applicable"):
+        return "unclear", 0.4
+    text = _NUMBER_ABBREVIATION.sub("", value.lower())
+    if _IN_PROGRESS.search(text):
+        return "unclear", 0.9
+    yes, no = bool(_YES.search(text)), bool(_NO.search(text))
+    if yes and not no:
+        return "yes", 1.0
+    if no and not yes:
+        return "no", 1.0
+    return "unclear", 0.5 if yes and no else 0.3
+
+
+def _parse_items(separators: re.Pattern) -> Callable[[str, str], Optional[Tuple[Any, float]]]:
+    def parse(value: str, label: str) -> Optional[Tuple[Any, float]]:
+        if _is_none(value):
+            return [], 0.95
+        items = [item.strip(" -") for item in separators.split(value.strip()) if item.strip(" -")]
+        return (items, 0.9) if items else None
+
+    return parse
+
+
+VALUE_PARSERS: Dict[str, Callable[[str, str], Optional[Tuple[Any, float]]]] = {
+    "supplier_name": _parse_supplier_name,
+    "contact_email": _parse_email,
+    "coverage_regions": _parse_regions,
+    "delivery_time_days": _parse_days,
+    "iso_27001": _parse_iso,
+    "sla_summary": _parse_text,
+    "pricing_notes": _parse_text,
+    "exceptions": _parse_items(_ITEM_SEPARATORS),
+    "attachments": _parse_items(_LIST_SEPARATORS),
+}
+
+
+def _label_value_pairs(extracted: Dict) -> List[Tuple[str, str, float, str]]:
+    """(label, value, base confidence, evidence) of every place a field could be answered."""
+    pairs = []
+    for table_index, grid in enumerate(extracted.get("tables") or []):
+        rows = [[cell.strip() for cell in row if cell and cell.strip()] for row in grid]
+        # One header row of field names over exactly one row of answers
+        if len(grid) == 2 and sum(match_label(cell) is not None for cell in grid[0] if cell) >= 2:
+            for column, label in enumerate(grid[0]):
+                if label and column < len(grid[1]) and grid[1][column]:
+                    pairs.append((label, grid[1][column], TABLE_COLUMN_CONFIDENCE, f"table {table_index} column {column}"))
+            continue
+        for row_index, cells in enumerate(rows):
+            # Skip a leading question number, e.g. "3 | Lead time | 10 days"
+            if cells and _NUMBERING.sub("", cells[0] + " ").strip() == "":
+                cells = cells[1:]
+            if len(cells) >= 2:
+                pairs.append((cells[0], " ".join(cells[1:]), TABLE_ROW_CONFIDENCE, f"table {table_index} row {row_index}"))
+
+    lines = [line.strip() for line in (extracted.get("text") or "").splitlines()]
+    for index, line in enumerate(lines):
+        match = _LABEL_LINE.match(line)
+        if match:
+            pairs.append((match.group(1), match.group(2), TEXT_LINE_CONFIDENCE, f"line {index + 1}"))
+        # A label on its own line with the answer on the next one, as forms are often laid out
+        elif (
+            index + 1 < len(lines)
+            and lines[index + 1]
+            and _normalize_label(line) in _EXACT_LABELS
+            and _normalize_label(lines[index + 1]) not in _EXACT_LABELS
+        ):
+            pairs.append((line, lines[index + 1], NEXT_LINE_CONFIDENCE, f"line {index + 2}"))
+    return pairs
+
+
+def _find_emails(text: str) -> List[str]:
+    """Distinct email addresses in order, matched only around each "@" instead of scanning all the text."""
+    emails, at = [], text.find("@")
+    while at != -1:
+        for match in _EMAIL.finditer(text, max(0, at - 64), at + 256):
+            if match.start() <= at < match.end() and match.group() not in emails:
+                emails.append(match.group())
+        at = text.find("@", at + 1)
+    return emails
+
+
+def _unlabeled_candidates(text: str, missing: List[str]) -> Dict[str, Tuple[Any, float, str]]:
+    """Weak candidates from anywhere in the text, for the `missing` fields no label was found for."""
+    candidates = {}
+    emails = _find_emails(text) if "contact_email" in missing else []
+    if emails:
+        candidates["contact_email"] = (emails[0], 0.7 if len(emails) == 1 else 0.4, "text")
+    mention = _ISO_MENTION.search(text) if "iso_27001" in missing else None
+    if mention:
+        sentence = text[max(0, mention.start() - 80) : mention.end() + 80]
+        value, confidence = _parse_iso(sentence, "")
+        candidates["iso_27001"] = (value, confidence * 0.6, "text")
+    return candidates
+
+
+def normalize_submission(
+    extracted: Dict, source: Optional[str] = None, min_confidence: float = DEFAULT_MIN_CONFIDENCE
+) -> Dict:
+    """
+    Fill the fields of `RFI_SCHEMA_JSON` from an extracted submission.
+
+    Args:
+        extracted (Dict): The output of `extract_text_tables`, with `text` and `tables` as lists of rows.
+        source (str): The submission blob name, recorded in `sources`.
+        min_confidence (float): Fields below this confidence are listed in `low_confidence`.
+    Returns:
+        normalized (Dict): `record` with every schema field, missing ones set to their default,
+            `confidence` and `evidence` (e.g. "table 0 row 3") per field, and `low_confidence`,
+            the fields the agent should fill or confirm from the text.
+    """
+    candidates: Dict[str, List[Tuple[Any, float, str]]] = {}
+    for label, value, base_confidence, evidence in _label_value_pairs(extracted):
+        match = match_label(label)
+        if match is None:
+            continue
+        field, label_confidence = match
+        parsed = VALUE_PARSERS[field](value, label)
+        if parsed is None:
+            continue
+        candidates.setdefault(field, []).append((parsed[0], base_confidence * label_confidence * parsed[1], evidence))
+
+    missing = [field for field in ("contact_email", "iso_27001") if field not in candidates]
+    for field, candidate in _unlabeled_candidates(extracted.get("text") or "", missing).items():
+        candidates[field] = [candidate]
+
+    record, confidence, evidence = {}, {}, {}
+    for field, default in FIELD_DEFAULTS.items():
+        found = candidates.get(field)
+        if not found:
+            record[field], confidence[field], evidence[field] = default, 0.0, None
+            continue
+        value, score, where = max(found, key=lambda candidate: candidate[1])
+        if any(other[0] != value and other[1] >= 0.5 for other in found):
+            score *= CONFLICT_PENALTY
+        record[field], confidence[field], evidence[field] = value, round(score, 2), where
+
+    record["sources"] = [source] if source else []
+    return {
+        "record": record,
+        "confidence": confidence,
+        "evidence": evidence,
+        "low_confidence": [field for field, score in confidence.items() if score < min_confidence],
+    }
@@ -1,4 +1,10 @@
 # schemas.py
+import json
+from typing import Dict, List, Optional
+
+from utils.lazy import once
+from utils.schema_validator import SchemaValidator
+
 RFI_SCHEMA_JSON = r"""
 {
   "type": "object",
@@ -19,17 +25,44 @@ RFI_SCHEMA_JSON = r"""
 }
 """
 
+@once
+def get_validator() -> SchemaValidator:
+    """`RFI_SCHEMA_JSON` parsed and compiled on first use, shared by all validations."""
+    return SchemaValidator(json.loads(RFI_SCHEMA_JSON))
+
+def validate_record(record: dict) -> List[Dict]:
+    """Field-level errors of a record against `RFI_SCHEMA_JSON`, empty if it is valid."""
+    return get_validator().errors(record)
+
+def validation_feedback(errors: List[Dict], name: str = "The record") -> str:
+    """The errors of `validate_record` as one message the agent can fix all of them from in a single turn."""
+    lines = [f"{name} does not match the RFI schema. Fix these fields and save it again:"]
+    lines += [f"- {error['path'] or '(record)'}: {error['message']}" for error in errors]
+    return "\n".join(lines)
+
 # Buyer requirements you care about (edit per category)
+# `RFI_compare` weighs must-haves 2 and nice-to-haves 1 in the requirement score, unless "weights" sets a field's weight
 REQUIREMENTS = {
     "must_have": ["iso_27001"],
-    "nice_to_have": []
+    "nice_to_have": [],
+    "weights": {}
 }
 
+# Fields `gap_checks` reports as missing when empty
+REQUIRED_FIELDS = ["supplier_name","contact_email","coverage_regions","delivery_time_days","iso_27001","sla_summary"]
+
+def delivery_days(record: dict) -> Optional[int]:
+    """`delivery_time_days` as an integer, -1 if it is absent, None if it is not numeric."""
+    try:
+        return int(record.get("delivery_time_days", -1))
+    except Exception:
+        return None
+
 def gap_checks(record: dict) -> dict:
     """Return {missing:[], follow_ups:[], risks:[]} derived from record."""
     missing, follow_ups, risks = [], [], []
     # Required fields present?
-    for f in ["supplier_name","contact_email","coverage_regions","delivery_time_days","iso_27001","sla_summary"]:
+    for f in REQUIRED_FIELDS:
         if not record.get(f):
             missing.append(f)
 
@@ -38,11 +71,11 @@ def gap_checks(record: dict) -> dict:
         follow_ups.append("Provide ISO 27001 certificate or explain compensating controls.")
 
     # Delivery sanity
-    try:
-        if int(record.get("delivery_time_days", -1)) <= 0:
-            follow_ups.append("Confirm delivery_time_days; non-positive value detected.")
-    except Exception:
+    days = delivery_days(record)
+    if days is None:
         follow_ups.append("delivery_time_days not numeric; please clarify.")
+    elif days <= 0:
+        follow_ups.append("Confirm delivery_time_days; non-positive value detected.")
 
     # Pricing notes present?
     if not record.get("pricing_notes"):
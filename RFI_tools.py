@@ -1,87 +1,475 @@
 # rfi_tools.py
+# Importing this module stays cheap: it only reads settings. The blob client, the manifest and the
+# DI handler are built on first use by the get_* functions, and azure.storage.blob, pandas and the
+# handler are imported there, so `create_RFI_agent.py` can register the tools without credentials.
+import hashlib
 import io
 import json
+import mimetypes
 import os
-import tempfile
-from typing import Dict, List
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, BinaryIO, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
-from azure.storage.blob import BlobServiceClient
 from dotenv import load_dotenv
 
-from utils.document_intelligence_handler import DocumentIntelligenceHandler
-from utils.handler_result import HandlerResult
+from RFI_normalizer import DEFAULT_MIN_CONFIDENCE, normalize_submission
+from RFI_schema import validate_record
+from utils.blob_io import BlobChunkReader, decode_content, encode_content, map_bounded
+from utils.deadline import azure_call_kwargs
+from utils.digest import DEFAULT_BUDGET_TOKENS, build_digest, read_range
+from utils.lazy import once
+
+if TYPE_CHECKING:
+    from azure.storage.blob import BlobProperties, BlobServiceClient
+
+    from utils.document_intelligence_handler import DocumentIntelligenceHandler
+    from utils.extraction_manifest import ExtractionManifest
+    from utils.handler_result import HandlerResult
+    from utils.table_engine import FillSpans
 
 load_dotenv()
-ACCOUNT_URL = os.environ["AZURE_STORAGE_ACCOUNT_URL"]
+ACCOUNT_URL = os.environ.get("AZURE_STORAGE_ACCOUNT_URL")
 CONTAINER = os.environ.get("RFI_CONTAINER", "rfi-submissions")
 RESULTS_CONTAINER = os.environ.get("RFI_RESULTS_CONTAINER", "rfi-results")
+# Long documents are analyzed as concurrent page-range jobs of this size, 0 disables splitting
+PAGES_PER_JOB = int(os.environ.get("DOCUMENT_INTELLIGENCE_PAGES_PER_JOB", "0"))
+# Size of the ranged GETs blobs are downloaded with
+BLOB_CHUNK_SIZE = int(os.environ.get("BLOB_CHUNK_SIZE", str(4 * 1024 * 1024)))
+# Parallel range requests per blob download, and blobs downloaded at the same time
+BLOB_MAX_CONCURRENCY = int(os.environ.get("BLOB_MAX_CONCURRENCY", "4"))
+BLOB_DOWNLOAD_WORKERS = int(os.environ.get("BLOB_DOWNLOAD_WORKERS", "8"))
+# Pipe blob chunks into the DI upload instead of downloading the whole file first
+BLOB_STREAM_TO_DI = os.environ.get("BLOB_STREAM_TO_DI", "0") == "1"
+# Size of the ranges a streamed blob is read with, kept small as every range in flight costs ~9x its size
+BLOB_STREAM_CHUNK_SIZE = int(os.environ.get("BLOB_STREAM_CHUNK_SIZE", str(1024 * 1024)))
+# Results uploaded at the same time by `upload_results`
+BLOB_UPLOAD_WORKERS = int(os.environ.get("BLOB_UPLOAD_WORKERS", "16"))
+# Content-Encoding results are uploaded with, "gzip" or "zstd", empty uploads them as they are
+RESULTS_CONTENT_ENCODING = os.environ.get("RFI_RESULTS_CONTENT_ENCODING", "")
+# Smaller results are uploaded uncompressed, compressing them saves too little
+RESULTS_COMPRESS_MIN_BYTES = int(os.environ.get("RFI_RESULTS_COMPRESS_MIN_BYTES", "1024"))
+# Skip submissions whose blob is unchanged since their last extraction, "0" re-extracts everything
+RFI_INCREMENTAL = os.environ.get("RFI_INCREMENTAL", "1") == "1"
+# The extraction manifest is a blob in the results container, or this local file if set
+RFI_MANIFEST_PATH = os.environ.get("RFI_MANIFEST_PATH", "")
+RFI_MANIFEST_BLOB = os.environ.get("RFI_MANIFEST_BLOB", "extraction_manifest.json")
+# Fields the local normalizer filled with less confidence are left to the agent
+NORMALIZER_MIN_CONFIDENCE = float(os.environ.get("RFI_NORMALIZER_MIN_CONFIDENCE", str(DEFAULT_MIN_CONFIDENCE)))
+# Size of the digests and ranges of extracted documents returned to the agent, in tokens
+TOOL_OUTPUT_TOKEN_BUDGET = int(os.environ.get("TOOL_OUTPUT_TOKEN_BUDGET", str(DEFAULT_BUDGET_TOKENS)))
+
+@once
+def get_blob_service() -> "BlobServiceClient":
+    """The blob client, built from AZURE_STORAGE_CONNECTION_STRING on first use."""
+    from azure.storage.blob import BlobServiceClient
+
+    return BlobServiceClient.from_connection_string(
+        os.environ["AZURE_STORAGE_CONNECTION_STRING"],
+        max_single_get_size=BLOB_CHUNK_SIZE,
+        max_chunk_get_size=BLOB_CHUNK_SIZE,
+    )
 
-# Blob client
-conn_str = os.environ["AZURE_STORAGE_CONNECTION_STRING"]
-_blob = BlobServiceClient.from_connection_string(conn_str)
+@once
+def get_manifest() -> "ExtractionManifest":
+    """The extraction manifest, a local file if RFI_MANIFEST_PATH is set, else a blob in the results container."""
+    from utils.extraction_manifest import BlobExtractionManifest, ExtractionManifest
 
-# Document Intelligence handler (reads its own env vars)
-di_handler = DocumentIntelligenceHandler(
-    model_type="documentModels",
-    model_id="prebuilt-layout",
-    #output_content_format="json",
-)
+    if RFI_MANIFEST_PATH:
+        return ExtractionManifest(RFI_MANIFEST_PATH)
+    return BlobExtractionManifest(get_blob_service().get_container_client(RESULTS_CONTAINER), RFI_MANIFEST_BLOB)
+
+@once
+def get_di_handler() -> "DocumentIntelligenceHandler":
+    """The Document Intelligence handler, which reads its own env vars, built on first use."""
+    from utils.document_intelligence_cache import DocumentIntelligenceCache
+    from utils.document_intelligence_handler import DocumentIntelligenceHandler
+    from utils.metrics import PrometheusTextFileSink
+    from utils.rate_limiter import TokenBucketRateLimiter
+
+    return DocumentIntelligenceHandler(
+        model_type="documentModels",
+        model_id="prebuilt-layout",
+        #output_content_format="json",
+        # Only these parts of the result are used, the rest is dropped while it is parsed
+        fields=("content", "tables"),
+        cache=(
+            DocumentIntelligenceCache(os.environ["DOCUMENT_INTELLIGENCE_CACHE_DIR"])
+            if os.environ.get("DOCUMENT_INTELLIGENCE_CACHE_DIR")
+            else None
+        ),
+        # Requests per second of the DI tier, optionally shared between processes through a SQLite file
+        rate_limiter=(
+            TokenBucketRateLimiter(
+                float(os.environ["DOCUMENT_INTELLIGENCE_RATE_LIMIT"]),
+                state_path=os.environ.get("DOCUMENT_INTELLIGENCE_RATE_LIMIT_DB") or None,
+            )
+            if os.environ.get("DOCUMENT_INTELLIGENCE_RATE_LIMIT")
+            else None
+        ),
+        # Per-phase timings for the node_exporter textfile collector, one file and label set per process
+        metrics_sink=(
+            PrometheusTextFileSink.for_process(os.environ["DOCUMENT_INTELLIGENCE_METRICS_DIR"], "rfi_tools")
+            if os.environ.get("DOCUMENT_INTELLIGENCE_METRICS_DIR")
+            else None
+        ),
+    )
 
 
 def list_rfi_blobs(prefix: str = "") -> List[str]:
-    container = _blob.get_container_client(CONTAINER)
+    container = get_blob_service().get_container_client(CONTAINER)
     return [b.name for b in container.list_blobs(name_starts_with=prefix) if not b.name.endswith("/")]
 
+def list_rfi_blob_properties(prefix: str = "") -> List["BlobProperties"]:
+    """Like `list_rfi_blobs`, with the ETag, size and Content-MD5 the listing returns anyway."""
+    container = get_blob_service().get_container_client(CONTAINER)
+    return [b for b in container.list_blobs(name_starts_with=prefix) if not b.name.endswith("/")]
+
 def download_blob(name: str) -> bytes:
-    container = _blob.get_container_client(CONTAINER)
-    return container.download_blob(name).readall()
+    # An agent tool, so its signature is what the model sees, `BLOB_MAX_CONCURRENCY` ranges at a time
+    container = get_blob_service().get_container_client(CONTAINER)
+    return container.download_blob(name, max_concurrency=BLOB_MAX_CONCURRENCY, **azure_call_kwargs()).readall()
 
-def upload_result(name: str, data: bytes, container: str = RESULTS_CONTAINER):
-    container_client = _blob.get_container_client(container)
-    try:
-        container_client.create_container()
-    except Exception:
-        pass
-    container_client.upload_blob(name, data, overwrite=True)
+def download_blobs(names: Iterable[str], max_workers: int = BLOB_DOWNLOAD_WORKERS) -> Iterator[Tuple[str, bytes]]:
+    """
+    Download blobs concurrently, at most `max_workers` at a time, yielding (name, bytes) as they complete.
+    `names` is consumed lazily, so downloads start while a listing is still being paged.
+    """
+    return map_bounded(download_blob, names, max_workers=max_workers)
+
+def open_blob_stream(name: str, fingerprint: Optional[Dict] = None) -> BlobChunkReader:
+    """
+    Open a blob as a file object that downloads it chunk by chunk while it is read, e.g. by the DI upload.
+    `BLOB_MAX_CONCURRENCY` ranges of `BLOB_STREAM_CHUNK_SIZE` are downloaded ahead of the upload at a time.
+    The size, ETag and Content-MD5 of a `blob_fingerprint` save fetching the blob properties, and the
+    DI cache keys on the latter two instead of reading the blob.
+    """
+    fingerprint = fingerprint or {}
+    return BlobChunkReader(
+        get_blob_service().get_container_client(CONTAINER).get_blob_client(name),
+        size=fingerprint.get("size"),
+        chunk_size=BLOB_STREAM_CHUNK_SIZE,
+        max_concurrency=BLOB_MAX_CONCURRENCY,
+        etag=fingerprint.get("etag"),
+        content_md5=fingerprint.get("content_md5"),
+    )
+
+def open_submission(name: str, fingerprint: Optional[Dict] = None) -> Union[bytes, BlobChunkReader]:
+    """The submission as a stream if `BLOB_STREAM_TO_DI` is set, otherwise its downloaded bytes."""
+    return open_blob_stream(name, fingerprint) if BLOB_STREAM_TO_DI else download_blob(name)
 
+# Containers created or found to exist, so each is only created once per process
+_known_containers: Set[str] = set()
+_known_containers_lock = threading.Lock()
 
-def extract_text_tables(file_bytes: bytes, mime_type: str = None) -> Dict:
+def _ensure_container(container: str) -> None:
+    from azure.core.exceptions import HttpResponseError
+
+    if container in _known_containers:
+        return
+    with _known_containers_lock:
+        if container in _known_containers:
+            return
+        try:
+            get_blob_service().get_container_client(container).create_container()
+        except HttpResponseError:
+            # Exists already, or creating containers is not allowed, the upload reports a missing container
+            pass
+        _known_containers.add(container)
+
+def _upload_result(name: str, data: bytes, container: str, content_encoding: str) -> str:
     """
-    Use prebuilt layout/Read to extract plain text and tables.
+    Upload a result with a content type guessed from its name. Results of at least
+    `RESULTS_COMPRESS_MIN_BYTES` are compressed with `content_encoding` and stored with that
+    Content-Encoding, `download_result` returns them decompressed.
+    """
+    from azure.storage.blob import ContentSettings
+
+    _ensure_container(container)
+    content_type, _ = mimetypes.guess_type(name)
+    if content_encoding and len(data) >= RESULTS_COMPRESS_MIN_BYTES:
+        data = encode_content(data, content_encoding)
+    else:
+        content_encoding = None
+    get_blob_service().get_container_client(container).upload_blob(
+        name,
+        data,
+        overwrite=True,
+        content_settings=ContentSettings(content_type=content_type, content_encoding=content_encoding),
+        **azure_call_kwargs(),
+    )
+    return f"{container}/{name}"
+
+def upload_result(name: str, data: bytes, container: str = RESULTS_CONTAINER) -> str:
+    """
+    Upload a result, e.g. an extraction, per-supplier JSON, CSV or Markdown, with a content type guessed from its name.
+    An agent tool, so the compression is not up to the model: `RESULTS_CONTENT_ENCODING` applies.
     """
-    # Persist bytes to a temp file for the handler
-    suffix = ".bin"
-    if mime_type == "application/pdf":
-        suffix = ".pdf"
-    elif (
-        mime_type
-        == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-    ):
-        suffix = ".docx"
+    return _upload_result(name, data, container, RESULTS_CONTENT_ENCODING)
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(file_bytes)
-        tmp_path = tmp.name
-        print(f"[DEBUG] Running Document Intelligence on {tmp_path}")
+def upload_results(
+    files: Iterable[Tuple[str, bytes]],
+    container: str = RESULTS_CONTAINER,
+    content_encoding: str = RESULTS_CONTENT_ENCODING,
+    max_workers: int = BLOB_UPLOAD_WORKERS,
+) -> List[str]:
+    """
+    `upload_result` for many (name, data) pairs, `max_workers` uploads at a time, compressed with
+    `content_encoding`. Returns the paths of the results in the order of `files`.
+    """
+    files = list(files)
+    _ensure_container(container)
+    paths = dict(
+        map_bounded(
+            lambda index: _upload_result(*files[index], container, content_encoding),
+            range(len(files)),
+            max_workers=max_workers,
+        )
+    )
+    return [paths[index] for index in range(len(files))]
 
+def download_result(name: str, container: str = RESULTS_CONTAINER) -> bytes:
+    """A result as it was passed to `upload_result`, decompressed according to its Content-Encoding."""
+    downloader = get_blob_service().get_container_client(container).download_blob(name, decompress=False, **azure_call_kwargs())
+    return decode_content(downloader.readall(), downloader.properties.content_settings.content_encoding)
 
-    res: HandlerResult = di_handler(tmp_path)
+
+def _analyze_layout(file_bytes: Union[bytes, BinaryIO]) -> Dict:
+    if PAGES_PER_JOB:
+        res: HandlerResult = get_di_handler().analyze_split(file_bytes, pages_per_job=PAGES_PER_JOB)
+    else:
+        res: HandlerResult = get_di_handler()(file_bytes)
     if not res.success:
         raise RuntimeError(f"Document Intelligence failed: {res.error}")
+    return (res.content or {}).get("analyzeResult", {})
+
 
-    analyze_result = (res.content or {}).get("analyzeResult", {})
+def _extract_text_tables(file_bytes: Union[bytes, BinaryIO], fill_spans: "FillSpans") -> Dict:
+    """`extract_text_tables`, with the merged cells `fill_spans` selects repeated in every row and column they span."""
+    from utils.table_engine import table_metadata, table_to_grid
+
+    analyze_result = _analyze_layout(file_bytes)
     text = analyze_result.get("content", "") or ""
+    tables = analyze_result.get("tables", []) or []
+
+    tables_out: List[List[List[str]]] = [table_to_grid(t, fill_spans=fill_spans) for t in tables]
+    return {"text": text, "tables": tables_out, "table_metadata": [table_metadata(t) for t in tables]}
+
+
+def extract_text_tables(file_bytes: bytes) -> Dict:
+    """
+    Use prebuilt layout/Read to extract plain text and tables.
+    The bytes, or a file object such as `open_blob_stream`, are sent to Document Intelligence as
+    they are, DI detects the file type itself.
+    Tables are returned as lists of rows, with the header rows, pages and bounding regions of
+    every table in `table_metadata`. Merged header cells and row labels (the first column) are
+    repeated in every row and column they span, other merged cells only hold their content at
+    their first position.
+    """
+    return _extract_text_tables(file_bytes, fill_spans="headers")
+
+
+def _normalized_name(result_blob: str) -> str:
+    """Blob name of the normalized record stored next to an extraction artifact."""
+    return result_blob.split("/", 1)[1].replace(".extracted.json", ".normalized.json")
+
+@lru_cache(maxsize=16)
+def _load_extracted(result_blob: str) -> Dict:
+    """An extraction artifact by its "<container>/<name>" path, kept for repeated range reads."""
+    container, _, name = result_blob.partition("/")
+    if not name:
+        container, name = RESULTS_CONTAINER, result_blob
+    return json.loads(download_result(name, container=container))
+
+def _load_normalized(name: str, result_blob: str) -> Dict:
+    """The normalized record of an unchanged submission, rebuilt from its artifact if it predates the normalizer."""
+    from azure.core.exceptions import ResourceNotFoundError
+
+    try:
+        return json.loads(download_result(_normalized_name(result_blob)))
+    except ResourceNotFoundError:
+        extracted = _load_extracted(result_blob)
+        normalized = normalize_submission(extracted, source=name, min_confidence=NORMALIZER_MIN_CONFIDENCE)
+        upload_result(_normalized_name(result_blob), json.dumps(normalized).encode("utf-8"))
+        return normalized
+
+
+def extract_submission(
+    name: str,
+    properties: Optional["BlobProperties"] = None,
+    fill_spans: "FillSpans" = "headers",
+    force: bool = False,
+    flush_manifest: bool = True,
+    include_normalized: bool = False,
+    digest_budget: Optional[int] = None,
+) -> Dict:
+    """
+    Extract a submission into `<name>.extracted.json` in the results container, unless the manifest
+    shows that this version of the blob was already extracted with the same options. Then the
+    existing artifact is returned without downloading the blob or calling Document Intelligence.
+    A blob with a new ETag but the same content, by Content-MD5 or by the SHA-256 of its download,
+    reuses the artifact as well.
+    Every extraction is also mapped onto the RFI schema by `normalize_submission` and stored as
+    `<name>.normalized.json`, with a confidence per field.
+
+    Args:
+        name (str): The submission blob name.
+        properties (BlobProperties): The blob's properties from a listing, fetched if omitted.
+        fill_spans (bool | str): Which merged cells are repeated in every row and column they span,
+            "headers" for headers and row labels, see `table_to_array`. An artifact is only reused
+            for the same value.
+        force (bool): Extract even if the submission is unchanged.
+        flush_manifest (bool): Persist the manifest entry right away, batches flush `get_manifest()` once instead.
+        include_normalized (bool): Also return the normalized record, so the agent only has to fill its
+            `low_confidence` fields.
+        digest_budget (int): Also return a `build_digest` of the extraction of about this many tokens,
+            the agent reads more of it with `read_extracted_range`.
+    Returns:
+        result (Dict): `result_blob`, the artifact path, `normalized_blob`, `skipped`, True if the artifact
+            was reused, and `normalized` and `digest` if requested.
+    """
+    from utils.extraction_manifest import blob_fingerprint
+
+    if properties is None:
+        properties = get_blob_service().get_container_client(CONTAINER).get_blob_client(name).get_blob_properties(**azure_call_kwargs())
+    fingerprint = blob_fingerprint(properties)
+    options = {"fill_spans": fill_spans}
+    entry = get_manifest().get(name) if RFI_INCREMENTAL and not force else None
+    result_blob, normalized = None, None
+    if get_manifest().is_unchanged(entry, fingerprint, options):
+        result_blob = entry["result_blob"]
+    else:
+        # Download the file from submissions container, or stream it into DI if BLOB_STREAM_TO_DI is set
+        document = open_submission(name, fingerprint)
+        sha256 = None
+        try:
+            if isinstance(document, bytes):
+                sha256 = hashlib.sha256(document).hexdigest()
+                if entry and entry.get("sha256") == sha256 and entry.get("options") == options:
+                    result_blob = entry["result_blob"]
+                    get_manifest().record(name, fingerprint, result_blob, options, sha256, flush=flush_manifest)
+            if result_blob is None:
+                out = _extract_text_tables(document, fill_spans=fill_spans)
+        finally:
+            if hasattr(document, "close"):
+                document.close()
+
+    if result_blob is not None:
+        result = {"result_blob": result_blob, "normalized_blob": f"{RESULTS_CONTAINER}/{_normalized_name(result_blob)}", "skipped": True}
+        if include_normalized:
+            result["normalized"] = _load_normalized(name, result_blob)
+        if digest_budget:
+            result["digest"] = build_digest(_load_extracted(result_blob), digest_budget, source=result_blob)
+        return result
+
+    result_name = name + ".extracted.json"
+    normalized = normalize_submission(out, source=name, min_confidence=NORMALIZER_MIN_CONFIDENCE)
+    result_blob, normalized_blob = upload_results(
+        [
+            (result_name, json.dumps(out).encode("utf-8")),
+            (name + ".normalized.json", json.dumps(normalized).encode("utf-8")),
+        ]
+    )
+    get_manifest().record(name, fingerprint, result_blob, options, sha256, flush=flush_manifest)
+    # A forced re-extraction replaces the artifact under the same name
+    _load_extracted.cache_clear()
+    result = {"result_blob": result_blob, "normalized_blob": normalized_blob, "skipped": False}
+    if include_normalized:
+        result["normalized"] = normalized
+    if digest_budget:
+        result["digest"] = build_digest(out, digest_budget, source=result_blob)
+    return result
+
+def read_extracted_range(
+    result_blob: str,
+    start_line: int = 1,
+    end_line: int = None,
+    table: int = None,
+    start_row: int = 0,
+    end_row: int = None,
+    start_char: int = 0,
+) -> Dict:
+    """
+    Read part of an extracted submission: lines of its text or rows of one of its tables as CSV.
+    The digest `extract_text_tables` returns gives the line of every heading and "Label: value"
+    candidate and the row counts of the tables. Long ranges are cut at TOOL_OUTPUT_TOKEN_BUDGET,
+    continue from `next_line` or `next_row`, with `start_char` set to `next_char` if it is returned.
+
+    Args:
+        result_blob (str): The `result_blob` path returned by `extract_text_tables`.
+        start_line (int): First line to read, 1-based.
+        end_line (int): Last line to read, up to the end if omitted.
+        table (int): Read rows of this table, 0-based, instead of lines.
+        start_row (int): First row of the table, 0-based.
+        end_row (int): Last row of the table, up to its end if omitted.
+        start_char (int): Characters of the first line or row to skip, to read the rest of a cut one.
+    Returns:
+        span (Dict): `result_blob`, `text` or `csv`, the range read and where to continue.
+    """
+    span = read_range(
+        _load_extracted(result_blob),
+        start_line=start_line,
+        end_line=end_line,
+        table=table,
+        start_row=start_row,
+        end_row=end_row,
+        budget_tokens=TOOL_OUTPUT_TOKEN_BUDGET,
+        start_char=start_char,
+    )
+    return {"result_blob": result_blob, **span}
+
+def _load_record(path: str) -> Dict:
+    """A JSON result by its "<container>/<name>" path, or by name in the results container."""
+    container, _, name = path.partition("/")
+    if not name:
+        container, name = RESULTS_CONTAINER, path
+    return json.loads(download_result(name, container=container))
+
+def compare_suppliers(record_blobs: List[str] = None, records: List[Dict] = None, top: int = 10) -> Dict:
+    """
+    Gap-check, score against `REQUIREMENTS` and rank all suppliers in one pass, then upload
+    `supplier_comparison.csv`, `shortlist.csv` and `gap_checks.json` to the results container.
+
+    Args:
+        record_blobs (List[str]): Paths of per-supplier JSON or `.normalized.json` results, loaded concurrently.
+        records (List[Dict]): Records passed inline, e.g. the ones completed by the agent.
+        top (int): The number of suppliers meeting every must-have on the shortlist.
+    Returns:
+        comparison (Dict): The uploaded paths, the `shortlist`, the `gaps` of every supplier with missing
+            fields or follow-ups, for the clarification emails, and the `schema_errors` of invalid records.
+    """
+    import RFI_compare
 
-    tables_out: List[List[List[str]]] = []
-    for t in analyze_result.get("tables", []) or []:
-        row_count = int(t.get("rowCount") or 0)
-        col_count = int(t.get("columnCount") or 0)
-        grid = [["" for _ in range(col_count)] for _ in range(row_count)]
-        for cell in t.get("cells", []) or []:
-            r = int(cell.get("rowIndex") or 0)
-            c = int(cell.get("columnIndex") or 0)
-            if 0 <= r < row_count and 0 <= c < col_count:
-                grid[r][c] = cell.get("content") or ""
-        tables_out.append(grid)
-
-    return {"text": text, "tables": tables_out}
+    record_blobs = list(record_blobs or [])
+    loaded = dict(map_bounded(_load_record, record_blobs, max_workers=BLOB_DOWNLOAD_WORKERS))
+    all_records = [loaded[path] for path in record_blobs] + list(records or [])
+    comparison = RFI_compare.compare_suppliers(all_records)
+    # Records still failing the schema, e.g. normalized ones with low confidence fields left empty
+    names = record_blobs + [f"records[{index}]" for index in range(len(records or []))]
+    schema_errors = {
+        name: errors
+        for name, record in zip(names, all_records)
+        if (errors := validate_record(RFI_compare.as_record(record)))
+    }
+    shortlist = RFI_compare.shortlist(comparison, top=top)
+    gaps = [
+        {"supplier_name": row.supplier_name, "rank": int(row.rank), "missing": row.missing, "follow_ups": row.follow_ups}
+        for row in comparison.itertuples(index=False)
+        if row.missing or row.follow_ups
+    ]
+    comparison_csv, shortlist_csv, gap_checks_json = upload_results(
+        [
+            ("supplier_comparison.csv", RFI_compare.to_csv(comparison)),
+            ("shortlist.csv", RFI_compare.to_csv(shortlist)),
+            ("gap_checks.json", json.dumps(gaps).encode("utf-8")),
+        ]
+    )
+    return {
+        "comparison_csv": comparison_csv,
+        "shortlist_csv": shortlist_csv,
+        "gap_checks_json": gap_checks_json,
+        "suppliers": len(comparison),
+        "shortlist": json.loads(shortlist.to_json(orient="records")),
+        "gaps": gaps,
+        "schema_errors": schema_errors,
+    }
@@ -0,0 +1,69 @@
+"""Serial DocumentIntelligenceHandler vs AsyncDocumentIntelligenceHandler.analyze_many
+against a local fake Document Intelligence server.
+
+Run from the repository root:
+    python -m benchmarks.bench_async_document_intelligence --documents 50 --concurrency 16
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from utils.fake_document_intelligence_server import FakeDocumentIntelligenceServer
+
+
+async def run_async(handler, documents, concurrency, **kwargs):
+    results = []
+    async for result in handler.analyze_many(documents, concurrency=concurrency, **kwargs):
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--processing-time", type=float, default=0.3)
+    args = parser.parse_args()
+
+    with FakeDocumentIntelligenceServer(processing_time=args.processing_time) as server:
+        os.environ["DOCUMENT_INTELLIGENCE_ENDPOINT"] = server.endpoint
+        os.environ["DOCUMENT_INTELLIGENCE_API_KEY"] = "fake-key"
+
+        from utils.async_document_intelligence_handler import (
+            AsyncDocumentIntelligenceHandler,
+        )
+        from utils.document_intelligence_handler import DocumentIntelligenceHandler
+
+        documents = [os.urandom(16 * 1024) for _ in range(args.documents)]
+        poll = {"timeout": 60, "initial_delay": 0.05, "max_delay": 0.2}
+
+        sync_handler = DocumentIntelligenceHandler("documentModels", "prebuilt-layout")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = []
+            for index, document in enumerate(documents):
+                path = os.path.join(tmp_dir, f"{index}.pdf")
+                with open(path, "wb") as file:
+                    file.write(document)
+                paths.append(path)
+
+            start = time.perf_counter()
+            serial = [sync_handler(path, **poll) for path in paths]
+            serial_time = time.perf_counter() - start
+
+        async_handler = AsyncDocumentIntelligenceHandler("documentModels", "prebuilt-layout")
+        start = time.perf_counter()
+        concurrent = asyncio.run(run_async(async_handler, documents, args.concurrency, **poll))
+        async_time = time.perf_counter() - start
+
+    print(f"documents={args.documents} processing_time={args.processing_time}s")
+    print(f"serial:      {serial_time:.2f}s ok={sum(r.success for r in serial)}")
+    print(
+        f"async (c={args.concurrency}): {async_time:.2f}s ok={sum(r.success for r in concurrent)}"
+        f" speedup={serial_time / async_time:.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
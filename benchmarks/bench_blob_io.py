@@ -0,0 +1,104 @@
+"""Serial vs concurrent blob downloads, chunked downloads of one large blob, and streaming a blob
+into the Document Intelligence upload vs downloading it first. Runs against a local Azurite-style
+blob stand-in with per-request latency and per-connection bandwidth, and a fake Document
+Intelligence server, both in a separate process.
+
+Run from the repository root:
+    python -m benchmarks.bench_blob_io --blobs 32 --blob-mb 1 --large-mb 64
+"""
+import argparse
+import multiprocessing
+import os
+import time
+import tracemalloc
+
+from azure.storage.blob import BlobServiceClient
+
+from utils.blob_io import BlobChunkReader, map_bounded
+from utils.fake_blob_server import FakeBlobServer
+from utils.fake_document_intelligence_server import FakeDocumentIntelligenceServer
+
+CONTAINER = "rfi-submissions"
+CHUNK_SIZE = 4 * 1024 * 1024
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+def serve(args, endpoint_queue, stop_event):
+    with FakeBlobServer(latency=args.latency, bandwidth=args.bandwidth_mb * 1024 * 1024) as blob_server, \
+            FakeDocumentIntelligenceServer(processing_time=0.0) as di_server:
+        for index in range(args.blobs):
+            blob_server.put_blob(CONTAINER, f"small/{index}.pdf", os.urandom(args.blob_mb * 1024 * 1024))
+        blob_server.put_blob(CONTAINER, "large.pdf", os.urandom(args.large_mb * 1024 * 1024))
+        endpoint_queue.put((blob_server.connection_string, di_server.endpoint))
+        stop_event.wait()
+
+
+def timed(name, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"{name:>34}: {time.perf_counter() - start:.2f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--blobs", type=int, default=32)
+    parser.add_argument("--blob-mb", type=int, default=1)
+    parser.add_argument("--large-mb", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--bandwidth-mb", type=float, default=25)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    endpoint_queue = multiprocessing.Queue()
+    stop_event = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(args, endpoint_queue, stop_event))
+    server.start()
+    connection_string, di_endpoint = endpoint_queue.get()
+    os.environ["DOCUMENT_INTELLIGENCE_ENDPOINT"] = di_endpoint
+    os.environ["DOCUMENT_INTELLIGENCE_API_KEY"] = "fake-key"
+
+    from utils.document_intelligence_handler import DocumentIntelligenceHandler
+
+    try:
+        container = BlobServiceClient.from_connection_string(
+            connection_string, max_single_get_size=CHUNK_SIZE, max_chunk_get_size=CHUNK_SIZE
+        ).get_container_client(CONTAINER)
+        names = [blob.name for blob in container.list_blobs(name_starts_with="small/")]
+
+        def download(name, max_concurrency=1):
+            return container.download_blob(name, max_concurrency=max_concurrency).readall()
+
+        print(f"{args.blobs} blobs of {args.blob_mb} MiB, {args.latency * 1000:.0f}ms latency, {args.bandwidth_mb} MiB/s per connection")
+        timed("serial readall", lambda: [download(name) for name in names])
+        timed(f"map_bounded, {args.workers} workers", lambda: list(map_bounded(download, names, args.workers)))
+
+        print(f"one {args.large_mb} MiB blob in {CHUNK_SIZE // 1024 // 1024} MiB ranges")
+        for max_concurrency in (1, 4, 8):
+            timed(f"max_concurrency={max_concurrency}", lambda: download("large.pdf", max_concurrency))
+
+        print(f"{args.large_mb} MiB blob into Document Intelligence")
+        handler = DocumentIntelligenceHandler("documentModels", "prebuilt-layout")
+        for name, document in (
+            ("download, then upload", lambda: download("large.pdf", 8)),
+            (
+                "stream 4 MiB ranges into upload",
+                lambda: BlobChunkReader(container.get_blob_client("large.pdf"), chunk_size=CHUNK_SIZE, max_concurrency=4),
+            ),
+            (
+                "stream 1 MiB ranges into upload",
+                lambda: BlobChunkReader(container.get_blob_client("large.pdf"), chunk_size=STREAM_CHUNK_SIZE, max_concurrency=4),
+            ),
+        ):
+            tracemalloc.start()
+            result = timed(name, lambda: handler(document(), initial_delay=0.01))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{'':>34}  peak={peak / 1024 / 1024:.1f} MiB ok={result.success}")
+    finally:
+        stop_event.set()
+        server.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Gap checks of many supplier records with `RFI_schema.gap_checks`, and the time of the whole
+comparison with ranking and CSVs. Checks that the comparison reports the gaps of every record
+as `gap_checks` does.
+
+Run from the repository root:
+    python -m benchmarks.bench_compare --suppliers 500 --repeat 5
+"""
+import argparse
+import random
+import time
+
+from RFI_compare import compare_suppliers, shortlist, to_csv
+from RFI_schema import gap_checks
+
+REGIONS = ["EU", "UK", "US", "APAC", "LATAM", "Nordics", "DACH"]
+
+
+def synthetic_record(index: int):
+    """A normalized record with some fields missing or unclear, as the agent leaves them."""
+    rng = random.Random(index)
+    record = {
+        "supplier_name": f"Supplier {index}",
+        "contact_email": rng.choice([f"rfi@supplier{index}.example", ""]),
+        "coverage_regions": rng.sample(REGIONS, rng.randint(0, 3)),
+        "delivery_time_days": rng.choice([5, 14, 30, 0, None, "21", "two weeks"]),
+        "iso_27001": rng.choice(["yes", "yes", "no", "unclear"]),
+        "sla_summary": rng.choice(["99.9% uptime", ""]),
+        "pricing_notes": rng.choice(["20 EUR per user and month", ""]),
+        "exceptions": [],
+        "attachments": [],
+        "sources": [f"{index}.pdf"],
+    }
+    if rng.random() < 0.1:
+        del record["delivery_time_days"]
+    return record
+
+
+def best_of(repeat: int, function):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--suppliers", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    records = [synthetic_record(index) for index in range(args.suppliers)]
+    loop_time, expected = best_of(args.repeat, lambda: [gap_checks(record) for record in records])
+    print(f"{args.suppliers} suppliers")
+    print(f"{'gap_checks per record':>28}: {loop_time * 1000:8.2f} ms")
+
+    def compare():
+        comparison = compare_suppliers(records)
+        return to_csv(comparison), to_csv(shortlist(comparison))
+
+    compare_time, (comparison_csv, shortlist_csv) = best_of(args.repeat, compare)
+    comparison = compare_suppliers(records)
+    by_name = {row["supplier_name"]: row for row in comparison.to_dict(orient="records")}
+    for record, gaps in zip(records, expected):
+        row = by_name[record["supplier_name"]]
+        assert (row["missing"], row["follow_ups"]) == (gaps["missing"], gaps["follow_ups"]), record
+    print(
+        f"{'compare, rank and write CSVs':>28}: {compare_time * 1000:8.2f} ms "
+        f"({len(comparison_csv) / 1024:.0f} KiB comparison, {len(shortlist_csv) / 1024:.1f} KiB shortlist)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Per-call latency of DocumentIntelligenceHandler with and without connection reuse,
+against a local fake Document Intelligence server. Calls run on worker threads that
+share one handler instance.
+
+Run from the repository root:
+    python -m benchmarks.bench_connection_reuse --calls 200 --threads 8
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from utils.fake_document_intelligence_server import FakeDocumentIntelligenceServer
+
+
+class NewConnectionPerRequest(requests.Session):
+    """Behaves like the module-level `requests.post`/`requests.get` the handler used before."""
+
+    def request(self, method, url, **kwargs):
+        return requests.request(method, url, **kwargs)
+
+
+def run(handler, path, calls, threads):
+    def timed_call(_):
+        start = time.perf_counter()
+        result = handler(path, initial_delay=0.001, max_delay=0.005)
+        return time.perf_counter() - start, result.success
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        timings = list(pool.map(timed_call, range(calls)))
+    latencies = sorted(latency for latency, _ in timings)
+    ok = sum(success for _, success in timings)
+    return latencies, ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with FakeDocumentIntelligenceServer(processing_time=0.0) as server:
+        os.environ["DOCUMENT_INTELLIGENCE_ENDPOINT"] = server.endpoint
+        os.environ["DOCUMENT_INTELLIGENCE_API_KEY"] = "fake-key"
+
+        from utils.document_intelligence_handler import DocumentIntelligenceHandler
+
+        handlers = {
+            "new connection per request": DocumentIntelligenceHandler(
+                "documentModels", "prebuilt-layout", session=NewConnectionPerRequest()
+            ),
+            "pooled keep-alive session": DocumentIntelligenceHandler(
+                "documentModels", "prebuilt-layout", pool_size=args.threads
+            ),
+        }
+
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as document:
+            document.write(os.urandom(64 * 1024))
+            document.flush()
+            for name, handler in handlers.items():
+                latencies, ok = run(handler, document.name, args.calls, args.threads)
+                p95 = latencies[int(0.95 * (len(latencies) - 1))]
+                print(
+                    f"{name:>27}: p50={statistics.median(latencies) * 1000:.1f}ms"
+                    f" p95={p95 * 1000:.1f}ms ok={ok}/{args.calls}"
+                )
+                handler.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Tail latency of agent runs when a dependency hangs, with the tool timeout and run deadline of
+`RunDriver`. Runs against `FakeAgentsServer` and a `FakeDocumentIntelligenceServer` whose analysis
+takes far longer than the limits, and reports how long each run took, its final status and what
+the agent got back from the tool that overran:
+
+- a tool that hangs, abandoned at the tool timeout while the other calls of the step complete,
+- a Document Intelligence analysis that does not finish, given up at the tool timeout,
+- a model step that does not finish, cancelled at the run deadline, streamed and polled.
+
+Run from the repository root:
+    python -m benchmarks.bench_deadlines --tool-timeout 2 --run-deadline 3 --processing-time 60
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+from utils.fake_agents_server import FakeAgentsServer
+from utils.fake_document_intelligence_server import FakeDocumentIntelligenceServer
+from utils.run_driver import RunDriver, ToolRegistry
+
+
+def run_once(script, tools, stream=True, **driver_kwargs):
+    """(wall seconds, stats, tool outputs) of one run of `script`."""
+    with FakeAgentsServer(script, step_time=0.2) as server:
+        agents = server.agents_client()
+        thread = agents.threads.create()
+        agents.messages.create(thread_id=thread.id, role="user", content="benchmark")
+        start = time.perf_counter()
+        _, stats = RunDriver(agents, tools, stream=stream, **driver_kwargs).run(thread.id, "asst_benchmark")
+        return time.perf_counter() - start, stats, [output["output"] for output in server.tool_outputs]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tool-timeout", type=float, default=2.0, help="seconds a tool call may take")
+    parser.add_argument("--run-deadline", type=float, default=3.0, help="seconds a run may take")
+    parser.add_argument("--processing-time", type=float, default=60.0, help="seconds Document Intelligence takes")
+    args = parser.parse_args()
+
+    tools = ToolRegistry()
+    release = threading.Event()
+
+    @tools.register("hang")
+    def hang(arguments):
+        # Waits for nothing that will come, like a request without a timeout
+        release.wait()
+        return {"ok": True}
+
+    @tools.register("work")
+    def work(arguments):
+        time.sleep(0.3)
+        return {"ok": True}
+
+    with FakeDocumentIntelligenceServer(processing_time=args.processing_time) as di_server:
+        os.environ.update(DOCUMENT_INTELLIGENCE_ENDPOINT=di_server.endpoint, DOCUMENT_INTELLIGENCE_API_KEY="fake-key")
+        from utils.document_intelligence_handler import DocumentIntelligenceHandler
+
+        handler = DocumentIntelligenceHandler("documentModels", "prebuilt-layout")
+
+        @tools.register("analyze")
+        def analyze(arguments):
+            result = handler(b"%PDF-1.7 benchmark", timeout=600)
+            return {"success": result.success, "error": result.error}
+
+        print(
+            f"tool timeout {args.tool_timeout:.1f}s, run deadline {args.run_deadline:.1f}s, "
+            f"Document Intelligence takes {args.processing_time:.0f}s"
+        )
+        scenarios = [
+            (
+                "hanging tool",
+                [{"tool_calls": [{"name": "hang", "arguments": {}}, {"name": "work", "arguments": {}}]}, {"message": "Done."}],
+                {"tool_timeout": args.tool_timeout},
+                True,
+            ),
+            (
+                "slow Document Intelligence",
+                [{"tool_calls": [{"name": "analyze", "arguments": {}}]}, {"message": "Done."}],
+                {"tool_timeout": args.tool_timeout},
+                True,
+            ),
+            (
+                "slow model, streamed",
+                [{"tool_calls": [{"name": "work", "arguments": {}}]}, {"message": "Done.", "time": 600}],
+                {"deadline": args.run_deadline},
+                True,
+            ),
+            (
+                "slow model, polled",
+                [{"tool_calls": [{"name": "work", "arguments": {}}]}, {"message": "Done.", "time": 600}],
+                {"deadline": args.run_deadline},
+                False,
+            ),
+        ]
+        for name, script, driver_kwargs, stream in scenarios:
+            elapsed, stats, outputs = run_once(script, tools, stream=stream, **driver_kwargs)
+            first = json.loads(outputs[0]) if outputs else {}
+            print(
+                f"{name:>27}: {elapsed:5.2f}s wall, run {stats.status}, {stats.timed_out_tools} tool calls timed out, "
+                f"deadline exceeded {stats.deadline_exceeded}, first output {json.dumps(first)[:100]}"
+            )
+    release.set()
+
+
+if __name__ == "__main__":
+    main()
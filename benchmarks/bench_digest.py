@@ -0,0 +1,83 @@
+"""Size of what the agent gets back for an extracted submission: the whole extraction, and the digest
+`build_digest` returns at several token budgets, with the share of the questionnaire answers the
+digest shows directly (as "Label: value" candidates or table rows) and the time to build it. The
+synthetic submissions have numbered sections, answers as "Label: value" lines, filler paragraphs,
+a questionnaire table and a long price table.
+
+Run from the repository root:
+    python -m benchmarks.bench_digest --submissions 200 --filler-lines 300 --budgets 500 1500 4000
+"""
+import argparse
+import json
+import random
+import time
+
+from utils.digest import build_digest, estimate_tokens, read_range
+
+SECTIONS = ["Company overview", "Service description", "Security and compliance", "Service levels", "Commercials"]
+
+
+def synthetic_submission(index: int, filler_lines: int):
+    """(extracted submission, answers) of one supplier."""
+    rng = random.Random(index)
+    answers = {
+        "Supplier name": f"Supplier {index} GmbH",
+        "Contact email": f"rfi{index}@supplier{index}.example",
+        "Delivery time": f"{rng.choice([5, 10, 14, 21, 30])} days",
+        "ISO 27001": rng.choice(["Yes, certificate no. 4711", "No"]),
+        "SLA": f"{rng.choice(['99.5', '99.9'])}% uptime",
+        "Pricing": f"{rng.randint(5, 50)} EUR per user and month",
+    }
+    labels = list(answers)
+    lines = [f"RFI RESPONSE OF SUPPLIER {index}"]
+    for number, section in enumerate(SECTIONS, start=1):
+        lines.append(f"{number}. {section}")
+        if labels:
+            label = labels.pop(0)
+            lines.append(f"{label}: {answers[label]}")
+        for _ in range(filler_lines // len(SECTIONS)):
+            lines.append(" ".join(rng.choice(["the", "service", "is", "provided", "with", "support", "in", "all", "regions"]) for _ in range(14)))
+    for label in labels:
+        lines.append(f"{label}: {answers[label]}")
+    questionnaire = [["Question", "Answer"], ["Coverage regions", "EU, UK"], ["Exceptions", "None"]]
+    prices = [["SKU", "Description", "Unit price", "Currency"]] + [
+        [f"SKU-{row}", f"Licence tier {row}", f"{rng.randint(1, 999)}.00", "EUR"] for row in range(300)
+    ]
+    return {"text": "\n".join(lines), "tables": [questionnaire, prices]}, answers
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--submissions", type=int, default=200)
+    parser.add_argument("--filler-lines", type=int, default=300)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[500, 1500, 4000])
+    args = parser.parse_args()
+
+    corpus = [synthetic_submission(index, args.filler_lines) for index in range(args.submissions)]
+    full = sum(estimate_tokens(json.dumps(extracted)) for extracted, _ in corpus) / len(corpus)
+    print(f"{args.submissions} submissions, whole extraction {full:8.0f} tokens on average")
+
+    for budget in args.budgets:
+        start = time.perf_counter()
+        digests = [build_digest(extracted, budget, source=f"{index}.extracted.json") for index, (extracted, _) in enumerate(corpus)]
+        elapsed = time.perf_counter() - start
+        sizes = [estimate_tokens(json.dumps(digest, ensure_ascii=False)) for digest in digests]
+        shown = total = 0
+        for digest, (_, answers) in zip(digests, corpus):
+            candidates = {item["key"]: item["value"] for item in digest["key_values"]}
+            shown += sum(candidates.get(label) == value for label, value in answers.items())
+            total += len(answers)
+        assert max(sizes) <= budget, (budget, max(sizes))
+        print(
+            f"digest, budget {budget:5d}: {sum(sizes) / len(sizes):6.0f} tokens on average ({max(sizes)} at most), "
+            f"{shown / total:6.1%} of answers shown, {elapsed / len(corpus) * 1000:5.2f} ms per submission"
+        )
+
+    # The agent follows a pointer of the digest, e.g. the rows of the price table after the ones shown
+    extracted, _ = corpus[0]
+    span = read_range(extracted, table=1, start_row=100, end_row=120)
+    print(f"read_extracted_range of 21 table rows: {estimate_tokens(json.dumps(span))} tokens, next_row {span['next_row']}")
+
+
+if __name__ == "__main__":
+    main()
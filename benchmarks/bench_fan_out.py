@@ -0,0 +1,131 @@
+"""Throughput of the RFI agent over a container of submissions: one conversation working through
+the submissions one by one, as `run_RFI_agent.py` does, and `RFI_fan_out.fan_out` with one thread
+per submission at several concurrency limits. The agent is scripted by `FakeAgentsServer`, with a
+fixed model time per step, and its tool calls go through `run_RFI_agent.tools` against local
+Document Intelligence and blob stand-ins. Every variant has to produce the comparison of all
+suppliers. The fixed model time favours the single conversation, whose steps really get slower
+as its context grows with every submission.
+
+Run from the repository root:
+    python -m benchmarks.bench_fan_out --files 16 --step-time 0.5 --processing-time 1 --concurrency 1 4 16
+"""
+import argparse
+import base64
+import json
+import os
+import re
+import tempfile
+import time
+
+from utils.fake_agents_server import FakeAgentsServer
+from utils.fake_blob_server import FakeBlobServer
+from utils.fake_document_intelligence_server import FakeDocumentIntelligenceServer
+
+
+def submission_steps(name: str, record_name: str):
+    """The steps the agent takes for one submission: download, extract, save the completed record."""
+
+    def extract(outputs):
+        return {"tool_calls": [{"name": "extract_text_tables", "arguments": {"blob_path": json.loads(outputs[0])["blob_path"]}}]}
+
+    def save(outputs):
+        record = json.loads(outputs[0])["normalized"]["record"]
+        # The agent fills what the normalizer was not confident about
+        record["supplier_name"] = record.get("supplier_name") or name.rsplit(".", 1)[0]
+        if record.get("delivery_time_days") is None:
+            record["delivery_time_days"] = 30
+        data_b64 = base64.b64encode(json.dumps(record).encode("utf-8")).decode("ascii")
+        return {"tool_calls": [{"name": "upload_result", "arguments": {"name": record_name, "data_b64": data_b64}}]}
+
+    return [{"tool_calls": [{"name": "download_blob", "arguments": {"name": name}}]}, extract, save]
+
+
+def script_for(names):
+    """Scripted agent: a fan-out thread handles the submission named in its message, a summary run
+    uploads the summary, and the single conversation goes through every submission in turn."""
+    import RFI_fan_out
+
+    def script(text):
+        match = re.search(r"Process only the RFI submission '([^']+)'", text)
+        if match:
+            name = match.group(1)
+            return submission_steps(name, RFI_fan_out.record_name(name)) + [{"message": "saved"}]
+        summary = {"name": "rfi_summary.md", "data_b64": base64.b64encode(b"# Summary").decode("ascii")}
+        if text.lstrip().startswith("All "):
+            return [{"tool_calls": [{"name": "upload_result", "arguments": summary}]}, {"message": "done"}]
+        steps = [{"tool_calls": [{"name": "list_rfi_blobs", "arguments": {}}]}]
+        for name in names:
+            steps += submission_steps(name, name + ".json")
+        record_blobs = [f"rfi-results/{name}.json" for name in names]
+        steps += [
+            {"tool_calls": [{"name": "compare_suppliers", "arguments": {"record_blobs": record_blobs}}]},
+            {"tool_calls": [{"name": "upload_result", "arguments": summary}]},
+            {"message": "done"},
+        ]
+        return steps
+
+    return script
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=16)
+    parser.add_argument("--step-time", type=float, default=0.5, help="seconds the model takes per step")
+    parser.add_argument("--processing-time", type=float, default=1.0, help="seconds of analysis per document")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    with FakeDocumentIntelligenceServer(processing_time=args.processing_time) as di_server, FakeBlobServer() as blob_server:
+        os.environ.update(
+            DOCUMENT_INTELLIGENCE_ENDPOINT=di_server.endpoint,
+            DOCUMENT_INTELLIGENCE_API_KEY="fake-key",
+            AZURE_STORAGE_ACCOUNT_URL=blob_server.account_url,
+            AZURE_STORAGE_CONNECTION_STRING=blob_server.connection_string,
+            PROJECT_ENDPOINT="https://example.services.ai.azure.com/api/projects/benchmark",
+            RFI_AGENT_ID="benchmark",
+        )
+        names = [f"supplier_{index}.pdf" for index in range(args.files)]
+        for name in names:
+            blob_server.put_blob("rfi-submissions", name, os.urandom(64 * 1024))
+
+        import RFI_fan_out
+        import RFI_tools
+        import run_RFI_agent
+        from utils.run_driver import RunDriver
+
+        def fresh_manifest():
+            # Every variant extracts every submission again
+            os.environ["RFI_MANIFEST_PATH"] = os.path.join(tempfile.mkdtemp(), "manifest.json")
+            RFI_tools.RFI_MANIFEST_PATH = os.environ["RFI_MANIFEST_PATH"]
+            RFI_tools.get_manifest.reset()
+
+        print(f"{args.files} submissions, {args.step_time:.1f}s model time per step, {args.processing_time:.1f}s analysis each")
+        with FakeAgentsServer(script_for(names), step_time=args.step_time) as agents_server:
+            agents = agents_server.agents_client()
+
+            fresh_manifest()
+            start = time.perf_counter()
+            thread = agents.threads.create()
+            agents.messages.create(thread_id=thread.id, role="user", content="Process RFI submissions in the container.")
+            run, stats = RunDriver(agents, run_RFI_agent.tools).run(thread.id, "asst_benchmark")
+            elapsed = time.perf_counter() - start
+            assert run.status == "completed", run.status
+            comparison = [output for output in agents_server.tool_outputs if output["name"] == "compare_suppliers"][-1]
+            assert json.loads(comparison["output"])["suppliers"] == args.files, comparison
+            print(f"{'one conversation':>20}: {elapsed:6.2f}s, {args.files / elapsed:5.2f} submissions per second, {stats.steps} steps")
+
+            for concurrency in args.concurrency:
+                fresh_manifest()
+                start = time.perf_counter()
+                result = RFI_fan_out.fan_out(agents, "asst_benchmark", run_RFI_agent.tools, concurrency=concurrency)
+                elapsed = time.perf_counter() - start
+                assert result["succeeded"] == args.files, [job for job in result["documents"] if job["status"] != "succeeded"]
+                assert result["comparison"]["suppliers"] == args.files
+                print(
+                    f"{f'fan-out x{concurrency}':>20}: {elapsed:6.2f}s, {args.files / elapsed:5.2f} submissions per second "
+                    f"({result['map_time']:.2f}s map, {result['run_time'] - result['map_time']:.2f}s reduce)"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Import time of the tool modules and the agent scripts, measured with `python -X importtime`
+in fresh interpreters without any Azure settings, as when an agent is provisioned or a CLI starts.
+Prints the best cumulative time of every module over a few runs and its slowest imports. Exits
+with status 1 if a tool module takes longer than --max-ms, so it can guard startup time in CI.
+
+Run from the repository root:
+    python -m benchmarks.bench_import_time --repeat 5 --max-ms 150
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+TOOL_MODULES = ["RFI_tools", "doc_agent_tools"]
+# create_doc_processing_agent.py provisions its agent when imported, only its tool module is measured
+AGENT_MODULES = ["create_RFI_agent"]
+
+# "import time: self [us] | cumulative | imported package", nesting shown by indentation
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def import_times(module: str) -> List[Tuple[str, int, int]]:
+    """(module, cumulative µs, nesting depth) of every import of `module` in a fresh interpreter."""
+    # Without Azure settings, importing must not need credentials or build clients
+    env = {key: value for key, value in os.environ.items() if not key.startswith(("AZURE_", "DOCUMENT_INTELLIGENCE_"))}
+    env["PROJECT_ENDPOINT"] = "https://example.services.ai.azure.com/api/projects/benchmark"
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+    times = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            times.append((match.group(4), int(match.group(2)), len(match.group(3)) // 2))
+    return times
+
+
+def best_times(module: str, repeat: int) -> Dict[str, int]:
+    """Cumulative µs of the module and its direct imports, best of `repeat` runs."""
+    best: Dict[str, int] = {}
+    for _ in range(repeat):
+        # A module is printed after its imports, so the direct imports of `module` are the depth 1
+        # lines since the last top level one
+        direct: Dict[str, int] = {}
+        for name, cumulative, depth in import_times(module):
+            if depth == 0 and name != module:
+                direct = {}
+            elif depth <= 1:
+                direct[name] = cumulative
+        for name, cumulative in direct.items():
+            best[name] = min(cumulative, best.get(name, cumulative))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=150.0)
+    args = parser.parse_args()
+
+    too_slow = []
+    for module in TOOL_MODULES + AGENT_MODULES:
+        times = best_times(module, args.repeat)
+        total_ms = times.pop(module) / 1000
+        print(f"{module:>28}: {total_ms:7.1f} ms")
+        for name, cumulative in sorted(times.items(), key=lambda item: -item[1])[: args.top]:
+            print(f"{'':>30}{cumulative / 1000:7.1f} ms  {name}")
+        if module in TOOL_MODULES and total_ms > args.max_ms:
+            too_slow.append(module)
+
+    if too_slow:
+        print(f"Slower than {args.max_ms:.0f} ms to import: {', '.join(too_slow)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
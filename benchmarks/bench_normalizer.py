@@ -0,0 +1,87 @@
+"""Throughput and accuracy of the local RFI normalizer on synthetic extracted submissions: a
+standard questionnaire table, the same answers as "Label: value" lines, and a free-form letter
+where most fields should be left to the agent.
+
+Run from the repository root:
+    python -m benchmarks.bench_normalizer --submissions 2000 --filler-lines 200
+"""
+import argparse
+import random
+import time
+
+from RFI_normalizer import DEFAULT_MIN_CONFIDENCE, normalize_submission
+
+REGIONS = ["EU", "UK", "US", "APAC", "LATAM", "Nordics", "DACH"]
+
+
+def synthetic_submission(index: int, filler_lines: int):
+    """(extracted submission, expected record) in one of three layouts."""
+    rng = random.Random(index)
+    regions = rng.sample(REGIONS, rng.randint(1, 3))
+    truth = {
+        "supplier_name": f"Supplier {index} GmbH",
+        "contact_email": f"rfi{index}@supplier{index}.example",
+        "coverage_regions": regions,
+        "delivery_time_days": rng.choice([5, 10, 14, 21, 30]),
+        "iso_27001": rng.choice(["yes", "no"]),
+        "sla_summary": f"{rng.choice(['99.5', '99.9', '99.95'])}% uptime, P1 response in {rng.randint(1, 8)}h",
+        "pricing_notes": f"{rng.randint(5, 50)} EUR per user and month, excl. VAT",
+        "exceptions": [],
+        "attachments": [f"certificate_{index}.pdf", f"pricing_{index}.xlsx"],
+    }
+    answers = [
+        ("Supplier name", truth["supplier_name"]),
+        ("Contact email", truth["contact_email"]),
+        ("Coverage regions", ", ".join(regions)),
+        ("Delivery time (days)", str(truth["delivery_time_days"])),
+        ("ISO 27001 certified?", "Yes, certificate no. 4711" if truth["iso_27001"] == "yes" else "No"),
+        ("SLA summary", truth["sla_summary"]),
+        ("Pricing notes", truth["pricing_notes"]),
+        ("Exceptions", "None"),
+        ("Attachments", "; ".join(truth["attachments"])),
+    ]
+    filler = [f"Section {line}: our approach to quality and delivery is described below." for line in range(filler_lines)]
+    layout = index % 3
+    if layout == 0:
+        table = [["No.", "Question", "Answer"]] + [[str(row), label, value] for row, (label, value) in enumerate(answers, 1)]
+        return {"text": "\n".join(filler), "tables": [table]}, truth, "questionnaire table"
+    if layout == 1:
+        lines = [f"{label}: {value}" for label, value in answers]
+        return {"text": "\n".join(lines + filler), "tables": []}, truth, "label lines"
+    letter = (
+        f"Dear buyer,\n{truth['supplier_name']} is pleased to respond. Reach us at {truth['contact_email']}.\n"
+        f"We deliver across {' and '.join(regions)} within about {truth['delivery_time_days']} days.\n"
+    )
+    return {"text": letter + "\n".join(filler), "tables": []}, truth, "free-form letter"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--submissions", type=int, default=2000)
+    parser.add_argument("--filler-lines", type=int, default=200)
+    args = parser.parse_args()
+
+    submissions = [synthetic_submission(index, args.filler_lines) for index in range(args.submissions)]
+    start = time.perf_counter()
+    results = [normalize_submission(extracted, source=f"{index}.pdf") for index, (extracted, _, _) in enumerate(submissions)]
+    elapsed = time.perf_counter() - start
+    print(f"{args.submissions} submissions in {elapsed:.2f}s: {args.submissions / elapsed:.0f} per second on one core")
+
+    stats = {}
+    for (_, truth, layout), result in zip(submissions, results):
+        layout_stats = stats.setdefault(layout, {"confident": 0, "correct": 0, "fields": 0})
+        for field, expected in truth.items():
+            layout_stats["fields"] += 1
+            if result["confidence"][field] >= DEFAULT_MIN_CONFIDENCE:
+                layout_stats["confident"] += 1
+                layout_stats["correct"] += result["record"][field] == expected
+    for layout, layout_stats in stats.items():
+        confident = layout_stats["confident"]
+        print(
+            f"{layout:>20}: {confident / layout_stats['fields']:6.1%} of fields filled locally, "
+            f"{layout_stats['correct'] / max(confident, 1):6.1%} of those correct"
+        )
+
+
+if __name__ == "__main__":
+    main()
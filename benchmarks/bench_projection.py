@@ -0,0 +1,125 @@
+"""Peak and retained client memory of a full and a projected ("content", "tables") layout result
+for a synthetic 300-page document, served by a local fake Document Intelligence server running
+in a separate process.
+
+Run from the repository root:
+    python -m benchmarks.bench_projection --pages 300
+"""
+import argparse
+import multiprocessing
+import os
+import time
+import tracemalloc
+
+from utils.fake_document_intelligence_server import FakeDocumentIntelligenceServer
+
+
+class LayoutResultServer(FakeDocumentIntelligenceServer):
+    """Answers with a layout-sized result: words with polygons, lines, paragraphs, styles and one table per page."""
+
+    def __init__(self, page_count: int, words_per_page: int = 400, **kwargs):
+        super().__init__(**kwargs)
+        self.page_count = page_count
+        self.words_per_page = words_per_page
+
+    def analyze_result(self, document, pages=None):
+        content, result_pages, paragraphs, tables = "", [], [], []
+        for page_number in range(1, self.page_count + 1):
+            words = []
+            for index in range(self.words_per_page):
+                text = f"word{index}"
+                words.append(
+                    {
+                        "content": text,
+                        "polygon": [1.0 + index, 2.0, 1.5 + index, 2.0, 1.5 + index, 2.2, 1.0 + index, 2.2],
+                        "confidence": 0.99,
+                        "span": {"offset": len(content), "length": len(text)},
+                    }
+                )
+                content += text + " "
+            result_pages.append(
+                {
+                    "pageNumber": page_number,
+                    "width": 8.5,
+                    "height": 11,
+                    "unit": "inch",
+                    "words": words,
+                    "lines": [
+                        {"content": "line", "polygon": [0.0] * 8, "spans": [{"offset": 0, "length": 4}]}
+                        for _ in range(40)
+                    ],
+                    "spans": [{"offset": 0, "length": len(content)}],
+                }
+            )
+            paragraphs.append(
+                {
+                    "content": "paragraph",
+                    "boundingRegions": [{"pageNumber": page_number, "polygon": [0.0] * 8}],
+                    "spans": [{"offset": 0, "length": 9}],
+                }
+            )
+            tables.append(
+                {
+                    "rowCount": 5,
+                    "columnCount": 4,
+                    "cells": [
+                        {"rowIndex": row, "columnIndex": column, "content": f"{row}:{column}"}
+                        for row in range(5)
+                        for column in range(4)
+                    ],
+                    "boundingRegions": [{"pageNumber": page_number, "polygon": [0.0] * 8}],
+                }
+            )
+        return {
+            "apiVersion": "2024-11-30",
+            "content": content,
+            "pages": result_pages,
+            "paragraphs": paragraphs,
+            "tables": tables,
+            "styles": [{"confidence": 0.9, "spans": [{"offset": 0, "length": 1}]} for _ in range(1000)],
+        }
+
+
+def serve(page_count, endpoint_queue, stop_event):
+    with LayoutResultServer(page_count, processing_time=0.0) as server:
+        endpoint_queue.put(server.endpoint)
+        stop_event.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=300)
+    args = parser.parse_args()
+
+    endpoint_queue = multiprocessing.Queue()
+    stop_event = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(args.pages, endpoint_queue, stop_event))
+    server.start()
+    os.environ["DOCUMENT_INTELLIGENCE_ENDPOINT"] = endpoint_queue.get()
+    os.environ["DOCUMENT_INTELLIGENCE_API_KEY"] = "fake-key"
+
+    from utils.document_intelligence_handler import DocumentIntelligenceHandler
+
+    try:
+        for fields in (None, ("content", "tables")):
+            handler = DocumentIntelligenceHandler("documentModels", "prebuilt-layout", fields=fields)
+            tracemalloc.start()
+            start = time.perf_counter()
+            result = handler(b"%PDF-fake", initial_delay=0.01)
+            elapsed = time.perf_counter() - start
+            retained, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"{str(fields or 'full'):>21}: {elapsed:.2f}s"
+                f" response={result.log.get('response_bytes', 0) / 1024 / 1024:.1f} MiB"
+                f" peak={peak / 1024 / 1024:.1f} MiB retained={retained / 1024 / 1024:.1f} MiB"
+                f" ok={result.success}"
+            )
+            del result
+    finally:
+        stop_event.set()
+        server.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Wall time of one agent run with several tool steps, driven by the runners' former loop (status
+request every second, tool calls one after another), by `RunDriver` polling adaptively and by
+`RunDriver` streaming the run's events. Runs against `FakeAgentsServer`, where the model takes a
+fixed time per step and every tool call sleeps a fixed time, and reports the polls and the time
+spent outside of tools.
+
+Run from the repository root:
+    python -m benchmarks.bench_run_driver --steps 6 --calls 3 --step-time 0.7 --tool-time 0.3
+"""
+import argparse
+import json
+import time
+
+from utils.fake_agents_server import FakeAgentsServer
+from utils.run_driver import RunDriver, ToolRegistry
+
+
+def legacy_run(agents, thread_id, agent_id, tools):
+    """The loop the runners used before `RunDriver`, returns (run, polls, tool seconds)."""
+    run = agents.runs.create(thread_id=thread_id, agent_id=agent_id)
+    polls, tool_seconds = 0, 0.0
+    while run.status in ["queued", "in_progress", "requires_action"]:
+        time.sleep(1)
+        run = agents.runs.get(thread_id=thread_id, run_id=run.id)
+        polls += 1
+        if run.status == "requires_action":
+            start = time.perf_counter()
+            outputs = [
+                {"tool_call_id": tc.id, "output": tools(tc)} for tc in run.required_action.submit_tool_outputs.tool_calls
+            ]
+            tool_seconds += time.perf_counter() - start
+            agents.runs.submit_tool_outputs(thread_id=thread_id, run_id=run.id, tool_outputs=outputs)
+    return run, polls, tool_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=6)
+    parser.add_argument("--calls", type=int, default=3, help="tool calls per step")
+    parser.add_argument("--step-time", type=float, default=0.7, help="seconds the model takes per step")
+    parser.add_argument("--tool-time", type=float, default=0.3, help="seconds every tool call takes")
+    args = parser.parse_args()
+
+    tools = ToolRegistry()
+
+    @tools.register("work")
+    def work(arguments):
+        time.sleep(arguments["seconds"])
+        return {"ok": True}
+
+    step = {"tool_calls": [{"name": "work", "arguments": {"seconds": args.tool_time}}] * args.calls}
+    script = [step] * args.steps + [{"message": "Done."}]
+    print(
+        f"{args.steps} steps of {args.calls} tool calls, {args.step_time:.1f}s model time per step, "
+        f"{args.tool_time:.1f}s per tool call"
+    )
+
+    variants = [
+        ("1s polling, serial tools", None),
+        ("RunDriver, adaptive polling", False),
+        ("RunDriver, streaming", True),
+    ]
+    for name, stream in variants:
+        with FakeAgentsServer(script, step_time=args.step_time) as server:
+            agents = server.agents_client()
+            thread = agents.threads.create()
+            agents.messages.create(thread_id=thread.id, role="user", content="benchmark")
+            start = time.perf_counter()
+            if stream is None:
+                run, polls, tool_seconds = legacy_run(agents, thread.id, "asst_benchmark", tools)
+            else:
+                run, stats = RunDriver(agents, tools, stream=stream).run(thread.id, "asst_benchmark")
+                polls, tool_seconds = stats.polls, stats.tool_seconds
+            elapsed = time.perf_counter() - start
+            assert run.status == "completed", run.status
+            assert len(server.tool_outputs) == args.steps * args.calls, len(server.tool_outputs)
+            print(
+                f"{name:>28}: {elapsed:6.2f}s wall, {tool_seconds:5.2f}s in tools, "
+                f"{elapsed - tool_seconds:5.2f}s waiting, {polls:3d} polls, requests {json.dumps(server.request_counts)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""End to end runs of `run_RFI_agent.main` and `Doc_processing_agent.main` without Azure. The
+runners' `AIProjectClient` is pointed at `FakeAgentsServer`, which replays a scripted agent with
+a fixed model time per step and network latency per request, and their tools run against local
+Document Intelligence and blob stand-ins. Every runner is run with the streamed and the polled
+run loop, reporting wall time, status polls, time in tools and time waiting.
+
+Run from the repository root:
+    python -m benchmarks.bench_runners_e2e --files 8 --step-time 0.5 --latency 0.02 --processing-time 1
+"""
+import argparse
+import base64
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+
+from utils.fake_agents_server import FakeAgentsServer
+from utils.fake_blob_server import FakeBlobServer
+from utils.fake_document_intelligence_server import FakeDocumentIntelligenceServer
+
+DOC_CONTAINER = "proposals"
+
+
+def rfi_script():
+    """The RFI agent with parallel tool calls: list, download, extract, save, compare, summarize."""
+
+    def download(outputs):
+        files = json.loads(outputs[0])["files"]
+        return {"tool_calls": [{"name": "download_blob", "arguments": {"name": name}} for name in files]}
+
+    def extract(outputs):
+        return {
+            "tool_calls": [
+                {"name": "extract_text_tables", "arguments": {"blob_path": json.loads(output)["blob_path"]}}
+                for output in outputs
+            ]
+        }
+
+    def save(outputs):
+        calls = []
+        for output in outputs:
+            extracted = json.loads(output)
+            record = extracted["normalized"]["record"]
+            source = record["sources"][0]
+            record["supplier_name"] = record["supplier_name"] or source.rsplit(".", 1)[0]
+            if record["delivery_time_days"] is None:
+                record["delivery_time_days"] = 30
+            data_b64 = base64.b64encode(json.dumps(record).encode()).decode()
+            calls.append({"name": "upload_result", "arguments": {"name": source + ".json", "data_b64": data_b64}})
+        return {"tool_calls": calls}
+
+    def compare(outputs):
+        paths = [json.loads(output)["path"] for output in outputs]
+        return {"tool_calls": [{"name": "compare_suppliers", "arguments": {"record_blobs": paths}}]}
+
+    summary = {"name": "rfi_summary.md", "data_b64": base64.b64encode(b"# RFI summary").decode()}
+    return [
+        {"tool_calls": [{"name": "list_rfi_blobs", "arguments": {"prefix": ""}}]},
+        download,
+        extract,
+        save,
+        compare,
+        {"tool_calls": [{"name": "upload_result", "arguments": summary}]},
+        {"message": "Saved the supplier JSONs, the comparison, the shortlist and rfi_summary.md."},
+    ]
+
+
+def doc_script():
+    """The document agent: list, analyze the first PDF, save its result."""
+
+    def analyze(outputs):
+        blob_name = next(name for name in json.loads(outputs[0]) if name.endswith(".pdf"))
+        return {"tool_calls": [{"name": "analyze_blob_with_di", "arguments": {"blob_name": blob_name}}]}
+
+    def save(outputs):
+        result = json.loads(outputs[0])
+        target = "outputs/" + result["blob_name"].rsplit(".", 1)[0] + ".json"
+        return {"tool_calls": [{"name": "save_json_to_blob", "arguments": {"target_blob_name": target, "data_json": result}}]}
+
+    return [
+        {"tool_calls": [{"name": "list_container_files", "arguments": {"prefix": ""}}]},
+        analyze,
+        save,
+        {"message": "Saved the analysis."},
+    ]
+
+
+def script(text):
+    return doc_script() if "list_container_files" in text else rfi_script()
+
+
+def point_at(module, server):
+    """Make a runner module build its `AIProjectClient` against the fake server."""
+    from azure.ai.projects import AIProjectClient
+
+    def project_client(endpoint, credential, **kwargs):
+        return AIProjectClient(**kwargs, **server.client_kwargs)
+
+    module.AIProjectClient = project_client
+    module.DefaultAzureCredential = lambda: None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--step-time", type=float, default=0.5, help="seconds the model takes per step")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds every agents API request takes")
+    parser.add_argument("--processing-time", type=float, default=1.0, help="seconds of analysis per document")
+    args = parser.parse_args()
+
+    with FakeDocumentIntelligenceServer(processing_time=args.processing_time) as di_server, FakeBlobServer() as blob_server, \
+            FakeAgentsServer(script, step_time=args.step_time, latency=args.latency) as agents_server:
+        os.environ.update(
+            PROJECT_ENDPOINT=agents_server.endpoint,
+            RFI_AGENT_ID="asst_rfi",
+            DOC_AGENT_ID="asst_doc",
+            DOCUMENT_INTELLIGENCE_ENDPOINT=di_server.endpoint,
+            DOCUMENT_INTELLIGENCE_API_KEY="fake-key",
+            AZURE_STORAGE_ACCOUNT_URL=blob_server.account_url,
+            AZURE_STORAGE_CONNECTION_STRING=blob_server.connection_string,
+            CONTAINER_NAME=DOC_CONTAINER,
+            RFI_MANIFEST_PATH=os.path.join(tempfile.mkdtemp(), "manifest.json"),
+            # Every run extracts again instead of reusing the first run's artifacts
+            RFI_INCREMENTAL="0",
+        )
+        for index in range(args.files):
+            blob_server.put_blob("rfi-submissions", f"supplier_{index}.pdf", os.urandom(64 * 1024))
+        blob_server.put_blob(DOC_CONTAINER, "proposal.pdf", os.urandom(64 * 1024))
+
+        import Doc_processing_agent
+        import run_RFI_agent
+
+        print(
+            f"{args.files} RFI submissions, {args.step_time:.1f}s model time per step, "
+            f"{args.latency * 1000:.0f}ms per request, {args.processing_time:.1f}s analysis per document"
+        )
+        for runner in (run_RFI_agent, Doc_processing_agent):
+            point_at(runner, agents_server)
+            for mode, stream in (("stream", "1"), ("poll", "0")):
+                os.environ["AGENT_RUN_STREAM"] = stream
+                start_counts = dict(agents_server.request_counts)
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    stats = runner.main()
+                elapsed = time.perf_counter() - start
+                requests = {key: agents_server.request_counts[key] - start_counts[key] for key in start_counts}
+                assert stats.status == "completed", stats
+                assert not any("error" in json.loads(output["output"]) for output in agents_server.tool_outputs
+                               if output["output"].startswith("{")), agents_server.tool_outputs
+                print(
+                    f"{runner.__name__:>20} {mode:>6}: {elapsed:6.2f}s wall, {stats.steps} steps, "
+                    f"{stats.tool_seconds:5.2f}s in tools, {stats.idle_seconds:5.2f}s waiting, {stats.polls:3d} polls, "
+                    f"{sum(requests.values())} requests"
+                )
+
+
+if __name__ == "__main__":
+    main()
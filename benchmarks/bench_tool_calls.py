@@ -0,0 +1,65 @@
+"""Latency of one requires_action step in which the agent asks for `extract_text_tables` on
+several submissions, with the calls run one after another as before and concurrently with
+`run_tool_calls`. Goes through `run_RFI_agent.tools` against local Document
+Intelligence and blob stand-ins, with a fixed analysis time per document.
+
+Run from the repository root:
+    python -m benchmarks.bench_tool_calls --files 5 --processing-time 2
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from utils.fake_blob_server import FakeBlobServer
+from utils.fake_document_intelligence_server import FakeDocumentIntelligenceServer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=5)
+    parser.add_argument("--processing-time", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with FakeDocumentIntelligenceServer(processing_time=args.processing_time) as di_server, FakeBlobServer() as blob_server:
+        os.environ.update(
+            DOCUMENT_INTELLIGENCE_ENDPOINT=di_server.endpoint,
+            DOCUMENT_INTELLIGENCE_API_KEY="fake-key",
+            AZURE_STORAGE_ACCOUNT_URL=blob_server.account_url,
+            AZURE_STORAGE_CONNECTION_STRING=blob_server.connection_string,
+            RFI_MANIFEST_PATH=os.path.join(tempfile.mkdtemp(), "manifest.json"),
+            PROJECT_ENDPOINT="https://example.services.ai.azure.com/api/projects/benchmark",
+            RFI_AGENT_ID="benchmark",
+        )
+        for index in range(args.files):
+            blob_server.put_blob("rfi-submissions", f"supplier_{index}.pdf", os.urandom(64 * 1024))
+
+        import run_RFI_agent
+        from utils.tool_calls import run_tool_calls
+
+        tool_calls = [
+            SimpleNamespace(
+                id=f"call_{index}",
+                function=SimpleNamespace(
+                    name="extract_text_tables",
+                    # force, so every variant calls Document Intelligence instead of reusing the artifact
+                    arguments=json.dumps({"blob_path": f"rfi-submissions/supplier_{index}.pdf", "force": True}),
+                ),
+            )
+            for index in range(args.files)
+        ]
+        print(f"{args.files} extract_text_tables calls, {args.processing_time:.1f}s analysis each")
+        for name, max_workers in [("one after another", 1), ("run_tool_calls", None)]:
+            start = time.perf_counter()
+            outputs, durations = run_tool_calls(tool_calls, run_RFI_agent.tools, max_workers=max_workers)
+            elapsed = time.perf_counter() - start
+            assert [output["tool_call_id"] for output in outputs] == [call.id for call in tool_calls]
+            assert all(duration["ok"] for duration in durations), durations
+            slowest = max(duration["seconds"] for duration in durations)
+            print(f"{name:>20}: step {elapsed:6.2f}s, slowest call {slowest:5.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Peak client memory and upload time of the "binary" and "base64" upload modes
+against a local fake Document Intelligence server running in a separate process.
+
+Run from the repository root:
+    python -m benchmarks.bench_upload_mode --size-mb 50
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+import tracemalloc
+
+from utils.fake_document_intelligence_server import FakeDocumentIntelligenceServer
+
+
+def serve(endpoint_queue, stop_event):
+    with FakeDocumentIntelligenceServer(processing_time=0.0) as server:
+        endpoint_queue.put(server.endpoint)
+        stop_event.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=50)
+    args = parser.parse_args()
+
+    endpoint_queue = multiprocessing.Queue()
+    stop_event = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(endpoint_queue, stop_event))
+    server.start()
+    os.environ["DOCUMENT_INTELLIGENCE_ENDPOINT"] = endpoint_queue.get()
+    os.environ["DOCUMENT_INTELLIGENCE_API_KEY"] = "fake-key"
+
+    from utils.document_intelligence_handler import DocumentIntelligenceHandler
+
+    try:
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as document:
+            document.write(os.urandom(args.size_mb * 1024 * 1024))
+            document.flush()
+
+            for upload_mode in ("base64", "binary"):
+                handler = DocumentIntelligenceHandler(
+                    "documentModels", "prebuilt-layout", upload_mode=upload_mode
+                )
+                tracemalloc.start()
+                start = time.perf_counter()
+                result = handler(document.name, initial_delay=0.01)
+                elapsed = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                print(
+                    f"{upload_mode:>6}: {elapsed:.2f}s peak={peak / 1024 / 1024:.1f} MiB"
+                    f" ok={result.success}"
+                )
+    finally:
+        stop_event.set()
+        server.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Requests, bytes and time to upload many small per-supplier JSON results: the previous
+`upload_result` that tried to create the container before every upload, the current one that
+creates it once per process, `upload_results` writing them concurrently, and gzip/zstd encoding.
+Runs against a local Azurite-style blob stand-in with per-request latency in a separate process.
+
+Run from the repository root:
+    python -m benchmarks.bench_upload_results --results 500 --latency 0.02
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+
+RESULTS_CONTAINER = "rfi-results"
+
+
+def serve(latency, endpoint_queue, control):
+    from utils.fake_blob_server import FakeBlobServer
+
+    with FakeBlobServer(latency=latency) as blob_server:
+        endpoint_queue.put(blob_server.connection_string)
+        # Answer every message with the request counts and stored bytes, stop on None
+        while control.recv() is not None:
+            blobs = blob_server.containers.get(RESULTS_CONTAINER, {}).values()
+            control.send((dict(blob_server.request_counts), sum(len(blob.data) for blob in blobs)))
+
+
+def supplier_json(index: int) -> bytes:
+    """A normalized RFI result with some free text, as the agent uploads per supplier."""
+    rng = random.Random(index)
+    words = ["delivery", "support", "ISO", "27001", "SLA", "uptime", "price", "discount", "EUR", "days"]
+    return json.dumps(
+        {
+            "supplier_name": f"Supplier {index}",
+            "delivery_time_days": rng.randint(5, 90),
+            "iso_27001": rng.random() > 0.5,
+            "sla_summary": " ".join(rng.choice(words) for _ in range(400)),
+            "pricing_notes": " ".join(rng.choice(words) for _ in range(300)),
+            "sources": [f"submissions/{index}.pdf"],
+        },
+        indent=2,
+    ).encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--results", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    endpoint_queue = multiprocessing.Queue()
+    control, server_control = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=serve, args=(args.latency, endpoint_queue, server_control))
+    server.start()
+    connection_string = endpoint_queue.get()
+    os.environ.update(
+        AZURE_STORAGE_CONNECTION_STRING=connection_string,
+        AZURE_STORAGE_ACCOUNT_URL=connection_string.split("BlobEndpoint=")[1].rstrip(";"),
+    )
+
+    import RFI_tools
+
+    def legacy_upload_result(name, data, container=RESULTS_CONTAINER):
+        """`upload_result` before container existence was cached."""
+        container_client = RFI_tools.get_blob_service().get_container_client(container)
+        try:
+            container_client.create_container()
+        except Exception:
+            pass
+        container_client.upload_blob(name, data, overwrite=True)
+
+    files = [(f"suppliers/{index}.json", supplier_json(index)) for index in range(args.results)]
+    raw_bytes = sum(len(data) for _, data in files)
+    print(f"{args.results} results, {raw_bytes / 1024 / 1024:.1f} MiB, {args.latency * 1000:.0f}ms latency")
+
+    def measure(name, function):
+        control.send("counts")
+        before, _ = control.recv()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        control.send("counts")
+        after, stored = control.recv()
+        requests = sum(after.values()) - sum(before.values())
+        print(f"{name:>30}: {elapsed:6.2f}s {requests:6d} requests {stored / 1024 / 1024:6.2f} MiB stored")
+
+    try:
+        measure("legacy, serial", lambda: [legacy_upload_result(name, data) for name, data in files])
+        measure("cached container, serial", lambda: [RFI_tools.upload_result(name, data) for name, data in files])
+        for encoding in ("", "gzip", "zstd"):
+            measure(
+                f"upload_results {encoding or 'identity'}",
+                lambda: RFI_tools.upload_results(files, content_encoding=encoding, max_workers=args.workers),
+            )
+        path = RFI_tools.upload_results(files[:1], content_encoding="zstd")[0]
+        assert RFI_tools.download_result(path.split("/", 1)[1]) == files[0][1]
+    finally:
+        control.send(None)
+        server.join()
+
+
+if __name__ == "__main__":
+    main()
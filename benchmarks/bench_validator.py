@@ -0,0 +1,89 @@
+"""Validation of many RFI records against `RFI_SCHEMA_JSON`: parsing and compiling the schema for
+every record, `jsonschema` if it is installed, and the validator `RFI_schema.get_validator`
+compiles once. Half of the synthetic records are valid, the other half break one field each.
+Checks that every invalid record is reported with an error on the field that was broken.
+
+Run from the repository root:
+    python -m benchmarks.bench_validator --records 20000
+"""
+import argparse
+import json
+import random
+import time
+
+from RFI_schema import RFI_SCHEMA_JSON, get_validator
+from utils.schema_validator import SchemaValidator
+
+try:
+    import jsonschema
+except ImportError:  # Only compared against if installed
+    jsonschema = None
+
+REGIONS = ["EU", "UK", "US", "APAC", "LATAM", "Nordics", "DACH"]
+
+# Ways to break a record, by the field they break
+MUTATIONS = {
+    "supplier_name": lambda record: record.pop("supplier_name"),
+    "coverage_regions": lambda record: record["coverage_regions"].append(3),
+    "delivery_time_days": lambda record: record.update(delivery_time_days="two weeks"),
+    "iso_27001": lambda record: record.update(iso_27001="maybe"),
+    "sla_summary": lambda record: record.update(sla_summary=None),
+    "attachments": lambda record: record.update(attachments="certificate.pdf"),
+}
+
+
+def synthetic_record(index: int):
+    """(record, broken field or None), every second record is broken."""
+    rng = random.Random(index)
+    record = {
+        "supplier_name": f"Supplier {index}",
+        "contact_email": f"rfi@supplier{index}.example",
+        "coverage_regions": rng.sample(REGIONS, rng.randint(1, 3)),
+        "delivery_time_days": rng.choice([5, 14, 30]),
+        "iso_27001": rng.choice(["yes", "no", "unclear"]),
+        "sla_summary": "99.9% uptime",
+        "pricing_notes": "20 EUR per user and month",
+        "exceptions": [],
+        "attachments": [f"certificate_{index}.pdf"],
+        "sources": [f"{index}.pdf"],
+    }
+    if index % 2 == 0:
+        return record, None
+    field = rng.choice(list(MUTATIONS))
+    MUTATIONS[field](record)
+    return record, field
+
+
+def measure(name, records, validate):
+    start = time.perf_counter()
+    results = [validate(record) for record in records]
+    elapsed = time.perf_counter() - start
+    print(f"{name:>34}: {elapsed:6.3f}s {len(records) / elapsed:10.0f} records per second")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=20000)
+    args = parser.parse_args()
+
+    corpus = [synthetic_record(index) for index in range(args.records)]
+    records = [record for record, _ in corpus]
+    print(f"{args.records} records, {sum(field is not None for _, field in corpus)} invalid")
+
+    measure("parse and compile per record", records, lambda record: SchemaValidator(json.loads(RFI_SCHEMA_JSON)).errors(record))
+    if jsonschema is not None:
+        validator = jsonschema.Draft202012Validator(json.loads(RFI_SCHEMA_JSON))
+        measure("jsonschema, compiled once", records, lambda record: list(validator.iter_errors(record)))
+    else:
+        print(f"{'jsonschema':>34}: not installed")
+    get_validator.reset()
+    results = measure("get_validator, compiled once", records, get_validator().errors)
+
+    for (_, field), errors in zip(corpus, results):
+        assert bool(errors) == (field is not None), (field, errors)
+        assert field is None or field in {error["field"] for error in errors}, (field, errors)
+
+
+if __name__ == "__main__":
+    main()
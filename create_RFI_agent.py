@@ -4,7 +4,7 @@ from azure.identity import DefaultAzureCredential
 from azure.ai.projects import AIProjectClient
 from azure.ai.agents.models import FunctionTool
 from RFI_schema import RFI_SCHEMA_JSON
-from RFI_tools import list_rfi_blobs, download_blob, extract_text_tables, upload_result
+from RFI_tools import list_rfi_blobs, download_blob, extract_text_tables, read_extracted_range, upload_result, compare_suppliers
 
 load_dotenv()
 PROJECT_ENDPOINT = os.environ["PROJECT_ENDPOINT"]
@@ -22,12 +22,26 @@ Rules:
   3. Call `extract_text_tables` with `blob_path` (not file bytes) to extract text and tables.
   4. Normalize output to STRICT JSON matching this schema:
 {RFI_SCHEMA_JSON}
-  5. Perform gap checks and note missing or unclear fields.
-  6. Create a supplier comparison CSV (supplier_name, delivery_time_days, iso_27001, sla_summary, pricing_notes).
-  7. Draft buyer clarification bullet points per supplier and a 10-line internal summary.
+     If the tool output contains `normalized`, its `record` was already filled from the submission with a
+     confidence per field. Keep those values and only fill the fields listed in `normalized.low_confidence`.
+     The tool returns a `digest` of the submission instead of all of it: headings and "Label: value" lines with
+     their line numbers and the tables as CSV. Call `read_extracted_range` with its `result_blob` and a line
+     range, or a table and row range, to read what the digest does not show. Continue a cut range from its
+     `next_line` or `next_row`, passing its `next_char` as `start_char` when it returns one.
+  5. Save every supplier's JSON with `upload_result`, then call `compare_suppliers` once with all their paths.
+     It performs the gap checks, writes the supplier comparison CSV (supplier_name, delivery_time_days,
+     iso_27001, sla_summary, pricing_notes) and a shortlist ranked by the buyer's requirements, and returns
+     the missing fields and follow-ups of every supplier. Do not build the CSV yourself.
+  6. Draft buyer clarification bullet points per supplier from its gaps and a 10-line internal summary
+     based on the shortlist.
+- When asked to process only one submission, the others are processed in parallel threads: do steps 2 to 4
+  for it and save its JSON under the name given, without listing the container or comparing suppliers.
+  When given a finished comparison, only do step 6.
 
-- When saving outputs (per-supplier JSON, consolidated CSV, Markdown summary), always use `upload_result`.
+- When saving outputs (per-supplier JSON, Markdown summary), always use `upload_result`.
   Save them into the 'rfi-results' container, not in 'rfi-submissions'.
+  A per-supplier JSON that does not match the schema is not saved: the tool returns every invalid field,
+  fix all of them and save it again.
 - If you are uncertain about a value, set it to "" or an empty array, do not hallucinate.
 - Keep an evidence trail by listing any filenames you based values on in 'sources'.
 - Return concise text confirming artifacts saved, plus a list of produced artifact paths.
@@ -46,7 +60,9 @@ def main():
         list_rfi_blobs,
         download_blob,
         extract_text_tables,
+        read_extracted_range,
         upload_result,
+        compare_suppliers,
     })
 
     with client:
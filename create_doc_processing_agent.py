@@ -4,12 +4,12 @@ from dotenv import load_dotenv
 from azure.identity import DefaultAzureCredential
 from azure.ai.projects import AIProjectClient
 from azure.ai.agents.models import FunctionTool
-from doc_agent_tools import list_container_files, analyze_blob_with_di, save_json_to_blob
+from doc_agent_tools import list_container_files, analyze_blob_with_di, read_extracted_range, save_json_to_blob
 
 load_dotenv()
 PROJECT_ENDPOINT = os.environ["PROJECT_ENDPOINT"]
 
-functions = FunctionTool(functions={list_container_files, analyze_blob_with_di, save_json_to_blob})
+functions = FunctionTool(functions={list_container_files, analyze_blob_with_di, read_extracted_range, save_json_to_blob})
 
 
 DOC_AGENT_PROMPT = """
@@ -17,8 +17,9 @@ You are a document processing agent for procurement proposals.
 
 Available tools:
 1. `list_container_files(prefix: str)` → Lists blobs in the container.
-2. `analyze_blob_with_di(blob_name: str)` → Downloads and analyzes the specified file using Document Intelligence. Returns a JSON object with extracted fields and confidence scores.
-3. `save_json_to_blob(target_blob_name: str, data_json: Dict)` → Saves JSON data to the container.
+2. `analyze_blob_with_di(blob_name: str)` → Downloads and analyzes the specified file using Document Intelligence. Returns a JSON object with extracted fields and a digest of the text: headings and "Label: value" lines with their line numbers and the opening lines.
+3. `read_extracted_range(blob_name: str, start_line: int, end_line: int, start_char: int)` → Returns those lines of an analyzed file's text, for the parts the digest does not show. If it returns `next_char`, pass it as `start_char` with `next_line` to read the rest of a long line.
+4. `save_json_to_blob(target_blob_name: str, data_json: Dict)` → Saves JSON data to the container.
 
 Workflow you must always follow:
 - Start by calling `list_container_files` to see which files exist.
@@ -1,60 +1,109 @@
 # doc_agent_tools.py
 import json
 import os
-import tempfile
 import re 
-from typing import Any, Dict, List, Optional
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, List, Optional, Union
 
-from azure.storage.blob import BlobServiceClient
 from dotenv import load_dotenv
 
-from utils.document_intelligence_handler import DocumentIntelligenceHandler
-from utils.handler_result import HandlerResult
+from utils.blob_io import BlobChunkReader, map_bounded
+from utils.deadline import azure_call_kwargs
+from utils.digest import DEFAULT_BUDGET_TOKENS, build_digest, read_range
+from utils.lazy import once
 
-load_dotenv()
+if TYPE_CHECKING:
+    from azure.storage.blob import ContainerClient
 
-# ---- Clients (safe to init on import) ----
+    from utils.document_intelligence_handler import DocumentIntelligenceHandler
+    from utils.handler_result import HandlerResult
 
-di_handler = DocumentIntelligenceHandler(
-    model_type="documentModels",
-    model_id="prebuilt-layout",
-    #output_content_format="json",
-)
+load_dotenv()
 
-BLOB_CONN = os.environ["AZURE_STORAGE_CONNECTION_STRING"]
-CONTAINER_NAME = os.environ["CONTAINER_NAME"]
-container_client = BlobServiceClient.from_connection_string(BLOB_CONN).get_container_client(CONTAINER_NAME)
+# ---- Clients (built on first use, importing this module only reads settings) ----
+
+@once
+def get_di_handler() -> "DocumentIntelligenceHandler":
+    from utils.document_intelligence_cache import DocumentIntelligenceCache
+    from utils.document_intelligence_handler import DocumentIntelligenceHandler
+    from utils.metrics import PrometheusTextFileSink
+    from utils.rate_limiter import TokenBucketRateLimiter
+
+    return DocumentIntelligenceHandler(
+        model_type="documentModels",
+        model_id="prebuilt-layout",
+        #output_content_format="json",
+        # Only these parts of the result are used, the rest is dropped while it is parsed
+        fields=("content",),
+        cache=(
+            DocumentIntelligenceCache(os.environ["DOCUMENT_INTELLIGENCE_CACHE_DIR"])
+            if os.environ.get("DOCUMENT_INTELLIGENCE_CACHE_DIR")
+            else None
+        ),
+        # Requests per second of the DI tier, optionally shared between processes through a SQLite file
+        rate_limiter=(
+            TokenBucketRateLimiter(
+                float(os.environ["DOCUMENT_INTELLIGENCE_RATE_LIMIT"]),
+                state_path=os.environ.get("DOCUMENT_INTELLIGENCE_RATE_LIMIT_DB") or None,
+            )
+            if os.environ.get("DOCUMENT_INTELLIGENCE_RATE_LIMIT")
+            else None
+        ),
+        # Per-phase timings for the node_exporter textfile collector, one file and label set per process
+        metrics_sink=(
+            PrometheusTextFileSink.for_process(os.environ["DOCUMENT_INTELLIGENCE_METRICS_DIR"], "doc_agent_tools")
+            if os.environ.get("DOCUMENT_INTELLIGENCE_METRICS_DIR")
+            else None
+        ),
+    )
+
+BLOB_CHUNK_SIZE = int(os.environ.get("BLOB_CHUNK_SIZE", str(4 * 1024 * 1024)))
+BLOB_MAX_CONCURRENCY = int(os.environ.get("BLOB_MAX_CONCURRENCY", "4"))
+BLOB_DOWNLOAD_WORKERS = int(os.environ.get("BLOB_DOWNLOAD_WORKERS", "8"))
+BLOB_STREAM_TO_DI = os.environ.get("BLOB_STREAM_TO_DI", "0") == "1"
+BLOB_STREAM_CHUNK_SIZE = int(os.environ.get("BLOB_STREAM_CHUNK_SIZE", str(1024 * 1024)))
+# Size of the digest and ranges of an analysis returned to the agent, in tokens
+TOOL_OUTPUT_TOKEN_BUDGET = int(os.environ.get("TOOL_OUTPUT_TOKEN_BUDGET", str(DEFAULT_BUDGET_TOKENS)))
+# Texts of the latest analyses, so ranges are read without analyzing the blob again
+ANALYZED_TEXTS_KEPT = 16
+_analyzed_texts: "OrderedDict[str, str]" = OrderedDict()
+_analyzed_texts_lock = threading.Lock()
+
+@once
+def get_container_client() -> "ContainerClient":
+    from azure.storage.blob import BlobServiceClient
+
+    return BlobServiceClient.from_connection_string(
+        os.environ["AZURE_STORAGE_CONNECTION_STRING"],
+        max_single_get_size=BLOB_CHUNK_SIZE,
+        max_chunk_get_size=BLOB_CHUNK_SIZE,
+    ).get_container_client(os.environ["CONTAINER_NAME"])
 
 #helpers
 def _get_blob_bytes(blob_name: str) -> bytes:
-    return container_client.get_blob_client(blob_name).download_blob().readall()
-
-
-def _guess_content_type(blob_name: str) -> str:
-    name = blob_name.lower()
-    if name.endswith(".docx"):
-        return "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-    if name.endswith(".pdf"):
-        return "application/pdf"
-    return "application/octet-stream"
-
-
-def _analyze_bytes_with_di(
-    file_bytes: bytes, content_type: Optional[str] = None
-) -> Dict[str, Any]:
-    # Persist to a temp file so the working handler can read it
-    # Works with image files too, suffix doesn't really matter
-    suffix = ".pdf"
-    if (
-        content_type
-        == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-    ):
-        suffix = ".docx"
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(file_bytes)
-        tmp_path = tmp.name
-
-    res: HandlerResult = di_handler(tmp_path)
+    return (
+        get_container_client()
+        .get_blob_client(blob_name)
+        .download_blob(max_concurrency=BLOB_MAX_CONCURRENCY, **azure_call_kwargs())
+        .readall()
+    )
+
+
+def _open_blob(blob_name: str) -> Union[bytes, BlobChunkReader]:
+    # Streamed chunk by chunk into the DI upload if BLOB_STREAM_TO_DI is set
+    if BLOB_STREAM_TO_DI:
+        return BlobChunkReader(
+            get_container_client().get_blob_client(blob_name),
+            chunk_size=BLOB_STREAM_CHUNK_SIZE,
+            max_concurrency=BLOB_MAX_CONCURRENCY,
+        )
+    return _get_blob_bytes(blob_name)
+
+
+def _analyze_bytes_with_di(file_bytes: Union[bytes, BinaryIO]) -> Dict[str, Any]:
+    # The handler takes the bytes or a file object directly, DI detects the file type itself
+    res: HandlerResult = get_di_handler()(file_bytes)
     if not res.success:
         raise RuntimeError(f"Document Intelligence failed: {res.error}")
 
@@ -64,7 +113,7 @@ def _analyze_bytes_with_di(
 
     return {
         "fields": fields,
-        "preview": (content_text or "")[:1200]
+        "content": content_text or "",
     }
 
 def extract_proposal_fields(text: str) -> dict:
@@ -101,15 +150,61 @@ def extract_proposal_fields(text: str) -> dict:
 
 # ---- Tools the agent will call ----
 def list_container_files(prefix: Optional[str] = None) -> List[str]:
-    return [b.name for b in container_client.list_blobs(name_starts_with=prefix or "")]
+    return [b.name for b in get_container_client().list_blobs(name_starts_with=prefix or "")]
 
 def analyze_blob_with_di(blob_name: str) -> Dict[str, Any]:
-    data = _get_blob_bytes(blob_name)
-    ctype = _guess_content_type(blob_name)
-    
-    return {"blob_name": blob_name, **_analyze_bytes_with_di(data, content_type=ctype)}
+    """
+    Analyze a blob with Document Intelligence. Returns the proposal fields found in it and a digest
+    of its text within TOOL_OUTPUT_TOKEN_BUDGET tokens: headings and "Label: value" lines with their
+    line numbers and the opening lines. Read other lines with `read_extracted_range`.
+    """
+    data = _open_blob(blob_name)
+    try:
+        analysis = _analyze_bytes_with_di(data)
+    finally:
+        if isinstance(data, BlobChunkReader):
+            data.close()
+    content = analysis.pop("content")
+    with _analyzed_texts_lock:
+        _analyzed_texts[blob_name] = content
+        _analyzed_texts.move_to_end(blob_name)
+        while len(_analyzed_texts) > ANALYZED_TEXTS_KEPT:
+            _analyzed_texts.popitem(last=False)
+    return {
+        "blob_name": blob_name,
+        **analysis,
+        "digest": build_digest({"text": content}, TOOL_OUTPUT_TOKEN_BUDGET, source=blob_name),
+    }
+
+def read_extracted_range(
+    blob_name: str, start_line: int = 1, end_line: Optional[int] = None, start_char: int = 0
+) -> Dict[str, Any]:
+    """
+    Read lines of an analyzed blob's text, 1-based as in the digest of `analyze_blob_with_di`.
+    Long ranges are cut at TOOL_OUTPUT_TOKEN_BUDGET tokens, continue from `next_line`, with
+    `start_char` set to `next_char` if it is returned for a line too long to read at once.
+    """
+    with _analyzed_texts_lock:
+        content = _analyzed_texts.get(blob_name)
+    if content is None:
+        analyze_blob_with_di(blob_name)
+        with _analyzed_texts_lock:
+            content = _analyzed_texts.get(blob_name, "")
+    span = read_range(
+        {"text": content},
+        start_line=int(start_line),
+        end_line=None if end_line is None else int(end_line),
+        budget_tokens=TOOL_OUTPUT_TOKEN_BUDGET,
+        start_char=int(start_char or 0),
+    )
+    return {"blob_name": blob_name, **span}
+
+def analyze_blobs_with_di(blob_names: List[str], max_workers: int = BLOB_DOWNLOAD_WORKERS) -> List[Dict[str, Any]]:
+    """`analyze_blob_with_di` for many blobs, `max_workers` downloads and analyses at a time, in input order."""
+    results = dict(map_bounded(analyze_blob_with_di, blob_names, max_workers=max_workers))
+    return [results[name] for name in blob_names]
     
 def save_json_to_blob(target_blob_name: str, data_json: Dict[str, Any]) -> str:
     payload = json.dumps(data_json, ensure_ascii=False, indent=2).encode("utf-8")
-    container_client.get_blob_client(target_blob_name).upload_blob(payload, overwrite=True)
+    get_container_client().get_blob_client(target_blob_name).upload_blob(payload, overwrite=True, **azure_call_kwargs())
     return target_blob_name
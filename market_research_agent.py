@@ -1,11 +1,11 @@
 import json
-import time
 import os
 from typing import Dict, Any
 from azure.identity import DefaultAzureCredential
 from azure.ai.projects import AIProjectClient
 from market_research_agent_tools import web_search   # tool
 from dotenv import load_dotenv
+from utils.run_driver import RunDriver, ToolRegistry, print_step
 
 load_dotenv()
 
@@ -36,37 +36,11 @@ with project_client:
     )
     print(f"Created message, ID: {message['id']}")
 
-    # Start a run using the existing agent
-    run = project_client.agents.runs.create(
-        thread_id=thread.id,
-        agent_id=AGENT_ID
-    )
-    print(f"Created run, ID: {run.id}")
-
-    # Poll the run status until it is completed
-    while run.status in ["queued", "in_progress", "requires_action"]:
-        time.sleep(1)
-        run = project_client.agents.runs.get(thread_id=thread.id, run_id=run.id)
-
-        if run.status == "requires_action":
-            tool_calls = run.required_action.submit_tool_outputs.tool_calls
-            tool_outputs = []
-            for tool_call in tool_calls:
-                print(f"Tool is called {tool_call.function.name}")
-                if tool_call.function.name == "web_search":
-                    args = json.loads(tool_call.function.arguments)
-                    query = args.get("query", "")
-                    output = web_search(query)
-                    tool_outputs.append({
-                        "tool_call_id": tool_call.id,
-                        "output": output
-                    })
-
-            project_client.agents.runs.submit_tool_outputs(
-                thread_id=thread.id,
-                run_id=run.id,
-                tool_outputs=tool_outputs
-            )
+    # Run the existing agent, streaming its events and answering its web_search calls
+    tools = ToolRegistry()
+    tools.add("web_search", lambda args: web_search(args.get("query", "")))
+    run, stats = RunDriver(project_client.agents, tools, on_step=print_step).run(thread.id, AGENT_ID)
+    print(f"Run {run.id} took {stats.wall_seconds:.2f}s")
 
     print(f"Run completed with status: {run.status}")
 
@@ -1,65 +1,103 @@
-import os, time, json, base64
+import os, json, base64
 from azure.identity import DefaultAzureCredential
 from azure.ai.projects import AIProjectClient
-from RFI_schema import gap_checks
+from RFI_schema import gap_checks, validate_record, validation_feedback
 from dotenv import load_dotenv
-from RFI_tools import list_rfi_blobs, download_blob, extract_text_tables, upload_result
+from utils.run_driver import RunDriver, ToolRegistry, print_step
+from RFI_tools import (
+    RESULTS_CONTAINER, TOOL_OUTPUT_TOKEN_BUDGET, list_rfi_blobs, extract_submission, read_extracted_range,
+    upload_result, compare_suppliers,
+)
 
 load_dotenv()
 PROJECT_ENDPOINT = os.environ["PROJECT_ENDPOINT"]
 AGENT_ID = os.environ["RFI_AGENT_ID"]
 
-def handle_tool_call(tc):
-    """Route agent tool calls to local implementations, saving big outputs to blob storage."""
-    name = tc.function.name
-    args = json.loads(tc.function.arguments or "{}")
-
-    # 1) List blobs
-    if name == "list_rfi_blobs":
-        prefix = args.get("prefix", "")
-        out = {"files": list_rfi_blobs(prefix)}
-        return json.dumps(out)
-
-    # 2) Download blob -> return pointer (do not re-upload to results)
-    if name == "download_blob":
-        fname = args["name"]
-        return json.dumps({
-            "blob_path": f"{os.environ.get('RFI_CONTAINER', 'rfi-submissions')}/{fname}"
-        })
-
-    # 3) Extract text/tables -> store DI JSON result in results container -> return pointer
-    if name == "extract_text_tables":
-        blob_path = args.get("blob_path")
-        if not blob_path and "file_bytes" in args:
-            # fallback for older prompt behavior
-            blob_path = args["file_bytes"]
-
-        if not blob_path:
-            return json.dumps({"error": "Missing blob_path or file_bytes argument"})
-
-        # Normalize blob_path: strip leading "rfi-submissions/"
-        fname = blob_path.replace("rfi-submissions/", "").lstrip("/")
-
-        # Download the file from submissions container
-        file_bytes = download_blob(fname)
-
-        out = extract_text_tables(file_bytes, mime_type=args.get("mime_type"))
-        result_name = fname + ".extracted.json"
-        result_json = json.dumps(out).encode("utf-8")
-        upload_result(result_name, result_json)
-
-        return json.dumps({
-            "result_blob": f"{os.environ.get('RFI_RESULTS_CONTAINER')}/{result_name}"
-        })
+def schema_errors(name, data):
+    """Errors of a per-supplier JSON against the RFI schema, None for other results."""
+    if not name.endswith(".json"):
+        return None
+    try:
+        record = json.loads(data)
+    except ValueError:
+        return None
+    if not isinstance(record, dict) or "supplier_name" not in record:
+        return None
+    return validate_record(record)
+
+# Agent tool calls routed to local implementations, big outputs are saved to blob storage
+tools = ToolRegistry()
+
+@tools.register("list_rfi_blobs")
+def list_rfi_blobs_tool(args):
+    return {"files": list_rfi_blobs(args.get("prefix", ""))}
+
+@tools.register("download_blob")
+def download_blob_tool(args):
+    # Return a pointer, the blob is not re-uploaded to results
+    return {"blob_path": f"{os.environ.get('RFI_CONTAINER', 'rfi-submissions')}/{args['name']}"}
+
+@tools.register("extract_text_tables")
+def extract_text_tables_tool(args):
+    # Store the DI JSON result in the results container and return a pointer (reused if unchanged)
+    blob_path = args.get("blob_path")
+    if not blob_path and "file_bytes" in args:
+        # fallback for older prompt behavior
+        blob_path = args["file_bytes"]
+
+    if not blob_path:
+        return {"error": "Missing blob_path or file_bytes argument"}
+
+    # Normalize blob_path: strip leading "rfi-submissions/"
+    fname = blob_path.replace("rfi-submissions/", "").lstrip("/")
+
+    # Unchanged submissions are not downloaded again, their existing artifact is returned.
+    # The locally normalized record comes along, the agent only fills its low confidence fields,
+    # with a digest of the extraction instead of all of it
+    return extract_submission(
+        fname,
+        force=bool(args.get("force", False)),
+        include_normalized=True,
+        digest_budget=TOOL_OUTPUT_TOKEN_BUDGET,
+    )
 
-    # 4) Upload arbitrary results (CSV, Markdown, JSON)
-    if name == "upload_result":
-        name, data_b64 = args["name"], args["data_b64"]
-        container = args.get("container") or os.environ.get("RFI_RESULTS_CONTAINER")
-        upload_result(name, base64.b64decode(data_b64), container=container)
-        return json.dumps({"ok": True, "path": f"{container}/{name}"})
+def optional_int(value):
+    """An optional integer argument of a tool call, which the model may send as a string."""
+    return None if value is None or value == "" else int(value)
+
+@tools.register("read_extracted_range")
+def read_extracted_range_tool(args):
+    # Lines or table rows of an extraction the digest pointed to
+    return read_extracted_range(
+        args["result_blob"],
+        start_line=int(args.get("start_line") or 1),
+        end_line=optional_int(args.get("end_line")),
+        table=optional_int(args.get("table")),
+        start_row=int(args.get("start_row") or 0),
+        end_row=optional_int(args.get("end_row")),
+        start_char=int(args.get("start_char") or 0),
+    )
 
-    return json.dumps({"error": f"unknown tool {name}"})
+@tools.register("upload_result")
+def upload_result_tool(args):
+    # Upload arbitrary results (CSV, Markdown, JSON)
+    name, data = args["name"], base64.b64decode(args["data_b64"])
+    container = args.get("container") or RESULTS_CONTAINER
+    # Per-supplier JSONs that do not match the schema are sent back with all their errors at once
+    errors = schema_errors(name, data)
+    if errors:
+        return {"ok": False, "errors": errors, "message": validation_feedback(errors, name)}
+    upload_result(name, data, container=container)
+    return {"ok": True, "path": f"{container}/{name}"}
+
+@tools.register("compare_suppliers")
+def compare_suppliers_tool(args):
+    # Gap checks, comparison CSV and ranked shortlist of all suppliers, computed locally
+    return compare_suppliers(
+        record_blobs=args.get("record_blobs"),
+        records=args.get("records"),
+        top=int(args.get("top", 10)),
+    )
 
 
 def main():
@@ -74,41 +112,30 @@ def main():
 
         user_prompt = """
 Process RFI submissions in the container. For each file:
-1) download -> extract -> normalize JSON per schema
-2) perform gap checks and add 'gaps' object
-3) create a side-by-side CSV across all suppliers for: supplier_name, delivery_time_days, iso_27001, sla_summary, pricing_notes
-4) draft (a) buyer clarification email stubs per supplier (bullet points only), and (b) a 10-line internal summary
-5) upload per-supplier JSON, one CSV compare, and one Markdown summary to the results container.
+1) download -> extract -> normalize JSON per schema, and upload the per-supplier JSON to the results container
+2) call compare_suppliers once with the paths of all per-supplier JSONs: it performs the gap checks, writes the
+   side-by-side CSV and the ranked shortlist, and returns the 'gaps' of every supplier
+3) draft (a) buyer clarification email stubs per supplier from its gaps (bullet points only), and (b) a 10-line
+   internal summary based on the shortlist
+4) upload the Markdown summary to the results container.
 
 Important: when calling extract_text_tables, always pass the blob_path returned from download_blob (never file_bytes).
+extract_text_tables returns 'normalized', a record already filled from the submission: keep its values and only
+fill the fields listed in normalized.low_confidence. Its 'digest' shows the headings, "Label: value" lines and
+tables of the submission with their line and row numbers, call read_extracted_range for the parts you need.
 
 """
         client.agents.messages.create(thread_id=thread.id, role="user", content=user_prompt)
-        run = client.agents.runs.create(thread_id=thread.id, agent_id=AGENT_ID)
-
-        # Run loop
-        while run.status in ["queued", "in_progress", "requires_action"]:
-            time.sleep(1)
-            run = client.agents.runs.get(thread_id=thread.id, run_id=run.id)
-
-            if run.status == "requires_action":
-                print("\nAgent requested tool calls:")
-                outs = []
-                for tc in run.required_action.submit_tool_outputs.tool_calls:
-                    print(f"- {tc.function.name} with args {tc.function.arguments}")
-                    outs.append({
-                        "tool_call_id": tc.id,
-                        "output": handle_tool_call(tc)
-                    })
-                client.agents.runs.submit_tool_outputs(
-                    thread_id=thread.id, run_id=run.id, tool_outputs=outs
-                )
-
-        
+        # Streams the run and answers each step's tool calls as soon as it is emitted, the calls of one
+        # step run concurrently. Falls back to adaptive polling if streaming is unavailable
+        run, stats = RunDriver(client.agents, tools, on_step=print_step).run(thread.id, AGENT_ID)
+        print(f"\n{stats}")
+
         # Show all conversation messages (user + assistant + system)
         messages = client.agents.messages.list(thread_id=thread.id)
         for m in messages:
             print(f"[{m['role']}] {m['content']}")
+        return stats
 
 
 
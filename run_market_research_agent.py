@@ -1,10 +1,11 @@
 # run_market_agent_min.py
-import os, time, json
+import os, json
 from typing import Any, Dict, Optional
 from dotenv import load_dotenv
 from azure.identity import DefaultAzureCredential
 from azure.ai.projects import AIProjectClient
 from azure.ai.agents.models import ListSortOrder
+from utils.run_driver import RunDriver, ToolRegistry
 
 
 # your tool (it returns a JSON string)
@@ -16,6 +17,19 @@ MARKET_AGENT_ID = os.environ["MARKET_AGENT_ID"]
 
 
 
+def web_search_tool(args: Dict[str, Any], user_q: str) -> str:
+    try:
+        return web_search(
+            query=args.get("query", user_q),
+            max_results=int(args.get("max_results", 20)),
+            timelimit=args.get("timelimit", "y"),
+            allow_domains=args.get("allow_domains"),
+            deny_domains=args.get("deny_domains"),
+        )
+    except Exception as e:
+        return json.dumps({"results": [], "error": str(e)})
+
+
 def main():
     client = AIProjectClient(
         endpoint=PROJECT_ENDPOINT,
@@ -27,6 +41,10 @@ def main():
         agent = client.agents.get_agent(agent_id=MARKET_AGENT_ID)
         print(f"Using agent: {agent.id}")
 
+        # web_search falls back to the question itself, so it is registered per question below
+        tools = ToolRegistry()
+        driver = RunDriver(client.agents, tools)
+
         # one thread per session
         thread = client.agents.threads.create()
         print(f"Thread: {thread.id}")
@@ -39,42 +57,11 @@ def main():
 
             # post user question
             client.agents.messages.create(thread_id=thread.id, role="user", content=user_q)
+            tools.add("web_search", lambda args, user_q=user_q: web_search_tool(args, user_q))
 
-            # start a run
-            run = client.agents.runs.create(thread_id=thread.id, agent_id=agent.id)
-
-            # poll and serve tools
-            while run.status in {"queued", "in_progress", "requires_action"}:
-                time.sleep(1)
-                run = client.agents.runs.get(thread_id=thread.id, run_id=run.id)
-
-                if run.status == "requires_action":
-                    tool_calls = run.required_action.submit_tool_outputs.tool_calls
-                    tool_outputs = []
-
-                    for tc in tool_calls:
-                        fname = tc.function.name
-                        args = json.loads(tc.function.arguments or "{}")
-
-                        if fname == "web_search":
-                            try:
-                                output = web_search(
-                                    query=args.get("query", user_q),
-                                    max_results=int(args.get("max_results", 20)),
-                                    timelimit=args.get("timelimit", "y"),
-                                    allow_domains=args.get("allow_domains"),
-                                    deny_domains=args.get("deny_domains"),
-                                )
-                            except Exception as e:
-                                output = json.dumps({"results": [], "error": str(e)})
-                        else:
-                            output = json.dumps({"error": f"unknown tool: {fname}"})
-
-                        tool_outputs.append({"tool_call_id": tc.id, "output": output})
-
-                    client.agents.runs.submit_tool_outputs(
-                        thread_id=thread.id, run_id=run.id, tool_outputs=tool_outputs
-                    )
+            # run it, answering tool calls as soon as the stream asks for them
+            run, stats = driver.run(thread.id, agent.id)
+            print(stats)
 
             print(f"Run status: {run.status}")
 
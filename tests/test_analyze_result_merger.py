@@ -0,0 +1,48 @@
+from utils.analyze_result_merger import merge_analyze_results
+
+
+def part(first_page: int, text: str):
+    """The analyzeResult of one page-range job: two paragraphs, a table and a figure on one page."""
+    return {
+        "apiVersion": "2024-11-30",
+        "content": text,
+        "pages": [{"pageNumber": first_page, "spans": [{"offset": 0, "length": len(text)}]}],
+        "paragraphs": [
+            {"content": text[:2], "spans": [{"offset": 0, "length": 2}]},
+            {"content": text[3:], "spans": [{"offset": 3, "length": len(text) - 3}]},
+        ],
+        "tables": [
+            {
+                "rowCount": 1,
+                "columnCount": 1,
+                "cells": [{"rowIndex": 0, "columnIndex": 0, "content": text[3:], "elements": ["/paragraphs/1"]}],
+                "boundingRegions": [{"pageNumber": first_page, "polygon": []}],
+            }
+        ],
+        "figures": [{"elements": ["/paragraphs/0"], "boundingRegions": [{"pageNumber": first_page, "polygon": []}]}],
+        "sections": [{"elements": ["/paragraphs/0", "/tables/0", "/figures/0"]}],
+    }
+
+
+def test_merge_reindexes_every_element_pointer():
+    merged = merge_analyze_results([part(1, "AA BB"), part(2, "CC DD")], first_pages=[1, 2])
+
+    assert merged["content"] == "AA BB\nCC DD"
+    assert [paragraph["content"] for paragraph in merged["paragraphs"]] == ["AA", "BB", "CC", "DD"]
+    # Pointers of the second part point at its own elements after the merge
+    assert merged["sections"][1]["elements"] == ["/paragraphs/2", "/tables/1", "/figures/1"]
+    assert merged["figures"][1]["elements"] == ["/paragraphs/2"]
+    assert merged["tables"][1]["cells"][0]["elements"] == ["/paragraphs/3"]
+    # The first part is left as it was
+    assert merged["sections"][0]["elements"] == ["/paragraphs/0", "/tables/0", "/figures/0"]
+    assert merged["tables"][0]["cells"][0]["elements"] == ["/paragraphs/1"]
+
+
+def test_merge_shifts_offsets_and_page_numbers():
+    # Older API versions number the pages of every range from 1
+    merged = merge_analyze_results([part(1, "AA BB"), part(1, "CC DD")], first_pages=[1, 2])
+
+    assert [page["pageNumber"] for page in merged["pages"]] == [1, 2]
+    assert merged["tables"][1]["boundingRegions"][0]["pageNumber"] == 2
+    span = merged["paragraphs"][3]["spans"][0]
+    assert merged["content"][span["offset"] : span["offset"] + span["length"]] == "DD"
@@ -0,0 +1,74 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from utils.analyze_result_projection import project_analyze_response, project_analyze_response_async
+from utils.async_document_intelligence_handler import AsyncDocumentIntelligenceHandler
+from utils.document_intelligence_handler import DocumentIntelligenceHandler
+from utils.fake_document_intelligence_server import FakeDocumentIntelligenceServer
+
+RESPONSE = {
+    "status": "succeeded",
+    "createdDateTime": "2024-11-30T00:00:00Z",
+    "analyzeResult": {
+        "apiVersion": "2024-11-30",
+        "content": "Price list",
+        "pages": [{"pageNumber": 1, "words": [{"content": "Price", "polygon": [0.5, 1.25]}], "lines": [[], {}]}],
+        "tables": [{"rowCount": 1, "cells": [{"content": "10.5", "boundingRegions": [{"polygon": [1, 2]}]}]}],
+        "styles": [],
+    },
+}
+
+
+class AsyncStream:
+    """The async `read(size)` of `aiohttp.ClientResponse.content`."""
+
+    def __init__(self, data: bytes):
+        self._data = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._data.read(size)
+
+
+def expected(fields):
+    return {
+        **{key: value for key, value in RESPONSE.items() if key != "analyzeResult"},
+        "analyzeResult": {key: value for key, value in RESPONSE["analyzeResult"].items() if key in fields},
+    }
+
+
+def test_projection_keeps_only_the_requested_fields():
+    body = json.dumps(RESPONSE).encode("utf-8")
+
+    assert project_analyze_response(io.BytesIO(body), ["content", "tables"]) == expected(["content", "tables"])
+
+
+def test_projection_of_all_fields_is_the_parsed_response():
+    body = json.dumps(RESPONSE).encode("utf-8")
+
+    assert project_analyze_response(io.BytesIO(body), RESPONSE["analyzeResult"]) == RESPONSE
+
+
+def test_async_projection_matches_the_sync_one():
+    body = json.dumps(RESPONSE).encode("utf-8")
+
+    result = asyncio.run(project_analyze_response_async(AsyncStream(body), ["content"]))
+
+    assert result == expected(["content"])
+
+
+@pytest.mark.parametrize("handler_class", [DocumentIntelligenceHandler, AsyncDocumentIntelligenceHandler])
+def test_handler_with_fields_returns_the_projected_result(monkeypatch, handler_class):
+    with FakeDocumentIntelligenceServer(processing_time=0.0) as server:
+        monkeypatch.setenv("DOCUMENT_INTELLIGENCE_ENDPOINT", server.endpoint)
+        monkeypatch.setenv("DOCUMENT_INTELLIGENCE_API_KEY", "fake-key")
+        handler = handler_class("documentModels", "prebuilt-layout", fields=["content"])
+        if handler_class is AsyncDocumentIntelligenceHandler:
+            result = asyncio.run(handler.analyze(b"%PDF-1.7", initial_delay=0.01))
+        else:
+            result = handler(b"%PDF-1.7", initial_delay=0.01)
+
+    assert result.success, result.error
+    assert result.content["analyzeResult"] == {"content": "Fake analysis of 8 bytes"}
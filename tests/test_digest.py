@@ -0,0 +1,71 @@
+import json
+
+from utils.digest import CHARS_PER_TOKEN, build_digest, estimate_tokens, read_range
+
+TEXT = "\n".join(
+    ["# Company profile", "Supplier: Acme Ltd", "Lead time: 10 days", "1.2 Delivery and logistics"]
+    + [f"Paragraph {index} about the offer." for index in range(200)]
+)
+TABLE = [["Item", "Price"]] + [[f"Item {index}", f"{index}.00"] for index in range(100)] + [["", ""]]
+EXTRACTED = {"text": TEXT, "tables": [TABLE]}
+
+
+def read_all(budget_tokens, **start):
+    """Follow `next_line`/`next_row` and `next_char` from `start` until the range is read completely."""
+    parts, start = [], {"start_line": 1, **start}
+    while True:
+        span = read_range(EXTRACTED, budget_tokens=budget_tokens, **start)
+        parts.append((span, span.get("text", span.get("csv"))))
+        key = "next_row" if "table" in start else "next_line"
+        if span[key] is None:
+            return parts
+        start = {**start, key.replace("next", "start"): span[key], "start_char": span["next_char"] or 0}
+
+
+def test_digest_stays_within_its_budget_and_points_at_lines():
+    digest = build_digest(EXTRACTED, budget_tokens=400, source="rfi-results/acme.extracted.json")
+
+    assert estimate_tokens(json.dumps(digest)) <= 400 * 1.1
+    assert digest["lines"] == 204 and digest["tables"] == 1
+    assert {"line": 1, "text": "Company profile"} in digest["headings"]
+    assert {"line": 4, "text": "1.2 Delivery and logistics"} in digest["headings"]
+    assert {"line": 3, "key": "Lead time", "value": "10 days"} in digest["key_values"]
+    table = digest["tables_csv"][0]
+    assert table["rows"] == 101 and table["csv"].startswith("Item,Price\nItem 0,0.00")
+    assert digest["omitted"]["table_rows"] == 101 - table["rows_shown"] > 0
+    assert digest["omitted"]["lines_after_excerpt"] > 0
+
+
+def test_line_ranges_continue_where_they_were_cut():
+    parts = read_all(budget_tokens=100)
+
+    assert len(parts) > 1
+    assert "\n".join(text for _, text in parts) == TEXT
+    assert parts[0][0]["end_line"] + 1 == parts[1][0]["start_line"]
+
+
+def test_a_line_longer_than_the_budget_is_returned_in_parts():
+    long_line = "x" * 1000
+    extracted = {"text": f"short\n{long_line}\nafter", "tables": []}
+
+    span = read_range(extracted, start_line=2, budget_tokens=50)
+    assert (span["end_line"], span["next_line"], span["next_char"]) == (2, 2, len(span["text"]))
+    assert len(span["text"]) <= 50 * CHARS_PER_TOKEN
+
+    text, start_char = span["text"], span["next_char"]
+    while start_char is not None:
+        span = read_range(extracted, start_line=span["next_line"], budget_tokens=50, start_char=start_char)
+        text += span["text"] if span["next_char"] is not None else span["text"].split("\n")[0]
+        start_char = span["next_char"]
+    assert text == long_line
+
+
+def test_table_rows_are_read_as_csv_in_ranges():
+    parts = read_all(budget_tokens=80, table=0)
+
+    rows = "\n".join(text for _, text in parts).split("\n")
+    assert rows[0] == "Item,Price" and rows[-1] == "Item 99,99.00" and len(rows) == 101
+
+
+def test_unknown_table_is_an_error():
+    assert "error" in read_range(EXTRACTED, table=3)
@@ -0,0 +1,151 @@
+import asyncio
+import io
+import os
+import time
+
+import pytest
+
+from azure.storage.blob import BlobServiceClient
+
+from utils.async_document_intelligence_handler import AsyncDocumentIntelligenceHandler
+from utils.blob_io import BlobChunkReader
+from utils.document_intelligence_cache import DocumentIntelligenceCache
+from utils.document_intelligence_handler import DocumentIntelligenceHandler
+from utils.fake_blob_server import FakeBlobServer
+from utils.fake_document_intelligence_server import FakeDocumentIntelligenceServer
+
+KEY_PARAMS = {"model_type": "documentModels", "model_id": "prebuilt-layout", "output_content_format": "markdown", "api_version": "2024-11-30"}
+
+
+def entry(index: int):
+    return {"status": "succeeded", "analyzeResult": {"content": f"{index:03d}" + "x" * 100}}
+
+
+def entry_size(cache: DocumentIntelligenceCache) -> int:
+    cache.set("probe", entry(0))
+    size = os.path.getsize(cache._path("probe"))
+    os.remove(cache._path("probe"))
+    return size
+
+
+def cached_keys(cache: DocumentIntelligenceCache):
+    return sorted(name[: -len(".json")] for name in os.listdir(cache.cache_dir) if name.endswith(".json"))
+
+
+def test_set_then_get_counts_hits_and_misses(tmp_path):
+    cache = DocumentIntelligenceCache(str(tmp_path))
+
+    assert cache.get("a") is None
+    cache.set("a", entry(1))
+
+    assert cache.get("a") == entry(1)
+    assert cache.stats() == {"cache_hits": 1, "cache_misses": 1}
+
+
+def test_key_is_the_same_for_bytes_and_file_objects_and_rewinds_them():
+    document = b"%PDF-1.7 document"
+    file = io.BytesIO(document)
+    file.seek(4)
+
+    assert DocumentIntelligenceCache.make_key(document[4:], **KEY_PARAMS) == DocumentIntelligenceCache.make_key(file, **KEY_PARAMS)
+    assert file.tell() == 4
+    assert DocumentIntelligenceCache.make_key(document, **KEY_PARAMS) != DocumentIntelligenceCache.make_key(
+        document, **KEY_PARAMS, pages="1-2"
+    )
+    assert DocumentIntelligenceCache.make_key(document, **KEY_PARAMS, fields=["tables", "content"]) == (
+        DocumentIntelligenceCache.make_key(document, **KEY_PARAMS, fields=["content", "tables"])
+    )
+
+
+def test_expired_entries_are_misses_and_removed(tmp_path):
+    cache = DocumentIntelligenceCache(str(tmp_path), max_age_seconds=60)
+    cache.set("old", entry(1))
+    an_hour_ago = time.time() - 3600
+    os.utime(cache._path("old"), (an_hour_ago, an_hour_ago))
+
+    assert cache.get("old") is None
+    assert cached_keys(cache) == []
+
+
+def test_eviction_removes_least_recently_used_entries_down_to_evict_to(tmp_path):
+    probe = DocumentIntelligenceCache(str(tmp_path))
+    cache = DocumentIntelligenceCache(str(tmp_path), max_size_bytes=5 * entry_size(probe), max_age_seconds=None)
+    now = time.time()
+    for index in range(5):
+        cache.set(f"{index}", entry(index))
+        os.utime(cache._path(f"{index}"), (now - 100 + index, now - 100 + index))
+    # Reading an entry makes it the most recently used
+    assert cache.get("0") is not None
+
+    cache.set("5", entry(5))
+
+    # 6 entries over a limit of 5 are evicted down to 90% of it, 4 entries
+    assert cached_keys(cache) == ["0", "3", "4", "5"]
+    assert cache._size == sum(os.path.getsize(cache._path(key)) for key in cached_keys(cache))
+
+
+def test_size_is_tracked_without_scanning_on_every_write(tmp_path, monkeypatch):
+    cache = DocumentIntelligenceCache(str(tmp_path), max_size_bytes=1024 * 1024)
+    scans = []
+    evict = cache.evict
+    monkeypatch.setattr(cache, "evict", lambda: scans.append(1) or evict())
+
+    for index in range(20):
+        cache.set(f"{index}", entry(index))
+    # Overwriting an entry does not count its size twice
+    cache.set("0", entry(0))
+
+    assert len(scans) == 1
+    assert cache._size == sum(os.path.getsize(cache._path(key)) for key in cached_keys(cache))
+
+
+@pytest.mark.parametrize("handler_class", [DocumentIntelligenceHandler, AsyncDocumentIntelligenceHandler])
+def test_handler_returns_a_cached_result_without_posting(tmp_path, monkeypatch, handler_class):
+    with FakeDocumentIntelligenceServer(processing_time=0.0) as server:
+        monkeypatch.setenv("DOCUMENT_INTELLIGENCE_ENDPOINT", server.endpoint)
+        monkeypatch.setenv("DOCUMENT_INTELLIGENCE_API_KEY", "fake-key")
+        handler = handler_class("documentModels", "prebuilt-layout", cache=DocumentIntelligenceCache(str(tmp_path)))
+
+        def analyze(document):
+            if handler_class is AsyncDocumentIntelligenceHandler:
+                return asyncio.run(handler.analyze(document, initial_delay=0.01))
+            return handler(document, initial_delay=0.01)
+
+        first = analyze(b"%PDF-1.7 document")
+        second = analyze(io.BytesIO(b"%PDF-1.7 document"))
+
+    assert first.success and second.success
+    assert second.content == first.content
+    assert second.log["cache"] == "hit"
+    assert server.request_counts["post"] == 1
+
+
+@pytest.mark.parametrize("handler_class", [DocumentIntelligenceHandler, AsyncDocumentIntelligenceHandler])
+def test_streamed_blob_is_keyed_by_its_properties_and_downloaded_once(tmp_path, monkeypatch, handler_class):
+    document = b"%PDF-1.7 " + bytes(range(256)) * 64
+    with FakeBlobServer() as blobs, FakeDocumentIntelligenceServer(processing_time=0.0) as server:
+        monkeypatch.setenv("DOCUMENT_INTELLIGENCE_ENDPOINT", server.endpoint)
+        monkeypatch.setenv("DOCUMENT_INTELLIGENCE_API_KEY", "fake-key")
+        blobs.put_blob("submissions", "a.pdf", document)
+        blob_client = BlobServiceClient.from_connection_string(blobs.connection_string).get_blob_client("submissions", "a.pdf")
+        handler = handler_class("documentModels", "prebuilt-layout", cache=DocumentIntelligenceCache(str(tmp_path)))
+
+        def analyze():
+            reader = BlobChunkReader(blob_client, chunk_size=4096)
+            try:
+                if handler_class is AsyncDocumentIntelligenceHandler:
+                    return asyncio.run(handler.analyze(reader, initial_delay=0.01))
+                return handler(reader, initial_delay=0.01)
+            finally:
+                reader.close()
+
+        first = analyze()
+        gets_after_first = blobs.request_counts["get"]
+        second = analyze()
+
+    assert first.success, first.error
+    assert [operation["document"] for operation in server.operations.values()] == [document]
+    # One ranged GET per chunk for the upload, none for the cache key
+    assert gets_after_first == -(-len(document) // 4096)
+    assert second.log["cache"] == "hit"
+    assert blobs.request_counts["get"] == gets_after_first
@@ -0,0 +1,116 @@
+import asyncio
+import io
+import time
+
+import pytest
+
+from utils.async_document_intelligence_handler import AsyncDocumentIntelligenceHandler
+from utils.deadline import DeadlineExceeded, deadline_scope
+from utils.document_intelligence_cache import DocumentIntelligenceCache
+from utils.document_intelligence_handler import DocumentIntelligenceHandler
+from utils.fake_document_intelligence_server import FakeDocumentIntelligenceServer
+from utils.metrics import CallbackMetricsSink
+
+DOCUMENT = b"%PDF-1.7 " + bytes(range(256)) * 64
+
+
+class UnseekableStream(io.RawIOBase):
+    """A stream that can only be read once, like a pipe or a network response."""
+
+    def __init__(self, data: bytes):
+        super().__init__()
+        self._data = io.BytesIO(data)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        return self._data.readinto(buffer)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with FakeDocumentIntelligenceServer(processing_time=0.0) as server:
+        monkeypatch.setenv("DOCUMENT_INTELLIGENCE_ENDPOINT", server.endpoint)
+        monkeypatch.setenv("DOCUMENT_INTELLIGENCE_API_KEY", "fake-key")
+        yield server
+
+
+def analyze(handler_class, document, cache=None, **handler_kwargs):
+    handler = handler_class("documentModels", "prebuilt-layout", cache=cache, **handler_kwargs)
+    if handler_class is AsyncDocumentIntelligenceHandler:
+        return asyncio.run(handler.analyze(document, initial_delay=0.01))
+    return handler(document, initial_delay=0.01)
+
+
+def posted_documents(server):
+    return [operation["document"] for operation in server.operations.values()]
+
+
+@pytest.mark.parametrize("handler_class", [DocumentIntelligenceHandler, AsyncDocumentIntelligenceHandler])
+def test_analyzes_bytes(server, handler_class):
+    result = analyze(handler_class, DOCUMENT)
+
+    assert result.success, result.error
+    assert result.content["analyzeResult"]["content"] == f"Fake analysis of {len(DOCUMENT)} bytes"
+    assert posted_documents(server) == [DOCUMENT]
+
+
+@pytest.mark.parametrize("handler_class", [DocumentIntelligenceHandler, AsyncDocumentIntelligenceHandler])
+def test_unseekable_stream_with_cache_uploads_the_whole_document(server, tmp_path, handler_class):
+    cache = DocumentIntelligenceCache(str(tmp_path))
+
+    result = analyze(handler_class, UnseekableStream(DOCUMENT), cache=cache)
+
+    assert result.success, result.error
+    assert posted_documents(server) == [DOCUMENT]
+    # The result is cached under the key of the document bytes
+    assert analyze(handler_class, DOCUMENT, cache=cache).content == result.content
+    assert server.request_counts["post"] == 1
+
+
+@pytest.mark.parametrize("handler_class", [DocumentIntelligenceHandler, AsyncDocumentIntelligenceHandler])
+@pytest.mark.parametrize("max_throttle_retries", [5, 0])
+def test_unseekable_stream_without_cache_uploads_the_whole_document(server, handler_class, max_throttle_retries):
+    result = analyze(handler_class, UnseekableStream(DOCUMENT), max_throttle_retries=max_throttle_retries)
+
+    assert result.success, result.error
+    assert result.content["analyzeResult"]["content"] == f"Fake analysis of {len(DOCUMENT)} bytes"
+    assert posted_documents(server) == [DOCUMENT]
+
+
+@pytest.mark.parametrize("handler_class", [DocumentIntelligenceHandler, AsyncDocumentIntelligenceHandler])
+def test_throttled_unseekable_stream_is_sent_again_in_full(server, handler_class):
+    server.max_posts_per_second = 1
+    assert analyze(handler_class, DOCUMENT).success
+
+    # Throttled, then retried after the one second `Retry-After`
+    result = analyze(handler_class, UnseekableStream(DOCUMENT))
+
+    assert result.success, result.error
+    assert result.log["throttle_retries"] == 1
+    assert posted_documents(server) == [DOCUMENT, DOCUMENT]
+
+
+@pytest.mark.parametrize("handler_class", [DocumentIntelligenceHandler, AsyncDocumentIntelligenceHandler])
+def test_deadline_is_raised_and_recorded_in_the_metrics(server, handler_class):
+    server.processing_time = 5.0
+    counters = []
+    sink = CallbackMetricsSink(lambda name, value, tags: None, counter_callback=lambda name, value, tags: counters.append((name, tags)))
+
+    start = time.perf_counter()
+    with deadline_scope(0.3), pytest.raises(DeadlineExceeded):
+        analyze(handler_class, DOCUMENT, metrics_sink=sink)
+
+    assert time.perf_counter() - start < 2
+    assert ("document_intelligence_deadline_exceeded", {"model_id": "prebuilt-layout", "success": "false"}) in counters
+
+
+def test_only_the_sync_handler_creates_a_requests_session(server):
+    sync_handler = DocumentIntelligenceHandler("documentModels", "prebuilt-layout")
+    async_handler = AsyncDocumentIntelligenceHandler("documentModels", "prebuilt-layout")
+
+    assert sync_handler._session is not None
+    assert async_handler._session is None
+    sync_handler.close()
+    async_handler.close()
@@ -0,0 +1,60 @@
+import json
+
+from azure.storage.blob import BlobServiceClient
+
+from utils.extraction_manifest import BlobExtractionManifest, ExtractionManifest
+from utils.fake_blob_server import FakeBlobServer
+
+FINGERPRINT = {"etag": '"0x1"', "last_modified": "2024-01-01T00:00:00+00:00", "size": 10, "content_md5": "ab"}
+OPTIONS = {"fill_spans": "headers"}
+
+
+def entry(**changes):
+    return {**FINGERPRINT, "options": OPTIONS, "result_blob": "rfi-results/a.extracted.json", **changes}
+
+
+def test_same_etag_and_options_is_unchanged():
+    assert ExtractionManifest.is_unchanged(entry(), FINGERPRINT, OPTIONS)
+
+
+def test_missing_entry_or_other_options_is_changed():
+    assert not ExtractionManifest.is_unchanged(None, FINGERPRINT, OPTIONS)
+    assert not ExtractionManifest.is_unchanged(entry(), FINGERPRINT, {"fill_spans": False})
+
+
+def test_new_etag_with_same_content_md5_and_size_is_unchanged():
+    reuploaded = {**FINGERPRINT, "etag": '"0x2"'}
+
+    assert ExtractionManifest.is_unchanged(entry(), reuploaded, OPTIONS)
+    assert not ExtractionManifest.is_unchanged(entry(), {**reuploaded, "size": 11}, OPTIONS)
+    assert not ExtractionManifest.is_unchanged(entry(), {**reuploaded, "content_md5": "cd"}, OPTIONS)
+    # Without a Content-MD5 a new ETag cannot be told apart from new content
+    assert not ExtractionManifest.is_unchanged(entry(content_md5=None), {**reuploaded, "content_md5": None}, OPTIONS)
+
+
+def test_recorded_entries_are_persisted_on_flush(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    manifest = ExtractionManifest(path)
+
+    manifest.record("a.pdf", FINGERPRINT, "rfi-results/a.extracted.json", OPTIONS, flush=False)
+    assert manifest.get("a.pdf")["result_blob"] == "rfi-results/a.extracted.json"
+    assert ExtractionManifest(path).get("a.pdf") is None
+
+    manifest.flush()
+    reloaded = ExtractionManifest(path).get("a.pdf")
+    assert ExtractionManifest.is_unchanged(reloaded, FINGERPRINT, OPTIONS)
+
+
+def test_blob_manifest_keeps_the_entries_of_a_concurrent_writer():
+    with FakeBlobServer() as server:
+        container = BlobServiceClient.from_connection_string(server.connection_string).get_container_client("rfi-results")
+        container.create_container()
+        first, second = BlobExtractionManifest(container), BlobExtractionManifest(container)
+        # Both read the manifest before either writes
+        assert first.entries == second.entries == {}
+
+        first.record("a.pdf", FINGERPRINT, "rfi-results/a.extracted.json", OPTIONS)
+        second.record("b.pdf", FINGERPRINT, "rfi-results/b.extracted.json", OPTIONS)
+
+        stored = json.loads(container.download_blob("extraction_manifest.json").readall())
+    assert sorted(stored) == ["a.pdf", "b.pdf"]
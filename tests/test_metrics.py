@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+from utils.metrics import PrometheusTextFileSink
+
+
+def test_process_file_is_labelled_and_removed_on_close(tmp_path):
+    sink = PrometheusTextFileSink.for_process(str(tmp_path), "worker")
+    sink.record("document_intelligence_run_time", 0.3, {"model_id": "prebuilt-layout"})
+    sink.flush()
+
+    path = tmp_path / f"worker.{os.getpid()}.prom"
+    assert f'_count{{pid="{os.getpid()}",process="worker",model_id="prebuilt-layout"}} 1' in path.read_text()
+
+    sink.close()
+    sink.flush()
+    assert os.listdir(tmp_path) == []
+
+
+def test_process_file_is_removed_when_the_process_exits(tmp_path):
+    script = (
+        "from utils.metrics import PrometheusTextFileSink\n"
+        f"sink = PrometheusTextFileSink.for_process({str(tmp_path)!r}, 'worker')\n"
+        "sink.increment('document_intelligence_polls', 1, {})\n"
+        "sink.flush()\n"
+        "import os; assert os.listdir(os.path.dirname(sink.path))\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,37 @@
+import pytest
+
+from utils.deadline import DeadlineExceeded, deadline_scope
+from utils.rate_limiter import TokenBucketRateLimiter
+
+
+def test_burst_up_to_capacity_then_waits_at_the_rate():
+    limiter = TokenBucketRateLimiter(rate=20, capacity=2)
+
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == 0
+    # The third token is one refill, 1/20 s, away
+    assert limiter.acquire() == pytest.approx(0.05, abs=0.02)
+
+
+def test_sqlite_bucket_is_shared_between_limiters(tmp_path):
+    state_path = str(tmp_path / "limiter" / "state.sqlite")
+    first = TokenBucketRateLimiter(rate=20, capacity=2, state_path=state_path)
+    second = TokenBucketRateLimiter(rate=20, capacity=2, state_path=state_path)
+    other = TokenBucketRateLimiter(rate=20, capacity=2, state_path=state_path, name="other")
+
+    assert first.acquire() == 0
+    assert second.acquire() == 0
+    assert second.acquire() > 0
+    # Buckets with another name have their own tokens
+    assert other.acquire() == 0
+
+
+def test_wait_past_the_deadline_raises_and_keeps_the_reservation():
+    limiter = TokenBucketRateLimiter(rate=1, capacity=1)
+    limiter.acquire()
+
+    with deadline_scope(0.05):
+        with pytest.raises(DeadlineExceeded):
+            limiter.acquire()
+    # The abandoned token stays reserved, the next caller queues behind it
+    assert limiter._reserve(1) == pytest.approx(2, abs=0.1)
@@ -0,0 +1,71 @@
+from RFI_compare import compare_suppliers, shortlist, to_csv
+from RFI_schema import delivery_days, gap_checks
+
+COMPLETE = {
+    "supplier_name": "Acme",
+    "contact_email": "bids@acme.com",
+    "coverage_regions": ["UK"],
+    "delivery_time_days": 10,
+    "iso_27001": "yes",
+    "sla_summary": "99.9%",
+    "pricing_notes": "Per seat",
+    "sources": ["acme.pdf"],
+}
+
+
+def test_gap_checks():
+    assert gap_checks(COMPLETE) == {"missing": [], "follow_ups": [], "risks": []}
+
+    gaps = gap_checks({**COMPLETE, "iso_27001": "unclear", "delivery_time_days": "soon", "pricing_notes": "", "sla_summary": ""})
+    assert gaps["missing"] == ["sla_summary"]
+    assert len(gaps["follow_ups"]) == 3
+
+
+def test_delivery_days():
+    assert delivery_days({"delivery_time_days": "12"}) == 12
+    assert delivery_days({}) == -1
+    assert delivery_days({"delivery_time_days": "two weeks"}) is None
+
+
+def test_suppliers_meeting_must_haves_rank_first():
+    records = [
+        {**COMPLETE, "supplier_name": "Slow", "delivery_time_days": 30},
+        {**COMPLETE, "supplier_name": "No ISO", "iso_27001": "no", "delivery_time_days": 1},
+        {"record": {**COMPLETE, "supplier_name": "Fast", "delivery_time_days": 5}},
+        {**COMPLETE, "supplier_name": "Incomplete", "contact_email": "", "delivery_time_days": 2},
+    ]
+
+    comparison = compare_suppliers(records)
+
+    assert comparison["supplier_name"].tolist() == ["Fast", "Slow", "Incomplete", "No ISO"]
+    assert comparison["rank"].tolist() == [1, 2, 3, 4]
+    assert comparison["must_have_met"].tolist() == [True, True, True, False]
+    assert comparison.loc[2, "missing"] == ["contact_email"]
+    assert shortlist(comparison, top=2)["supplier_name"].tolist() == ["Fast", "Slow"]
+
+
+def test_gaps_in_the_comparison_are_those_of_gap_checks():
+    records = [COMPLETE, {**COMPLETE, "supplier_name": "Vague", "delivery_time_days": "tbd", "pricing_notes": ""}]
+
+    comparison = compare_suppliers(records).set_index("supplier_name")
+
+    for record in records:
+        gaps = gap_checks(record)
+        assert comparison.loc[record["supplier_name"], "missing"] == gaps["missing"]
+        assert comparison.loc[record["supplier_name"], "follow_ups"] == gaps["follow_ups"]
+    assert comparison["delivery_time_days"].isna().tolist() == [False, True]
+
+
+def test_weighted_requirements_score():
+    requirements = {"must_have": {"iso_27001": 3}, "nice_to_have": ["sla_summary", "exceptions"]}
+
+    comparison = compare_suppliers([COMPLETE], requirements)
+
+    assert comparison.loc[0, "requirements_met"] == ["iso_27001", "sla_summary"]
+    assert comparison.loc[0, "requirement_score"] == round(4 / 5, 4)
+
+
+def test_csv_joins_list_columns():
+    csv = to_csv(shortlist(compare_suppliers([COMPLETE]))).decode("utf-8")
+
+    assert csv.splitlines()[1].startswith("1,Acme,1.0,iso_27001,10,yes,,acme.pdf")
@@ -0,0 +1,83 @@
+import pytest
+
+from RFI_normalizer import CONFLICT_PENALTY, match_label, normalize_submission
+from RFI_schema import validate_record
+
+SUBMISSION = {
+    "text": "Supplier: Acme Ltd\nContact email: bids@acme.com\nISO 27001\nYes, certificate no. 123",
+    "tables": [
+        [
+            ["Question", "Answer"],
+            ["1.2 Lead time", "2 weeks"],
+            ["Coverage", "UK, France and Germany"],
+            ["Exceptions", "None"],
+            ["SLA", "99.9% uptime, 4h response"],
+            ["Pricing", "Per seat, volume discounts"],
+            ["Attachments", "price_list.xlsx; iso_certificate.pdf"],
+        ]
+    ],
+}
+
+
+def test_questionnaire_table_and_label_lines_fill_the_record():
+    normalized = normalize_submission(SUBMISSION, source="acme.pdf")
+    record = normalized["record"]
+
+    assert record == {
+        "supplier_name": "Acme Ltd",
+        "contact_email": "bids@acme.com",
+        "coverage_regions": ["UK", "France", "Germany"],
+        "delivery_time_days": 14,
+        "iso_27001": "yes",
+        "sla_summary": "99.9% uptime, 4h response",
+        "pricing_notes": "Per seat, volume discounts",
+        "exceptions": [],
+        "attachments": ["price_list.xlsx", "iso_certificate.pdf"],
+        "sources": ["acme.pdf"],
+    }
+    assert normalized["evidence"]["delivery_time_days"] == "table 0 row 1"
+    assert normalized["low_confidence"] == []
+    assert validate_record(record) == []
+
+
+def test_header_row_over_one_answer_row():
+    extracted = {"text": "", "tables": [[["Supplier name", "Lead time (days)", "ISO 27001"], ["Acme", "10", "No"]]]}
+
+    record = normalize_submission(extracted)["record"]
+
+    assert (record["supplier_name"], record["delivery_time_days"], record["iso_27001"]) == ("Acme", 10, "no")
+
+
+@pytest.mark.parametrize(
+    "value, days",
+    [("10 days", 10), ("2 weeks", 14), ("10 business days", 14), ("3-5 days", 5), ("1 month", 30)],
+)
+def test_delivery_time_is_converted_to_days(value, days):
+    extracted = {"text": f"Delivery time: {value}", "tables": []}
+
+    assert normalize_submission(extracted)["record"]["delivery_time_days"] == days
+
+
+def test_unsure_values_and_missing_fields_are_low_confidence():
+    extracted = {"text": "Delivery time: 1-2 months\nISO 27001: certification in progress", "tables": []}
+
+    normalized = normalize_submission(extracted)
+
+    assert normalized["record"]["iso_27001"] == "unclear"
+    assert normalized["record"]["supplier_name"] == ""
+    assert {"delivery_time_days", "supplier_name", "contact_email"} <= set(normalized["low_confidence"])
+    assert "iso_27001" not in normalized["low_confidence"]
+
+
+def test_conflicting_candidates_lower_the_confidence():
+    agreeing = {"text": "Lead time: 10 days", "tables": [[["Lead time", "10 days"]]]}
+    conflicting = {"text": "Lead time: 20 days", "tables": [[["Lead time", "10 days"]]]}
+
+    assert normalize_submission(agreeing)["confidence"]["delivery_time_days"] == 1.0
+    assert normalize_submission(conflicting)["confidence"]["delivery_time_days"] == CONFLICT_PENALTY
+
+
+def test_match_label():
+    assert match_label("1.2 Delivery time (days):") == ("delivery_time_days", 1.0)
+    assert match_label("What is your standard lead time?")[0] == "delivery_time_days"
+    assert match_label("Supplier's contact person for this tender") is None
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from RFI_schema import RFI_SCHEMA_JSON, validate_record, validation_feedback
+from utils.schema_validator import SchemaValidator
+
+SCHEMA = {
+    "type": "object",
+    "required": ["name", "days"],
+    "properties": {
+        "name": {"type": "string", "minLength": 1},
+        "days": {"type": "integer", "minimum": 0},
+        "tags": {"type": "array", "items": {"type": "string", "pattern": "^[a-z]+$"}, "maxItems": 2},
+        "answer": {"enum": ["yes", "no"]},
+        "none": {"type": "array", "maxItems": 0},
+    },
+    "additionalProperties": False,
+}
+
+RECORD = {
+    "supplier_name": "Acme",
+    "contact_email": "bids@acme.com",
+    "coverage_regions": ["UK"],
+    "delivery_time_days": 10,
+    "iso_27001": "yes",
+    "sla_summary": "",
+    "pricing_notes": "",
+    "exceptions": [],
+    "attachments": [],
+}
+
+
+def errors(instance):
+    return [(error["path"], error["error"]) for error in SchemaValidator(SCHEMA).errors(instance)]
+
+
+def test_valid_instance_has_no_errors():
+    assert SchemaValidator(SCHEMA).is_valid({"name": "a", "days": 0, "tags": ["x"], "answer": "no"})
+
+
+def test_every_violation_is_reported_with_its_path_missing_fields_first():
+    assert errors({"days": -1, "tags": ["ok", "Not", "ok"], "answer": "maybe", "extra": 1}) == [
+        ("name", "required"),
+        ("days", "minimum"),
+        ("tags[1]", "pattern"),
+        ("tags", "items"),
+        ("answer", "enum"),
+        ("extra", "additionalProperties"),
+    ]
+
+
+def test_booleans_are_not_integers():
+    assert errors({"name": "a", "days": True}) == [("days", "type")]
+
+
+def test_max_items_of_zero_is_enforced():
+    [error] = SchemaValidator(SCHEMA).errors({"name": "a", "days": 1, "none": [1]})
+
+    assert error["message"] == "expected 0 to 0 items, got 1"
+
+
+def test_unsupported_keywords_raise_when_compiling():
+    with pytest.raises(ValueError, match="anyOf"):
+        SchemaValidator({"anyOf": [{"type": "string"}]})
+
+
+def test_rfi_records_are_validated_against_the_rfi_schema():
+    assert validate_record(RECORD) == []
+
+    record = {**RECORD, "delivery_time_days": "10", "iso_27001": "maybe"}
+    del record["attachments"]
+    problems = validate_record(record)
+
+    assert [error["field"] for error in problems] == ["attachments", "delivery_time_days", "iso_27001"]
+    assert "- delivery_time_days: expected integer" in validation_feedback(problems)
+    assert SchemaValidator(json.loads(RFI_SCHEMA_JSON)).errors(record) == problems
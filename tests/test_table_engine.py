@@ -0,0 +1,54 @@
+from utils.table_engine import detect_header_rows, table_metadata, table_to_dataframe, table_to_grid
+
+# A grouped price table: a header spanning two columns over two sub-headers, a row label
+# spanning two rows and a price merged over two rows
+TABLE = {
+    "rowCount": 4,
+    "columnCount": 3,
+    "cells": [
+        {"kind": "columnHeader", "rowIndex": 0, "columnIndex": 0, "rowSpan": 2, "content": "Item"},
+        {"kind": "columnHeader", "rowIndex": 0, "columnIndex": 1, "columnSpan": 2, "content": "Price"},
+        {"kind": "columnHeader", "rowIndex": 1, "columnIndex": 1, "content": "Unit"},
+        {"kind": "columnHeader", "rowIndex": 1, "columnIndex": 2, "content": "Total"},
+        {"rowIndex": 2, "columnIndex": 0, "rowSpan": 2, "content": "Pumps"},
+        {"rowIndex": 2, "columnIndex": 1, "rowSpan": 2, "content": "10"},
+        {"rowIndex": 2, "columnIndex": 2, "content": "20"},
+        {"rowIndex": 3, "columnIndex": 2, "content": "30"},
+    ],
+    "boundingRegions": [{"pageNumber": 2, "polygon": [0.0] * 8}],
+}
+
+
+def test_grid_repeats_headers_and_row_labels_only():
+    assert table_to_grid(TABLE) == [
+        ["Item", "Price", "Price"],
+        ["Item", "Unit", "Total"],
+        ["Pumps", "10", "20"],
+        ["Pumps", "", "30"],
+    ]
+
+
+def test_grid_without_spans_keeps_merged_cells_at_their_first_position():
+    assert table_to_grid(TABLE, fill_spans=False) == [
+        ["Item", "Price", ""],
+        ["", "Unit", "Total"],
+        ["Pumps", "10", "20"],
+        ["", "", "30"],
+    ]
+
+
+def test_grid_with_all_spans_repeats_merged_values():
+    assert table_to_grid(TABLE, fill_spans=True)[3] == ["Pumps", "10", "30"]
+
+
+def test_header_rows_include_the_rows_a_merged_header_spans():
+    assert detect_header_rows(TABLE) == 2
+    assert table_metadata(TABLE)["pageNumbers"] == [2]
+
+
+def test_dataframe_uses_the_header_rows_as_column_names():
+    frame = table_to_dataframe(TABLE)
+
+    assert list(frame.columns) == ["Item", "Price / Unit", "Price / Total"]
+    assert frame["Price / Total"].tolist() == ["20", "30"]
+    assert frame.attrs["headerRows"] == 2
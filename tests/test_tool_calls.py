@@ -0,0 +1,93 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from utils.deadline import sleep
+from utils.tool_calls import run_tool_calls
+
+
+def tool_call(index, name="work", **arguments):
+    return SimpleNamespace(id=f"call_{index}", function=SimpleNamespace(name=name, arguments=json.dumps(arguments)))
+
+
+def test_outputs_keep_the_order_of_the_calls():
+    # Later calls finish first
+    calls = [tool_call(index, delay=0.05 * (3 - index)) for index in range(4)]
+
+    def handler(call):
+        time.sleep(json.loads(call.function.arguments)["delay"])
+        return call.id
+
+    outputs, durations = run_tool_calls(calls, handler, max_workers=4, timeout=0)
+
+    assert outputs == [{"tool_call_id": f"call_{index}", "output": f"call_{index}"} for index in range(4)]
+    assert [duration["tool_call_id"] for duration in durations] == [f"call_{index}" for index in range(4)]
+    assert all(duration["ok"] and not duration["timed_out"] for duration in durations)
+
+
+def test_calls_run_concurrently_up_to_max_workers():
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def handler(call):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return "ok"
+
+    start = time.perf_counter()
+    run_tool_calls([tool_call(index) for index in range(6)], handler, max_workers=3, timeout=0)
+
+    assert peak[0] == 3
+    assert time.perf_counter() - start < 0.05 * 6
+
+
+def test_a_failing_call_gets_its_error_as_output():
+    def handler(call):
+        if call.id == "call_1":
+            raise ValueError("bad arguments")
+        return "ok"
+
+    outputs, durations = run_tool_calls([tool_call(0), tool_call(1), tool_call(2)], handler, timeout=0)
+
+    assert [output["output"] for output in outputs] == ["ok", json.dumps({"error": "ValueError: bad arguments"}), "ok"]
+    assert [duration["ok"] for duration in durations] == [True, False, True]
+
+
+def test_a_call_stopping_at_its_deadline_gets_a_timeout_output():
+    def handler(call):
+        # Waits like DI polling does, ending at the call's deadline
+        sleep(5, "The work")
+        return "ok"
+
+    outputs, durations = run_tool_calls([tool_call(0)], handler, timeout=0.1)
+
+    output = json.loads(outputs[0]["output"])
+    assert output["error"] == "timeout"
+    assert (output["tool"], output["timeout_seconds"]) == ("work", 0.1)
+    assert not durations[0]["ok"] and durations[0]["timed_out"]
+    assert durations[0]["seconds"] < 1
+
+
+def test_a_hanging_call_is_abandoned_and_the_others_keep_their_outputs():
+    release = threading.Event()
+
+    def handler(call):
+        if call.id == "call_1":
+            # Ignores its deadline, like a blocked socket read
+            release.wait(5)
+        return "ok"
+
+    start = time.perf_counter()
+    try:
+        outputs, durations = run_tool_calls([tool_call(0), tool_call(1, name="hang")], handler, timeout=0.1)
+    finally:
+        release.set()
+
+    assert time.perf_counter() - start < 1
+    assert outputs[0]["output"] == "ok"
+    assert json.loads(outputs[1]["output"])["tool"] == "hang"
+    assert [duration["timed_out"] for duration in durations] == [False, True]
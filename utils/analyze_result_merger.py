@@ -0,0 +1,101 @@
+import re
+from typing import Any, Dict, List
+
+# Top level collections of an analyzeResult that are split across page-range jobs
+MERGED_COLLECTIONS = [
+    "pages",
+    "paragraphs",
+    "tables",
+    "figures",
+    "sections",
+    "keyValuePairs",
+    "styles",
+    "languages",
+    "documents",
+]
+
+# Sections, figures and table cells reference other elements by JSON pointer, e.g. "/paragraphs/3"
+_ELEMENT_POINTER = re.compile(r"^/(\w+)/(\d+)$")
+
+
+def _shift_element_pointer(element: Any, index_shift: Dict[str, int]) -> Any:
+    match = _ELEMENT_POINTER.match(element) if isinstance(element, str) else None
+    if match and match.group(1) in index_shift:
+        return f"/{match.group(1)}/{int(match.group(2)) + index_shift[match.group(1)]}"
+    return element
+
+
+def _shift_offsets(node: Any, offset_shift: int, page_shift: int, index_shift: Dict[str, int]) -> None:
+    """Shift every span offset, page number and element pointer found in `node`, in place."""
+    if isinstance(node, list):
+        for item in node:
+            _shift_offsets(item, offset_shift, page_shift, index_shift)
+        return
+    if not isinstance(node, dict):
+        return
+
+    for key, value in node.items():
+        if key == "spans" and isinstance(value, list):
+            for span in value:
+                if isinstance(span, dict) and "offset" in span:
+                    span["offset"] += offset_shift
+        elif key == "span" and isinstance(value, dict) and "offset" in value:
+            value["offset"] += offset_shift
+        elif key == "pageNumber" and isinstance(value, int):
+            node[key] = value + page_shift
+        elif key == "elements" and isinstance(value, list):
+            node[key] = [_shift_element_pointer(element, index_shift) for element in value]
+        else:
+            _shift_offsets(value, offset_shift, page_shift, index_shift)
+
+
+def merge_analyze_results(
+    analyze_results: List[Dict], first_pages: List[int], separator: str = "\n"
+) -> Dict:
+    """
+    Merge the `analyzeResult`s of page-range jobs of one document into a single `analyzeResult`.
+    Content is concatenated in page order, span offsets are shifted onto the merged content,
+    page numbers are mapped back to the original document and the element pointers of sections,
+    figures and table cells are re-indexed. The pieces are modified in place.
+
+    Args:
+        analyze_results (List[Dict]): The `analyzeResult` of each job, in page order.
+        first_pages (List[int]): The first page (1-based) of the range each job analyzed.
+        separator (str): Text inserted between the content of two jobs.
+    Returns:
+        analyze_result (Dict): The merged `analyzeResult`.
+    """
+    if not analyze_results:
+        return {}
+
+    merged = {
+        key: value
+        for key, value in analyze_results[0].items()
+        if key != "content" and key not in MERGED_COLLECTIONS
+    }
+    contents: List[str] = []
+    collections: Dict[str, List] = {}
+    offset_shift = 0
+
+    for analyze_result, first_page in zip(analyze_results, first_pages):
+        # Jobs normally report page numbers of the original document, older API
+        # versions number the pages of every range from 1
+        page_numbers = [page.get("pageNumber", first_page) for page in analyze_result.get("pages", []) or []]
+        page_shift = first_page - min(page_numbers) if page_numbers and min(page_numbers) < first_page else 0
+
+        index_shift = {name: len(collections.get(name, [])) for name in MERGED_COLLECTIONS}
+
+        for name in MERGED_COLLECTIONS:
+            items = analyze_result.get(name)
+            if not items:
+                continue
+            _shift_offsets(items, offset_shift, page_shift, index_shift)
+            collections.setdefault(name, []).extend(items)
+
+        content = analyze_result.get("content", "") or ""
+        contents.append(content)
+        offset_shift += len(content) + len(separator)
+
+    merged["content"] = separator.join(contents)
+    merged.update(collections)
+    return merged
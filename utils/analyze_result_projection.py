@@ -0,0 +1,87 @@
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterable, Tuple
+
+import ijson
+
+# Parent of the fields that can be projected, the rest of the response is always kept
+PROJECTED_OBJECT = "analyzeResult"
+
+_OPENING_EVENTS = ("start_map", "start_array")
+_CLOSING_EVENTS = ("end_map", "end_array")
+
+
+class _ProjectionBuilder:
+    def __init__(self, fields: Iterable[str]):
+        """
+        Builds the response from ijson basic_parse events, dropping every `analyzeResult` member
+        that is not in `fields` before it is materialized. Dropped members are skipped by
+        counting their nesting depth only, as they make up most of the events.
+        """
+        self.fields = set(fields)
+        self._builder = ijson.ObjectBuilder()
+        self._depth = 0
+        self._top_level_key = None
+        self._skip_value = False
+        self._skipped_depth = 0
+
+    def event(self, event: str, value: Any) -> None:
+        if self._skipped_depth:
+            if event in _OPENING_EVENTS:
+                self._skipped_depth += 1
+            elif event in _CLOSING_EVENTS:
+                self._skipped_depth -= 1
+            return
+        if self._skip_value:
+            self._skip_value = False
+            if event in _OPENING_EVENTS:
+                self._skipped_depth = 1
+            return
+
+        if event == "map_key":
+            if self._depth == 1:
+                self._top_level_key = value
+            elif self._depth == 2 and self._top_level_key == PROJECTED_OBJECT and value not in self.fields:
+                self._skip_value = True
+                return
+        elif event in _OPENING_EVENTS:
+            self._depth += 1
+        elif event in _CLOSING_EVENTS:
+            self._depth -= 1
+        self._builder.event(event, value)
+
+    @property
+    def value(self) -> Dict:
+        return self._builder.value
+
+
+def project_analyze_response(stream: BinaryIO, fields: Iterable[str]) -> Dict:
+    """
+    Parse an analyze result response incrementally, keeping only the requested `analyzeResult` fields.
+    Peak memory is bounded by the kept fields instead of the whole response.
+
+    Args:
+        stream (BinaryIO): The response body, e.g. `requests.Response.raw`.
+        fields (Iterable[str]): The `analyzeResult` members to keep, e.g. ("content", "tables").
+    Returns:
+        response (Dict): The response with `status` etc. and the projected `analyzeResult`.
+    """
+    builder = _ProjectionBuilder(fields)
+    for event, value in ijson.basic_parse(stream, use_float=True):
+        builder.event(event, value)
+    return builder.value
+
+
+async def project_analyze_response_async(stream: Any, fields: Iterable[str]) -> Dict:
+    """
+    Async version of `project_analyze_response`.
+
+    Args:
+        stream: An object with an async `read(size)`, e.g. `aiohttp.ClientResponse.content`.
+        fields (Iterable[str]): The `analyzeResult` members to keep.
+    Returns:
+        response (Dict): The response with `status` etc. and the projected `analyzeResult`.
+    """
+    builder = _ProjectionBuilder(fields)
+    events: AsyncIterator[Tuple[str, Any]] = ijson.basic_parse_async(stream, use_float=True)
+    async for event, value in events:
+        builder.event(event, value)
+    return builder.value
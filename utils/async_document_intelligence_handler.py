@@ -0,0 +1,412 @@
+import asyncio
+import json
+import os
+import time
+import traceback
+import uuid
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterable, Optional, Tuple, Union
+
+import aiohttp
+
+from .analyze_result_projection import project_analyze_response_async
+from .deadline import DeadlineExceeded, async_sleep, current_deadline, time_left
+from .document_intelligence_handler import (
+    THROTTLED_STATUS_CODES,
+    DocumentInput,
+    DocumentIntelligenceHandler,
+)
+from .handler_result import HandlerResult
+from .result_poller import ResultPoller
+
+
+class AsyncDocumentIntelligenceHandler(DocumentIntelligenceHandler):
+    """
+    asyncio variant of `DocumentIntelligenceHandler`.
+    Takes the same constructor arguments except `pool_size` and `session`: requests go through the
+    aiohttp session given to or created by `analyze`, so no `requests.Session` is created and the
+    blocking `__call__` is not available. `analyze` processes one document and `analyze_many`
+    overlaps the POSTs and polls of many documents while keeping at most `concurrency` in flight.
+    Like the sync handler, it stops at the deadline of the `deadline_scope` it is awaited in.
+
+    Usage:
+        handler = AsyncDocumentIntelligenceHandler("documentModels", "prebuilt-layout")
+        async for result in handler.analyze_many(paths, concurrency=16):
+            print(result.log["document_index"], result.success)
+    """
+
+    @staticmethod
+    def _create_session(pool_size: int) -> None:
+        return None
+
+    async def _send_async(
+        self,
+        session: aiohttp.ClientSession,
+        method: str,
+        url: str,
+        fuid: str,
+        request_log: Dict,
+        rate_limited: bool = False,
+        read_json: bool = False,
+        **kwargs,
+    ) -> Tuple[Any, Optional[Dict]]:
+        """Send a request, retrying it while the service answers 429 or 503.
+        Args:
+            session (aiohttp.ClientSession): The session to send the request with
+            method (str): The HTTP method
+            url (str): The url of the request
+            fuid (str): The file unique identifier for logging
+            request_log (Dict): Per-call counters, limiter and throttle waits and the parse time are added to it
+            rate_limited (bool): Take a token from the rate limiter before every attempt
+            read_json (bool): Parse and return the response body, projected onto `fields` if set
+            **kwargs: Passed on to `aiohttp.ClientSession.request`, the request ends at the current deadline
+        Returns:
+            headers: The headers of the first response that is not throttled
+            body (Dict | None): Its parsed body if `read_json` is set
+        """
+        position = None
+        if "data" in kwargs:
+            kwargs["data"], position = await asyncio.to_thread(self._retryable_body, kwargs["data"])
+        data = kwargs.get("data")
+
+        for attempt in range(self.max_throttle_retries + 1):
+            if rate_limited and self.rate_limiter:
+                wait = await asyncio.to_thread(self.rate_limiter.acquire)
+                request_log["limiter_wait"] = request_log.get("limiter_wait", 0.0) + wait
+            timeout = time_left(what="Document Intelligence")
+            if timeout is not None:
+                kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    if response.status not in THROTTLED_STATUS_CODES or attempt == self.max_throttle_retries:
+                        response.raise_for_status()
+                        body = None
+                        if read_json and self.fields is not None:
+                            start = time.perf_counter()
+                            body = await project_analyze_response_async(response.content, self.fields)
+                            request_log["response_bytes"] = response.content.total_bytes
+                            request_log["parse_time"] = (
+                                request_log.get("parse_time", 0.0) + time.perf_counter() - start
+                            )
+                        elif read_json:
+                            raw = await response.read()
+                            request_log["response_bytes"] = len(raw)
+                            start = time.perf_counter()
+                            body = json.loads(raw)
+                            request_log["parse_time"] = (
+                                request_log.get("parse_time", 0.0) + time.perf_counter() - start
+                            )
+                        return response.headers, body
+                    delay = self._throttle_delay(response.headers.get("Retry-After"), attempt)
+            except asyncio.TimeoutError as e:
+                deadline = current_deadline()
+                if deadline is not None and deadline.expired:
+                    raise DeadlineExceeded(f"Document Intelligence ran out of its {deadline.seconds:.1f}s time budget") from e
+                raise
+
+            self.logger.warning(
+                json.dumps(
+                    {
+                        "fuid": fuid,
+                        "type": "document_intelligence",
+                        "message": f"Throttled with {response.status}, retrying in {delay:.1f}s",
+                    }
+                )
+            )
+            request_log["throttle_retries"] = request_log.get("throttle_retries", 0) + 1
+            request_log["throttle_wait"] = request_log.get("throttle_wait", 0.0) + delay
+            await async_sleep(delay, "Document Intelligence")
+            if position is not None:
+                data.seek(position)
+
+    async def _post_document_async(
+        self,
+        session: aiohttp.ClientSession,
+        document: Union[bytes, BinaryIO],
+        fuid: str,
+        request_log: Optional[Dict] = None,
+    ) -> Tuple[str, Optional[str]]:
+        """A POST request is used to analyze documents with a prebuilt or custom model
+        Args:
+            session (aiohttp.ClientSession): The session to send the request with
+            document (bytes | BinaryIO): The raw document or a binary file object to analyze
+            fuid (str): The file unique identifier for logging
+            request_log (Dict): Per-call counters, limiter and throttle waits are added to it
+        Returns:
+            result_url (str): The url from where to retrieve the result
+            retry_after (str | None): The `Retry-After` header of the response
+        """
+        if self.upload_mode == "base64" and not isinstance(document, (bytes, bytearray, memoryview)):
+            document = await asyncio.to_thread(document.read)
+        request_log = request_log if request_log is not None else {}
+        headers, data = self._upload_request(document, request_log)
+        self.logger.debug(
+            json.dumps(
+                {
+                    "fuid": fuid,
+                    "type": "document_intelligence",
+                    "message": "Posting document to Azure Document Intelligence",
+                }
+            )
+        )
+        start = time.perf_counter()
+        response_headers, _ = await self._send_async(
+            session,
+            "POST",
+            self._analyze_url(),
+            fuid,
+            request_log,
+            rate_limited=True,
+            headers=headers,
+            data=data,
+        )
+        request_log["post_time"] = time.perf_counter() - start
+        return response_headers["Operation-Location"], response_headers.get("Retry-After")
+
+    async def _get_result_async(
+        self,
+        session: aiohttp.ClientSession,
+        result_url: str,
+        poller: ResultPoller,
+        fuid: str,
+        retry_after: Optional[str] = None,
+        request_log: Optional[Dict] = None,
+    ) -> Dict:
+        """A GET request is used to retrieve the result of a document analysis call.
+        Args:
+            session (aiohttp.ClientSession): The session to send the requests with
+            result_url (str): The url from where to retrieve the result
+            poller (ResultPoller): Decides how long to wait between polls and when to give up
+            fuid (str): The file unique identifier for logging
+            retry_after (str): The `Retry-After` header of the POST response
+            request_log (Dict): Per-call counters, poll timings and throttle waits are added to it
+        Returns:
+            result (Dict): The result of the document analysis
+        """
+        request_log = request_log if request_log is not None else {}
+        while True:
+            await async_sleep(poller.next_delay(retry_after), "Document Intelligence")
+            poller.record_poll()
+            self.logger.debug(
+                json.dumps(
+                    {
+                        "fuid": fuid,
+                        "type": "document_intelligence",
+                        "message": f"Getting result from Azure Document Intelligence, attempt {poller.poll_count}",
+                    }
+                )
+            )
+            start = time.perf_counter()
+            response_headers, result = await self._send_async(
+                session,
+                "GET",
+                result_url,
+                fuid,
+                request_log,
+                read_json=True,
+                headers={"Ocp-Apim-Subscription-Key": self._api_key},
+            )
+            request_log.setdefault("first_poll_time", time.perf_counter() - start)
+            retry_after = response_headers.get("Retry-After")
+
+            status = result["status"]
+            if status == "succeeded":
+                poller.record_result()
+                return result
+            if status == "failed":
+                raise Exception("Document Intelligence failed")
+
+    async def analyze(
+        self,
+        document: DocumentInput,
+        session: Optional[aiohttp.ClientSession] = None,
+        timeout: float = 600,
+        initial_delay: float = 0.25,
+        max_delay: float = 5,
+        fuid: str | None = None,
+    ) -> HandlerResult:
+        """
+        Takes a document path, the document bytes or a binary file object and returns the result of the analysis.
+        Follows the same steps as `DocumentIntelligenceHandler.__call__`, without blocking the event loop.
+        When the current deadline passes, `DeadlineExceeded` is raised instead of returning a failed result.
+
+        Args:
+            document (str | bytes | BinaryIO): The path to the document, its raw bytes or a binary file object.
+            session (aiohttp.ClientSession): Session to reuse. A temporary one is created if omitted.
+            timeout (float): The total time in seconds to wait for the result.
+            initial_delay (float): The first delay before getting the result in seconds.
+            max_delay (float): The longest delay between two polls in seconds.
+            fuid (str): The file unique identifier for logging.
+        Returns:
+            HandlerResult: The result of the analysis.
+        """
+        if session is None:
+            async with aiohttp.ClientSession() as own_session:
+                return await self.analyze(
+                    document,
+                    session=own_session,
+                    timeout=timeout,
+                    initial_delay=initial_delay,
+                    max_delay=max_delay,
+                    fuid=fuid,
+                )
+
+        start_time = time.time()
+        fuid = fuid if fuid else str(uuid.uuid4())
+        cache_log = {}
+        request_log = {}
+        poller = None
+
+        file = None
+
+        try:
+            phase_start = time.perf_counter()
+            if isinstance(document, (str, os.PathLike)):
+                document = file = await asyncio.to_thread(self._open_document, document)
+            elif (
+                self.cache
+                and not isinstance(document, (bytes, bytearray, memoryview))
+                and not document.seekable()
+            ):
+                # Hashing for the cache key needs a second pass over the stream
+                document = await asyncio.to_thread(document.read)
+            request_log["read_time"] = time.perf_counter() - phase_start
+            phase_start = time.perf_counter()
+            cache_key = (
+                await asyncio.to_thread(self._cache_key, document) if self.cache else None
+            )
+            result = (
+                await asyncio.to_thread(self.cache.get, cache_key) if self.cache else None
+            )
+            if self.cache:
+                request_log["cache_time"] = time.perf_counter() - phase_start
+                cache_log = {
+                    "cache": "miss" if result is None else "hit",
+                    **self.cache.stats(),
+                }
+
+            if result is None:
+                poller = ResultPoller(
+                    timeout=timeout, initial_delay=initial_delay, max_delay=max_delay
+                )
+                result_url, retry_after = await self._post_document_async(
+                    session, document, fuid, request_log=request_log
+                )
+                # The document is no longer needed once uploaded
+                if file:
+                    file.close()
+                result = await self._get_result_async(
+                    session,
+                    result_url=result_url,
+                    poller=poller,
+                    fuid=fuid,
+                    retry_after=retry_after,
+                    request_log=request_log,
+                )
+                if self.cache:
+                    await asyncio.to_thread(self._store_in_cache, cache_key, result)
+
+            content = result
+            success = True
+            log = {
+                "fuid": fuid,
+                "run_time": time.time() - start_time,
+                **cache_log,
+                **(poller.stats() if poller else {}),
+                **request_log,
+            }
+            error = None
+
+        except DeadlineExceeded:
+            # The caller gave up, it reports the timeout itself
+            self.logger.warning(
+                json.dumps(
+                    {
+                        "fuid": fuid,
+                        "type": "document_intelligence",
+                        "message": "Deadline exceeded, analysis abandoned",
+                        "run_time": time.time() - start_time,
+                    }
+                )
+            )
+            log = {
+                "fuid": fuid,
+                "run_time": time.time() - start_time,
+                "deadline_exceeded": 1,
+                **cache_log,
+                **(poller.stats() if poller else {}),
+                **request_log,
+            }
+            self._record_metrics(log, success=False)
+            raise
+        except Exception as e:
+            self.logger.error(
+                {
+                    "fuid": fuid,
+                    "type": "document_intelligence",
+                    "message": "Error with Document Intelligence",
+                    "error_message": str(e),
+                    "error_traceback": traceback.format_exc(),
+                }
+            )
+            content = None
+            success = False
+            error = str(e)
+            log = {
+                "fuid": fuid,
+                "traceback": traceback.format_exc(),
+                "run_time": time.time() - start_time,
+                **cache_log,
+                **(poller.stats() if poller else {}),
+                **request_log,
+            }
+
+        finally:
+            if file:
+                file.close()
+
+        self._record_metrics(log, success)
+        return HandlerResult(
+            content=content,
+            success=success,
+            log=log,
+            error=error,
+        )
+
+    async def analyze_many(
+        self,
+        documents: Iterable[DocumentInput],
+        concurrency: int = 8,
+        **kwargs,
+    ) -> AsyncIterator[HandlerResult]:
+        """
+        Analyze many documents concurrently and yield their results as they complete.
+        The position of each document in `documents` is stored in `result.log["document_index"]`.
+
+        Args:
+            documents (Iterable[str | bytes | BinaryIO]): Document paths, raw document bytes or binary file objects.
+            concurrency (int): The maximum number of documents in flight at the same time.
+            **kwargs: Passed on to `analyze` (timeout, initial_delay, max_delay).
+        Yields:
+            HandlerResult: The result of each analysis, in completion order.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        connector = aiohttp.TCPConnector(limit=concurrency)
+
+        async with aiohttp.ClientSession(connector=connector) as session:
+
+            async def run(index: int, document: DocumentInput) -> HandlerResult:
+                async with semaphore:
+                    result = await self.analyze(document, session=session, **kwargs)
+                result.log["document_index"] = index
+                return result
+
+            tasks = [
+                asyncio.create_task(run(index, document))
+                for index, document in enumerate(documents)
+            ]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    yield await next_done
+            finally:
+                for task in tasks:
+                    task.cancel()
@@ -0,0 +1,219 @@
+import gzip
+import io
+import itertools
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from typing import TYPE_CHECKING, Callable, Deque, Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+
+from utils.deadline import azure_call_kwargs
+
+try:
+    import zstandard
+except ImportError:  # Only needed for the zstd content encoding
+    zstandard = None
+
+if TYPE_CHECKING:
+    from azure.storage.blob import BlobClient
+
+Item = TypeVar("Item")
+Result = TypeVar("Result")
+
+# Content-Encoding values `encode_content` and `decode_content` support
+CONTENT_ENCODINGS = ("gzip", "zstd")
+
+
+def encode_content(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """
+    Compress a blob body for the given Content-Encoding. gzip output has no timestamp, so the same
+    data always compresses to the same bytes and keeps its Content-MD5.
+
+    Args:
+        data (bytes): The uncompressed body.
+        encoding (str): "gzip" or "zstd", the latter needs the `zstandard` package.
+        level (int): Compression level, the encoding's default if omitted.
+    Returns:
+        body (bytes): The body to upload with `Content-Encoding: <encoding>`.
+    """
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=6 if level is None else level, mtime=0)
+    if encoding == "zstd":
+        if zstandard is None:
+            raise ValueError("The zstd content encoding needs the zstandard package")
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compress(data)
+    raise ValueError(f"Unsupported content encoding {encoding!r}, expected one of {CONTENT_ENCODINGS}")
+
+
+def decode_content(data: bytes, encoding: Optional[str]) -> bytes:
+    """Undo `encode_content`, bodies without a Content-Encoding are returned as they are."""
+    if not encoding:
+        return data
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "zstd":
+        if zstandard is None:
+            raise ValueError("The zstd content encoding needs the zstandard package")
+        # decompressobj also handles frames written without their content size
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    raise ValueError(f"Unsupported content encoding {encoding!r}, expected one of {CONTENT_ENCODINGS}")
+
+
+def map_bounded(
+    function: Callable[[Item], Result], items: Iterable[Item], max_workers: int = 8
+) -> Iterator[Tuple[Item, Result]]:
+    """
+    Call `function` on every item from a pool of `max_workers` threads, yielding (item, result)
+    as the calls complete. At most `max_workers` calls are in flight and the next item is only
+    taken once a result was yielded, so `items` can be a lazy listing and memory stays bounded.
+    An exception of a call is raised when its result would be yielded. Every call runs in a copy
+    of the caller's context, so it keeps the caller's `deadline_scope`.
+
+    Args:
+        function (Callable): Called with one item, e.g. a blob download.
+        items (Iterable): The items, consumed lazily.
+        max_workers (int): The maximum number of concurrent calls.
+    Returns:
+        results (Iterator[Tuple]): (item, result) pairs in completion order.
+    """
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending: Dict[Future, Item] = {
+            pool.submit(copy_context().run, function, item): item for item in itertools.islice(items, max_workers)
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                yield item, future.result()
+                for next_item in itertools.islice(items, 1):
+                    pending[pool.submit(copy_context().run, function, next_item)] = next_item
+
+
+class BlobChunkReader(io.RawIOBase):
+    def __init__(
+        self,
+        blob_client: "BlobClient",
+        size: Optional[int] = None,
+        chunk_size: int = 1024 * 1024,
+        max_concurrency: int = 2,
+        etag: Optional[str] = None,
+        content_md5: Optional[str] = None,
+    ):
+        """
+        Read-only, seekable file object over a blob that downloads it in ranges while it is read,
+        so it can be passed as a request body without holding the whole blob in memory.
+        The next `max_concurrency` ranges are downloaded in parallel ahead of the reader, so at most
+        that many chunks plus the one being read are held in memory. While a range downloads,
+        azure-storage-blob briefly holds about 9 times its size (`list()` of the response allocates
+        a pointer per byte), so keep `chunk_size` small: 1 MiB ranges, 4 at a time peak near 37 MiB
+        whatever the blob size, 4 MiB ranges near 150 MiB.
+        Seeking drops the read-ahead and continues at the new position, which lets a throttled upload be retried.
+        `content_digest` identifies the content from the blob properties, so a cache key costs no extra read of the blob.
+        Once the ETag is known, ranges are only downloaded while the blob still has it, so a blob overwritten
+        while it is read fails instead of mixing two versions.
+
+        Args:
+            blob_client (BlobClient): The blob to read.
+            size (int): The blob size if known, e.g. from a listing. Fetched from the blob properties otherwise.
+            chunk_size (int): Bytes per ranged download.
+            max_concurrency (int): Ranges downloaded at the same time ahead of the reader.
+            etag (str): The blob ETag if known, e.g. from a listing. Fetched with the size otherwise.
+            content_md5 (str): The hex Content-MD5 of the blob if known.
+        """
+        super().__init__()
+        self._blob_client = blob_client
+        self._size = size
+        self._etag = etag
+        self._content_md5 = content_md5
+        self.chunk_size = chunk_size
+        self.max_concurrency = max(1, max_concurrency)
+        self._position = 0
+        self._buffer = memoryview(b"")
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        # Downloads of the ranges following the buffer, in order
+        self._pending: Deque[Future] = deque()
+        self._next_offset = 0
+
+    def _fetch_properties(self) -> None:
+        properties = self._blob_client.get_blob_properties(**azure_call_kwargs())
+        content_md5 = properties.content_settings.content_md5 if properties.content_settings else None
+        self._size = properties.size
+        self._etag = properties.etag
+        self._content_md5 = bytes(content_md5).hex() if content_md5 else None
+
+    @property
+    def size(self) -> int:
+        if self._size is None:
+            self._fetch_properties()
+        return self._size
+
+    @property
+    def content_digest(self) -> str:
+        """
+        What identifies the blob content without reading it: its Content-MD5 if the service has one,
+        otherwise the blob URL and ETag, which changes on every write. `DocumentIntelligenceCache` keys on it.
+        """
+        if self._content_md5 is None and self._etag is None:
+            self._fetch_properties()
+        if self._content_md5:
+            return f"md5:{self._content_md5}"
+        return f"etag:{self._blob_client.url}:{self._etag}"
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        position = max(0, offset)
+        if position != self._position:
+            self._drop_read_ahead()
+            self._position = self._next_offset = position
+        return self._position
+
+    def _drop_read_ahead(self) -> None:
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._buffer = memoryview(b"")
+
+    def _download_range(self, offset: int, length: int) -> bytes:
+        from azure.core import MatchConditions
+
+        kwargs = azure_call_kwargs()
+        if self._etag:
+            kwargs.update(etag=self._etag, match_condition=MatchConditions.IfNotModified)
+        return self._blob_client.download_blob(offset=offset, length=length, **kwargs).readall()
+
+    def _read_ahead(self) -> None:
+        while len(self._pending) < self.max_concurrency and self._next_offset < self.size:
+            length = min(self.chunk_size, self.size - self._next_offset)
+            # In the reader's context, so ranges stop at the deadline of whoever reads, e.g. a DI upload
+            self._pending.append(self._pool.submit(copy_context().run, self._download_range, self._next_offset, length))
+            self._next_offset += length
+
+    def readinto(self, buffer) -> int:
+        if not self._buffer:
+            self._read_ahead()
+            if not self._pending:
+                return 0
+            self._buffer = memoryview(self._pending.popleft().result())
+            self._read_ahead()
+        count = min(len(buffer), len(self._buffer))
+        buffer[:count] = self._buffer[:count]
+        self._buffer = self._buffer[count:]
+        self._position += count
+        return count
+
+    def close(self) -> None:
+        self._drop_read_ahead()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        super().close()
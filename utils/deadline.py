@@ -0,0 +1,113 @@
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, Union
+
+
+class DeadlineExceeded(TimeoutError):
+    """The time budget of the run or tool call doing this work is used up."""
+
+
+class Deadline:
+    def __init__(self, seconds: float):
+        """
+        A point in time work has to be done by, `seconds` from now on the monotonic clock.
+        Set one for a block of work with `deadline_scope`. Everything called in it, including
+        work handed to `map_bounded` and `run_tool_calls` threads, sees it through `current_deadline`,
+        so Document Intelligence polling and blob I/O stop waiting once it has passed.
+        """
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self, what: str = "The work") -> None:
+        """Raise `DeadlineExceeded` if the deadline has passed."""
+        if self.expired:
+            raise DeadlineExceeded(f"{what} ran out of its {self.seconds:.1f}s time budget")
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Union[Deadline, float, None]) -> Iterator[Optional[Deadline]]:
+    """
+    Run the block under `deadline`, a `Deadline` or seconds from now. A scope inside another one
+    can only shorten the time left, never extend it. None keeps the current deadline.
+
+    Usage:
+        with deadline_scope(300) as deadline:
+            handler(document)  # gives up polling when the 300s are over
+    """
+    if deadline is not None and not isinstance(deadline, Deadline):
+        deadline = Deadline(deadline)
+    outer = _current.get()
+    if deadline is None or (outer is not None and outer.expires_at <= deadline.expires_at):
+        deadline = outer
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def time_left(default: Optional[float] = None, what: str = "The work") -> Optional[float]:
+    """
+    Seconds a wait or request may take: `default`, cut to what is left of the current deadline.
+
+    Args:
+        default (float): The timeout without a deadline, None for no timeout.
+        what (str): Named in the error if the deadline has passed.
+    Returns:
+        seconds (float): The timeout to use, None if there is neither a default nor a deadline.
+    Raises:
+        DeadlineExceeded: If the current deadline has already passed.
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return default
+    deadline.check(what)
+    return deadline.remaining() if default is None else min(default, deadline.remaining())
+
+
+def sleep(seconds: float, what: str = "The work") -> None:
+    """`time.sleep`, raising `DeadlineExceeded` instead of sleeping past the current deadline."""
+    left = time_left(what=what)
+    if left is not None and seconds >= left:
+        time.sleep(left)
+        raise DeadlineExceeded(f"{what} ran out of its time budget while waiting {seconds:.1f}s")
+    time.sleep(seconds)
+
+
+async def async_sleep(seconds: float, what: str = "The work") -> None:
+    """`asyncio.sleep` counterpart of `sleep`, raising `DeadlineExceeded` instead of waiting past the deadline."""
+    import asyncio
+
+    left = time_left(what=what)
+    if left is not None and seconds >= left:
+        await asyncio.sleep(left)
+        raise DeadlineExceeded(f"{what} ran out of its time budget while waiting {seconds:.1f}s")
+    await asyncio.sleep(seconds)
+
+
+def azure_call_kwargs() -> dict:
+    """
+    Per-call keyword arguments of azure-core clients (blob storage) that end a request at the
+    current deadline: the server side `timeout` in whole seconds and the transport's connection
+    and read timeouts. Empty without a deadline, so the clients keep their defaults.
+    """
+    left = time_left(what="The blob request")
+    if left is None:
+        return {}
+    return {"timeout": max(1, math.ceil(left)), "connection_timeout": max(left, 0.001), "read_timeout": max(left, 0.001)}
@@ -0,0 +1,227 @@
+import csv
+import io
+import json
+import re
+from typing import Dict, List, Optional, Sequence
+
+# Characters per token of English text with the GPT tokenizers, close enough to size tool outputs
+CHARS_PER_TOKEN = 4
+DEFAULT_BUDGET_TOKENS = 1500
+
+# Shares of the budget, in the order sections are filled. What a section leaves goes to the next
+# one and the rest of the budget to the opening lines of the text
+SECTION_SHARES = (("headings", 0.15), ("key_values", 0.35), ("tables", 0.35))
+# Kept back for the keys and counts around the sections
+OVERHEAD_TOKENS = 60
+MAX_VALUE_CHARS = 160
+
+_WHITESPACE = re.compile(r"\s+")
+_MARKDOWN_HEADING = re.compile(r"^#{1,6}\s+(\S.*)$")
+# "3.1 Delivery and logistics", "B. Pricing", without a full stop or colon at the end
+_NUMBERED_HEADING = re.compile(r"^(?:\d+(?:\.\d+)*\.?|[A-Z]\.)\s+[A-Z][^:]{1,60}[^.:]$")
+_CAPS_HEADING = re.compile(r"^[A-Z][A-Z0-9 &/,()'-]{3,80}$")
+_KEY_VALUE = re.compile(r"^(?:[-*•]\s*)?([A-Za-z][^:]{0,60}?)\s*:\s*(\S.*)$")
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _size(item) -> int:
+    return estimate_tokens(item if isinstance(item, str) else json.dumps(item, ensure_ascii=False))
+
+
+def _clip(value: str, limit: int = MAX_VALUE_CHARS) -> str:
+    value = _WHITESPACE.sub(" ", value).strip()
+    return value if len(value) <= limit else value[: limit - 1] + "…"
+
+
+def headings(lines: Sequence[str]) -> List[Dict]:
+    """Section headings by their 1-based line: Markdown headings, numbered titles and all caps lines."""
+    found = []
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        markdown = _MARKDOWN_HEADING.match(line)
+        if markdown:
+            found.append({"line": number, "text": _clip(markdown.group(1))})
+        elif _NUMBERED_HEADING.match(line) or (_CAPS_HEADING.match(line) and any(c.isalpha() for c in line[1:])):
+            found.append({"line": number, "text": _clip(line)})
+    return found
+
+
+def key_value_candidates(lines: Sequence[str]) -> List[Dict]:
+    """"Label: value" lines by their 1-based line, e.g. "Lead time: 10 days"."""
+    found = []
+    for number, line in enumerate(lines, start=1):
+        match = _KEY_VALUE.match(line.strip())
+        if match and not match.group(2).startswith("//"):
+            found.append({"line": number, "key": _clip(match.group(1), 60), "value": _clip(match.group(2))})
+    return found
+
+
+def _csv_rows(grid: Sequence[Sequence[str]]) -> List[str]:
+    """The non-empty rows of a table grid as CSV lines, with whitespace collapsed in every cell."""
+    rows = []
+    for row in grid:
+        cells = [_WHITESPACE.sub(" ", cell or "").strip() for cell in row]
+        if not any(cells):
+            continue
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="").writerow(cells)
+        rows.append(buffer.getvalue())
+    return rows
+
+
+def _fit(items: List, budget: int) -> List:
+    """The leading items whose sizes fit into `budget` tokens. A first line longer than the budget is
+    cut instead of dropped, so a reader always gets ahead; `read_range` continues a cut line with
+    `next_char`."""
+    kept, used = [], 0
+    for item in items:
+        used += _size(item) + 1
+        if used > budget:
+            break
+        kept.append(item)
+    if not kept and items and isinstance(items[0], str) and budget > 1:
+        kept.append(items[0][: (budget - 1) * CHARS_PER_TOKEN])
+    return kept
+
+
+def build_digest(extracted: Dict, budget_tokens: int = DEFAULT_BUDGET_TOKENS, source: Optional[str] = None) -> Dict:
+    """
+    A compact view of an extracted document for a tool output: its section headings, "Label: value"
+    candidates, tables as CSV and the opening lines of its text, within `budget_tokens` (estimated
+    at `CHARS_PER_TOKEN`). Everything carries its line or row numbers, so the agent can read the
+    parts it needs with `read_range` instead of getting the whole document.
+
+    Args:
+        extracted (Dict): `text` and `tables` (lists of rows), as `extract_text_tables` returns them.
+        budget_tokens (int): The size of the digest in tokens, about.
+        source (str): Name of the document, e.g. the result blob, returned as is.
+    Returns:
+        digest (Dict): `source`, the `lines` and `tables` counts, `headings`, `key_values`,
+            `tables_csv` with the rows shown of every table, `excerpt` and the `omitted` counts.
+    """
+    text = extracted.get("text") or ""
+    lines = text.splitlines()
+    grids = extracted.get("tables") or []
+    remaining = max(budget_tokens - OVERHEAD_TOKENS, 0)
+    carry = 0
+    sections = {}
+
+    all_headings = headings(lines)
+    all_key_values = key_value_candidates(lines)
+    table_rows = [_csv_rows(grid) for grid in grids]
+    for name, share in SECTION_SHARES:
+        budget = int(budget_tokens * share) + carry
+        if name == "headings":
+            kept = _fit(all_headings, budget)
+        elif name == "key_values":
+            kept = _fit(all_key_values, budget)
+        else:
+            kept, left = [], budget
+            for index, rows in enumerate(table_rows):
+                # Room for the entry itself and at least a header row
+                if left < 40:
+                    break
+                shown = _fit(rows, left - 20)
+                entry = {"table": index, "rows": len(rows), "rows_shown": len(shown), "csv": "\n".join(shown)}
+                kept.append(entry)
+                left -= _size(entry)
+        sections[name] = kept
+        used = sum(_size(item) + 1 for item in kept)
+        carry = max(budget - used, 0)
+        remaining -= used
+
+    excerpt_lines = _fit([line.rstrip() for line in lines], remaining)
+    omitted = {
+        "headings": len(all_headings) - len(sections["headings"]),
+        "key_values": len(all_key_values) - len(sections["key_values"]),
+        "tables": len(grids) - len(sections["tables"]),
+        "table_rows": sum(len(rows) for rows in table_rows) - sum(entry["rows_shown"] for entry in sections["tables"]),
+        "lines_after_excerpt": len(lines) - len(excerpt_lines),
+    }
+    return {
+        "source": source,
+        "lines": len(lines),
+        "tables": len(grids),
+        "headings": sections["headings"],
+        "key_values": sections["key_values"],
+        "tables_csv": sections["tables"],
+        "excerpt": "\n".join(excerpt_lines),
+        "omitted": omitted,
+    }
+
+
+def read_range(
+    extracted: Dict,
+    start_line: int = 1,
+    end_line: Optional[int] = None,
+    table: Optional[int] = None,
+    start_row: int = 0,
+    end_row: Optional[int] = None,
+    budget_tokens: int = DEFAULT_BUDGET_TOKENS,
+    start_char: int = 0,
+) -> Dict:
+    """
+    Lines of the text, or rows of one table as CSV, of an extracted document, cut at `budget_tokens`.
+    A first line or row longer than the budget is returned in parts: the range then ends on it and
+    `next_char` is where its next part starts.
+
+    Args:
+        extracted (Dict): `text` and `tables`, as for `build_digest`.
+        start_line (int): First line to return, 1-based as in the digest.
+        end_line (int): Last line to return, up to the end of the text if omitted.
+        table (int): Return rows of this table instead of lines.
+        start_row (int): First row of the table, 0-based and counting only non-empty rows, as the digest.
+        end_row (int): Last row of the table, up to its end if omitted.
+        budget_tokens (int): The size of the output in tokens, about.
+        start_char (int): Characters of the first line or row to skip, the `next_char` of the previous range.
+    Returns:
+        span (Dict): `text` with the lines, or `csv` with the rows, the range returned and `next_line` or
+            `next_row` to continue from if it was cut, else None, and `next_char` to pass along with it
+            if a line or row was cut, else None.
+    """
+    if table is not None:
+        grids = extracted.get("tables") or []
+        if not 0 <= table < len(grids):
+            return {"error": f"No table {table}, the document has {len(grids)} tables"}
+        rows = _csv_rows(grids[table])
+        start_row = max(start_row, 0)
+        end_row = len(rows) - 1 if end_row is None else min(end_row, len(rows) - 1)
+        shown, last, next_row, next_char = _fit_range(rows[start_row : end_row + 1], start_row, end_row, budget_tokens, start_char)
+        return {
+            "table": table,
+            "start_row": start_row,
+            "end_row": last,
+            "csv": "\n".join(shown),
+            "next_row": next_row,
+            "next_char": next_char,
+        }
+
+    lines = (extracted.get("text") or "").splitlines()
+    start_line = max(start_line, 1)
+    end_line = len(lines) if end_line is None else min(end_line, len(lines))
+    items = [line.rstrip() for line in lines[start_line - 1 : end_line]]
+    shown, last, next_line, next_char = _fit_range(items, start_line, end_line, budget_tokens, start_char)
+    return {
+        "start_line": start_line,
+        "end_line": last,
+        "text": "\n".join(shown),
+        "next_line": next_line,
+        "next_char": next_char,
+    }
+
+
+def _fit_range(items: List[str], first: int, end: int, budget: int, start_char: int):
+    """(items shown, number of the last one, next number to read, next_char) of the `_fit` of a range
+    numbered from `first` to `end`, its first item starting at `start_char`."""
+    start_char = max(start_char, 0)
+    if items and start_char:
+        items = [items[0][start_char:]] + items[1:]
+    shown = _fit(items, budget)
+    if shown and len(shown[0]) < len(items[0]):
+        # The first item was cut, the next range starts with its rest
+        return shown, first, first, start_char + len(shown[0])
+    last = first + len(shown) - 1
+    return shown, last, last + 1 if last < end else None, None
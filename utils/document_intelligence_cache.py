@@ -0,0 +1,211 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import BinaryIO, Dict, Iterable, Optional, Union
+
+
+class DocumentIntelligenceCache:
+    logger = logging.getLogger("neuron_public")
+    # Eviction makes room down to this share of `max_size_bytes`, so the writes after it do not scan again
+    EVICT_TO = 0.9
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_size_bytes: int = 512 * 1024 * 1024,
+        max_age_seconds: Optional[float] = 7 * 24 * 3600,
+        scan_interval_seconds: float = 3600,
+    ):
+        """
+        On-disk, content-addressed cache for Document Intelligence results.
+        Every entry is stored as `<key>.json` in `cache_dir`, where the key is the SHA-256
+        of the document bytes combined with the analysis parameters.
+
+        Args:
+            cache_dir (str): Directory where cached results are stored. Created if missing.
+            max_size_bytes (int): Total size of the cache before the least recently used entries are evicted.
+            max_age_seconds (float): Entries older than this are treated as misses and evicted. None disables expiry.
+            scan_interval_seconds (float): The size of the cache is tracked as entries are written, the
+                directory is only scanned when it exceeds `max_size_bytes` or this long after the last
+                scan, which also picks up entries written by other processes and removes expired ones.
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.max_age_seconds = max_age_seconds
+        self.scan_interval_seconds = scan_interval_seconds
+        self.hits = 0
+        self.misses = 0
+        # Bytes of the entries as of the last scan plus those written since, None before the first scan
+        self._size: Optional[int] = None
+        self._scanned_at = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def hash_document(document: Union[bytes, BinaryIO], chunk_size: int = 1024 * 1024) -> str:
+        """SHA-256 of a document. File objects are hashed in chunks and rewound afterwards.
+        File objects with a `content_digest`, such as `BlobChunkReader`, are identified by it instead,
+        so a streamed blob is not downloaded once for the key and again for the upload.
+        Args:
+            document (bytes | BinaryIO): The raw document or a readable, seekable binary file object
+            chunk_size (int): The number of bytes read at a time from file objects
+        Returns:
+            digest (str): Hex digest of the document bytes, or the `content_digest` of the file object
+        """
+        if isinstance(document, (bytes, bytearray, memoryview)):
+            return hashlib.sha256(document).hexdigest()
+        content_digest = getattr(document, "content_digest", None)
+        if content_digest:
+            return content_digest
+        sha256 = hashlib.sha256()
+        start = document.tell()
+        for chunk in iter(lambda: document.read(chunk_size), b""):
+            sha256.update(chunk)
+        document.seek(start)
+        return sha256.hexdigest()
+
+    @staticmethod
+    def make_key(
+        document: Union[bytes, BinaryIO],
+        model_type: str,
+        model_id: str,
+        output_content_format: str,
+        api_version: str,
+        pages: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> str:
+        """Build the cache key of a document and the parameters it is analyzed with.
+        Args:
+            document (bytes | BinaryIO): The raw document bytes or a seekable binary file object
+            model_type (str): The model type used for the analysis
+            model_id (str): The model id used for the analysis
+            output_content_format (str): The requested output content format
+            api_version (str): The API version used for the analysis
+            pages (str): The page range analyzed, None for the whole document
+            fields (Iterable[str]): The `analyzeResult` fields kept, None for the full result
+        Returns:
+            key (str): Hex digest identifying the analysis result
+        """
+        digest = DocumentIntelligenceCache.hash_document(document)
+        params = [digest, model_type, model_id, output_content_format, api_version, pages or ""]
+        if fields is not None:
+            params.append(",".join(sorted(fields)))
+        params = "|".join(params)
+        return hashlib.sha256(params.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _is_expired(self, mtime: float, now: float) -> bool:
+        return self.max_age_seconds is not None and now - mtime > self.max_age_seconds
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached result for `key`, or None on a miss.
+        Args:
+            key (str): The cache key from `make_key`
+        Returns:
+            result (Dict | None): The cached analysis result
+        """
+        path = self._path(key)
+        try:
+            mtime = os.path.getmtime(path)
+            if self._is_expired(mtime, time.time()):
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, "r", encoding="utf-8") as file:
+                result = json.load(file)
+            # Refresh mtime so eviction drops the least recently used entries first
+            os.utime(path, None)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def set(self, key: str, result: Dict) -> None:
+        """Store a result and evict old entries if the cache grew too large.
+        Args:
+            key (str): The cache key from `make_key`
+            result (Dict): The analysis result to store
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(result, file)
+            size = os.path.getsize(tmp_path)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            if self._size is not None:
+                self._size += size - replaced
+            scan = (
+                self._size is None
+                or self._size > self.max_size_bytes
+                or time.time() - self._scanned_at > self.scan_interval_seconds
+            )
+        if scan:
+            self.evict()
+
+    def evict(self) -> None:
+        """Remove expired entries, then the least recently used ones if the size limit is exceeded,
+        down to `EVICT_TO` of it."""
+        now = time.time()
+        entries = []
+        with self._lock:
+            self._scanned_at = now
+            for entry in os.scandir(self.cache_dir):
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if self._is_expired(stat.st_mtime, now):
+                    self._remove(entry.path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total_size = sum(size for _, size, _ in entries)
+            limit = self.max_size_bytes if total_size <= self.max_size_bytes else self.max_size_bytes * self.EVICT_TO
+            for _, size, path in sorted(entries):
+                if total_size <= limit:
+                    break
+                self._remove(path)
+                total_size -= size
+            self._size = total_size
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        self.logger.debug(
+            json.dumps(
+                {
+                    "type": "document_intelligence_cache",
+                    "message": f"Evicted {os.path.basename(path)}",
+                }
+            )
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit/miss counters of this cache instance."""
+        with self._lock:
+            return {"cache_hits": self.hits, "cache_misses": self.misses}
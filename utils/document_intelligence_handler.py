@@ -1,15 +1,61 @@
 import base64
 import json
 import logging
+import mmap
 import os
+import random
+import re
 import time
 import traceback
 import uuid
-from typing import Dict, Literal, Union
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import copy_context
+from typing import Any, BinaryIO, Dict, Iterator, List, Literal, Optional, Sequence, Tuple, Union
 
 import requests
+from requests.adapters import HTTPAdapter
 
+from .analyze_result_merger import merge_analyze_results
+from .analyze_result_projection import project_analyze_response
+from .deadline import DeadlineExceeded, current_deadline, sleep, time_left
+from .document_intelligence_cache import DocumentIntelligenceCache
 from .handler_result import HandlerResult
+from .metrics import MetricsSink
+from .rate_limiter import TokenBucketRateLimiter
+from .result_poller import ResultPoller
+
+# A document path, the raw document bytes, or a readable binary file object
+DocumentInput = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]
+
+# Responses that mean "try again later" rather than a failed request
+THROTTLED_STATUS_CODES = (429, 503)
+
+# Most bytes decompressed from one PDF object stream while looking for the page tree
+MAX_OBJECT_STREAM_BYTES = 64 * 1024 * 1024
+
+# Numeric entries of HandlerResult.log that are sent to the metrics sink
+METRIC_LOG_KEYS = (
+    "run_time",
+    "read_time",
+    "cache_time",
+    "encode_time",
+    "post_time",
+    "first_poll_time",
+    "poll_wait",
+    "parse_time",
+    "time_to_first_result",
+    "limiter_wait",
+    "upload_bytes",
+    "response_bytes",
+)
+# Counts of HandlerResult.log that are added to counters instead
+METRIC_COUNT_KEYS = (
+    "poll_count",
+    "throttle_retries",
+    "deadline_exceeded",
+)
 
 
 class DocumentIntelligenceHandler:
@@ -29,17 +75,44 @@ class DocumentIntelligenceHandler:
         ],
         output_content_format: Literal["text", "markdown"] = "markdown",
         api_version: str = "2024-11-30",
+        cache: Optional[DocumentIntelligenceCache] = None,
+        upload_mode: Literal["binary", "base64"] = "binary",
+        pool_size: int = 10,
+        session: Optional[requests.Session] = None,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        max_throttle_retries: int = 5,
+        metrics_sink: Optional[MetricsSink] = None,
+        fields: Optional[Sequence[str]] = None,
     ):
         """
         Handler for Azure Document Intelligence.
         `DOCUMENT_INTELLIGENCE_ENDPOINT` and `DOCUMENT_INTELLIGENCE_API_KEY` must be set in the environment variables.
-        Main function is __call__ which takes a document path and returns the result of the analysis.
+        Main function is __call__ which takes a document path, the document bytes or a binary file
+        object, and returns the result of the analysis.
+        The handler keeps no per-call state, so one instance can be shared between threads. Requests
+        go through a keep-alive `requests.Session`, so polls reuse the connection of the upload.
 
         Args:
             model_type (str): The type of model to use. Can be "documentModels" or "documentClassifiers".
             model_id (str): The ID of the model to use for analysis.
             output_content_format (str): The format of the output content. Can be "text" or "markdown".
             api_version (str): Azure Document Intelligence API version to use for requests.
+            cache (DocumentIntelligenceCache): Optional on-disk result cache. Documents already analyzed
+                with the same parameters are returned from the cache without calling the API.
+            upload_mode (str): "binary" streams the raw document as `application/octet-stream`.
+                "base64" sends it base64 encoded inside a JSON body, as older integrations did.
+            pool_size (int): The maximum number of pooled connections, set it to the number of worker threads.
+            session (requests.Session): Optional session to use instead of creating a pooled one.
+            rate_limiter (TokenBucketRateLimiter): Optional limiter every analyze POST takes a token from.
+                Share one instance between handlers and threads, or use its SQLite state between processes.
+                Result polls are not limited, DI quotas them separately.
+            max_throttle_retries (int): How often a request answered with 429 or 503 is retried, waiting
+                `Retry-After` seconds or backing off exponentially with jitter in between.
+            metrics_sink (MetricsSink): Optional sink receiving the per-phase timings, byte and poll counts
+                of every call, tagged with `model_id` and `success`.
+            fields (Sequence[str]): Optional `analyzeResult` members to keep, e.g. ("content", "tables").
+                The result is then parsed incrementally while it is downloaded and everything else
+                (pages, words, polygons, styles ...) is dropped. The full result is kept if omitted.
         """
         self._endpoint = os.environ["DOCUMENT_INTELLIGENCE_ENDPOINT"]
         self._api_key = os.environ["DOCUMENT_INTELLIGENCE_API_KEY"]
@@ -47,138 +120,420 @@ class DocumentIntelligenceHandler:
         self.model_id = model_id
         self.output_content_format = output_content_format
         self.api_version = api_version
+        self.cache = cache
+        self.upload_mode = upload_mode
+        self._session = session if session is not None else self._create_session(pool_size)
+        self.rate_limiter = rate_limiter
+        self.max_throttle_retries = max_throttle_retries
+        self.metrics_sink = metrics_sink
+        self.fields = tuple(fields) if fields is not None else None
 
-    def _base64_encode_document(self, document_path: str) -> str:
-        """Open a file from the system and base64 encode it.
+    @staticmethod
+    def _create_session(pool_size: int) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self) -> None:
+        """Close the pooled connections of the handler."""
+        if self._session is not None:
+            self._session.close()
+
+    def _open_document(self, document_path: str) -> BinaryIO:
+        """Open a file from the system for reading its bytes.
         Args:
             document_path (str): The path to the document
         Return:
-            base64_encoded_doc (str): The encoded document
+            document (BinaryIO): The opened document, to be closed by the caller
         """
         if not os.path.exists(document_path):
             raise Exception("File do not exists")
-        with open(document_path, "rb") as file:
-            return base64.b64encode(file.read()).decode("utf-8")
+        return open(document_path, "rb")
 
-    def _post_document(self, base64_source: str) -> str:
-        """A POST request is used to analyze documents with a prebuilt or custom model
+    @contextmanager
+    def _document_source(self, document: DocumentInput) -> Iterator[Union[bytes, BinaryIO]]:
+        """Yield something the request can be sent from, without copying in-memory documents.
+        Paths are opened and closed again, file objects passed in are left open for the caller.
+        """
+        if isinstance(document, (str, os.PathLike)):
+            with self._open_document(document) as file:
+                yield file
+        elif isinstance(document, (bytes, bytearray, memoryview)):
+            yield document
+        elif self.cache and not document.seekable():
+            # Hashing for the cache key needs a second pass over the stream
+            yield document.read()
+        else:
+            yield document
+
+    def _base64_encode_document(self, document: Union[bytes, BinaryIO]) -> str:
+        """Base64 encode a document.
+        Args:
+            document (bytes | BinaryIO): The raw document or a binary file object
+        Return:
+            base64_encoded_doc (str): The encoded document
+        """
+        if not isinstance(document, (bytes, bytearray, memoryview)):
+            document = document.read()
+        return base64.b64encode(document).decode("utf-8")
+
+    @staticmethod
+    def _payload_size(data: Union[bytes, BinaryIO, str]) -> Optional[int]:
+        if isinstance(data, (str, bytes, bytearray)):
+            return len(data)
+        if isinstance(data, memoryview):
+            return data.nbytes
+        if not data.seekable():
+            return None
+        position = data.tell()
+        size = data.seek(0, os.SEEK_END) - position
+        data.seek(position)
+        return size
+
+    def _upload_request(
+        self, document: Union[bytes, BinaryIO], request_log: Optional[Dict] = None
+    ) -> Tuple[Dict, Union[bytes, BinaryIO, str]]:
+        """Build the headers and body of the analyze request for the configured `upload_mode`.
         Args:
-            base64_source (str): The base64 encoded document to analyze
+            document (bytes | BinaryIO): The raw document or a binary file object
+            request_log (Dict): Per-call counters, the encode time and upload size are added to it
         Returns:
-            result_url (str): The url from where to retrieve the result
+            headers (Dict): The request headers
+            data (bytes | BinaryIO | str): The request body, file objects are streamed as is
         """
+        start = time.perf_counter()
+        if self.upload_mode == "base64":
+            headers = {"Content-Type": "application/json"}
+            data = json.dumps({"base64Source": self._base64_encode_document(document)})
+        else:
+            headers = {"Content-Type": "application/octet-stream"}
+            data = document
+        headers["Ocp-Apim-Subscription-Key"] = self._api_key
+        if request_log is not None:
+            request_log["encode_time"] = time.perf_counter() - start
+            request_log["upload_bytes"] = self._payload_size(data)
+        return headers, data
+
+    def _cache_key(self, document: Union[bytes, BinaryIO], pages: Optional[str] = None) -> str:
+        return DocumentIntelligenceCache.make_key(
+            document,
+            model_type=self.model_type,
+            model_id=self.model_id,
+            output_content_format=self.output_content_format,
+            api_version=self.api_version,
+            pages=pages,
+            fields=self.fields,
+        )
+
+    def _analyze_url(self, pages: Optional[str] = None) -> str:
         url = (
             f"{self._endpoint}/documentintelligence/{self.model_type}/"
             f"{self.model_id}:analyze?api-version={self.api_version}&outputContentFormat={self.output_content_format}"
         )
-        headers = {
-            "Content-Type": "application/json",
-            "Ocp-Apim-Subscription-Key": self._api_key,
-        }
-        data = {"base64Source": base64_source}
+        if pages:
+            # Code point offsets let page-range results be merged with Python string lengths
+            url += f"&pages={pages}&stringIndexType=unicodeCodePoint"
+        return url
+
+    @staticmethod
+    def _throttle_delay(retry_after: Optional[str], attempt: int) -> float:
+        delay = ResultPoller.parse_retry_after(retry_after)
+        if delay is None:
+            delay = min(2**attempt, 30) * random.uniform(0.5, 1)
+        return delay
+
+    def _retryable_body(self, data: Any) -> Tuple[Any, Optional[int]]:
+        """The request body and the position a retry rewinds it to.
+        Seekable file objects are sent as they are and rewound. Unseekable streams (pipes, sockets,
+        HTTP bodies) cannot be sent a second time, so they are read into memory first if the request
+        may be retried.
+        """
+        if isinstance(data, (str, bytes, bytearray, memoryview)) or not hasattr(data, "read"):
+            return data, None
+        if data.seekable():
+            return data, data.tell()
+        if self.max_throttle_retries:
+            return data.read(), None
+        return data, None
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        fuid: str,
+        request_log: Dict,
+        rate_limited: bool = False,
+        **kwargs,
+    ) -> requests.Response:
+        """Send a request, retrying it while the service answers 429 or 503.
+        Args:
+            method (str): The HTTP method
+            url (str): The url of the request
+            fuid (str): The file unique identifier for logging
+            request_log (Dict): Per-call counters, limiter and throttle waits are added to it
+            rate_limited (bool): Take a token from the rate limiter before every attempt
+            **kwargs: Passed on to `requests.Session.request`, its `timeout` is cut to the current deadline
+        Returns:
+            response (requests.Response): The first response that is not throttled
+        """
+        position = None
+        if "data" in kwargs:
+            kwargs["data"], position = self._retryable_body(kwargs["data"])
+        data = kwargs.get("data")
+
+        for attempt in range(self.max_throttle_retries + 1):
+            if rate_limited and self.rate_limiter:
+                request_log["limiter_wait"] = request_log.get("limiter_wait", 0.0) + self.rate_limiter.acquire()
+            timeout = time_left(kwargs.pop("timeout", None), "Document Intelligence")
+            try:
+                response = self._session.request(method, url, timeout=timeout, **kwargs)
+            except requests.Timeout as e:
+                deadline = current_deadline()
+                if deadline is not None and deadline.expired:
+                    raise DeadlineExceeded(f"Document Intelligence ran out of its {deadline.seconds:.1f}s time budget") from e
+                raise
+            if response.status_code not in THROTTLED_STATUS_CODES or attempt == self.max_throttle_retries:
+                break
+
+            response.close()
+            delay = self._throttle_delay(response.headers.get("Retry-After"), attempt)
+            self.logger.warning(
+                json.dumps(
+                    {
+                        "fuid": fuid,
+                        "type": "document_intelligence",
+                        "message": f"Throttled with {response.status_code}, retrying in {delay:.1f}s",
+                    }
+                )
+            )
+            request_log["throttle_retries"] = request_log.get("throttle_retries", 0) + 1
+            request_log["throttle_wait"] = request_log.get("throttle_wait", 0.0) + delay
+            sleep(delay, "Document Intelligence")
+            if position is not None:
+                data.seek(position)
+
+        response.raise_for_status()
+        return response
+
+    def _post_document(
+        self,
+        document: Union[bytes, BinaryIO],
+        fuid: str,
+        pages: Optional[str] = None,
+        request_log: Optional[Dict] = None,
+    ) -> Tuple[str, Optional[str]]:
+        """A POST request is used to analyze documents with a prebuilt or custom model
+        Args:
+            document (bytes | BinaryIO): The raw document or a binary file object to analyze
+            fuid (str): The file unique identifier for logging
+            pages (str): Optional page range to analyze, e.g. "1-50"
+            request_log (Dict): Per-call counters, limiter and throttle waits are added to it
+        Returns:
+            result_url (str): The url from where to retrieve the result
+            retry_after (str | None): The `Retry-After` header of the response
+        """
+        request_log = request_log if request_log is not None else {}
+        url = self._analyze_url(pages)
+        headers, data = self._upload_request(document, request_log)
         self.logger.debug(
             json.dumps(
                 {
-                    "fuid": self.fuid,
+                    "fuid": fuid,
                     "type": "document_intelligence",
                     "message": "Posting document to Azure Document Intelligence",
                 }
             )
         )
 
-        response = requests.post(url, headers=headers, data=json.dumps(data))
-        response.raise_for_status()
-        return response.headers["Operation-Location"]
+        start = time.perf_counter()
+        response = self._send(
+            "POST",
+            url,
+            fuid,
+            request_log,
+            rate_limited=True,
+            headers=headers,
+            data=data,
+        )
+        request_log["post_time"] = time.perf_counter() - start
+        return response.headers["Operation-Location"], response.headers.get("Retry-After")
 
-    def _get_result(self, result_url: str, delay_time: int, max_retry: int) -> Dict:
+    def _get_result(
+        self,
+        result_url: str,
+        poller: ResultPoller,
+        fuid: str,
+        retry_after: Optional[str] = None,
+        request_log: Optional[Dict] = None,
+    ) -> Dict:
         """A GET request is used to retrieve the result of a document analysis call.
         Args:
             result_url (str): The url from where to retrieve the result
-            delay_time (int): The time to wait between retries
-            max_retry (int): The maximum number of retries
+            poller (ResultPoller): Decides how long to wait between polls and when to give up
+            fuid (str): The file unique identifier for logging
+            retry_after (str): The `Retry-After` header of the POST response
+            request_log (Dict): Per-call counters, poll timings and throttle waits are added to it
         Returns:
             result (Dict): The result of the document analysis
         """
-        for attempt in range(1, max_retry + 1):
+        request_log = request_log if request_log is not None else {}
+        while True:
+            sleep(poller.next_delay(retry_after), "Document Intelligence")
+            poller.record_poll()
             self.logger.debug(
                 json.dumps(
                     {
-                        "fuid": self.fuid,
+                        "fuid": fuid,
                         "type": "document_intelligence",
-                        "message": f"Getting result from Azure Document Intelligence, attempt {attempt}",
+                        "message": f"Getting result from Azure Document Intelligence, attempt {poller.poll_count}",
                     }
                 )
             )
 
-            response = requests.get(
-                result_url, headers={"Ocp-Apim-Subscription-Key": self._api_key}
+            start = time.perf_counter()
+            response = self._send(
+                "GET",
+                result_url,
+                fuid,
+                request_log,
+                stream=self.fields is not None,
+                headers={"Ocp-Apim-Subscription-Key": self._api_key},
             )
-            response.raise_for_status()
-            response = response.json()
+            request_log.setdefault("first_poll_time", time.perf_counter() - start)
+            retry_after = response.headers.get("Retry-After")
+            start = time.perf_counter()
+            if self.fields is None:
+                request_log["response_bytes"] = len(response.content)
+                response = response.json()
+            else:
+                # Parsed while it is downloaded, so the parse time includes the transfer
+                with response:
+                    response.raw.decode_content = True
+                    body = project_analyze_response(response.raw, self.fields)
+                    request_log["response_bytes"] = response.raw.tell()
+                response = body
+            request_log["parse_time"] = request_log.get("parse_time", 0.0) + time.perf_counter() - start
             status = response["status"]
             if status == "succeeded":
+                poller.record_result()
                 return response
             if status == "failed":
                 raise Exception("Document Intelligence failed")
 
-            # If not finished and not failed, wait before next attempt unless this was the last try
-            if attempt == max_retry:
-                break
-            time.sleep(delay_time)
-
-        raise Exception("Max retries reached for Document Intelligence")
-
     def __call__(
         self,
-        document_path: str,
-        max_retry: int = 20,
-        delay_between_retry: int = 1,
-        initial_delay: int = 4,
+        document: DocumentInput,
+        timeout: float = 600,
+        initial_delay: float = 0.25,
+        max_delay: float = 5,
         fuid: str | None = None,
+        pages: Optional[str] = None,
     ) -> HandlerResult:
         """
-        Takes a document path and returns the result of the analysis.
+        Takes a document and returns the result of the analysis.
 
         Functionality:
-        1. Base64 encode the document.
+        0. If a cache is configured and holds a result for this document, return it.
+        1. Open the document, and base64 encode it if `upload_mode` is "base64".
         2. Post the document to the Azure Document Intelligence API.
-        3. Wait `initial_delay` seconds before starting to get the result.
+        3. Wait `Retry-After` seconds if the API sent it, otherwise `initial_delay` seconds.
         4. Get the result from the API.
-        5. If no result yet, wait `delay_between_retry` seconds and retry `max_retry` times.
-        6. If still no result, raise an exception.
-        7. If result is found, return the result.
+        5. If no result yet, wait with exponential backoff and jitter (or `Retry-After`), up to `max_delay` per wait.
+        6. If there is still no result after `timeout` seconds, raise an exception. When the current
+           deadline (`utils.deadline.deadline_scope`) passes, `DeadlineExceeded` is raised to the
+           caller instead of returning a failed result, as it is not a failure of the service.
+        7. If result is found, store it in the cache and return the result.
 
         Args:
-            document_path (str): The path to the document to analyze.
-            max_retry (int): The maximum number of retries to get the result.
-            delay_between_retry (int): The delay between retries in seconds.
-            initial_delay (int): The initial delay before starting to get the result in seconds.
+            document (str | bytes | BinaryIO): The path to the document, its raw bytes
+                (bytes, bytearray or memoryview) or a readable binary file object.
+            timeout (float): The total time in seconds to wait for the result.
+            initial_delay (float): The first delay before getting the result in seconds.
+            max_delay (float): The longest delay between two polls in seconds.
             fuid (str): The file unique identifier for logging.
+            pages (str): Optional page range to analyze, e.g. "1-50". The whole document if omitted.
         Returns:
             HandlerResult: The result of the analysis.
         """
         start_time = time.time()
-        self.fuid = fuid if fuid else str(uuid.uuid4())
+        fuid = fuid if fuid else str(uuid.uuid4())
+
+        cache_log = {}
+        request_log = {}
+        poller = None
 
         try:
-            base64_encoded_doc = self._base64_encode_document(document_path)
-            result_url = self._post_document(base64_encoded_doc)
-            time.sleep(initial_delay)
-            result = self._get_result(
-                result_url=result_url,
-                delay_time=delay_between_retry,
-                max_retry=max_retry,
-            )
+            phase_start = time.perf_counter()
+            with self._document_source(document) as source:
+                request_log["read_time"] = time.perf_counter() - phase_start
+                phase_start = time.perf_counter()
+                cache_key = self._cache_key(source, pages) if self.cache else None
+                result = self.cache.get(cache_key) if self.cache else None
+                if self.cache:
+                    request_log["cache_time"] = time.perf_counter() - phase_start
+                    cache_log = {
+                        "cache": "miss" if result is None else "hit",
+                        **self.cache.stats(),
+                    }
+
+                if result is None:
+                    # The deadline ends polling through the waits and requests, which raise `DeadlineExceeded`
+                    poller = ResultPoller(
+                        timeout=timeout, initial_delay=initial_delay, max_delay=max_delay
+                    )
+                    result_url, retry_after = self._post_document(
+                        source, fuid, pages, request_log=request_log
+                    )
+
+            # The document is closed once uploaded, polling does not need it
+            if result is None:
+                result = self._get_result(
+                    result_url=result_url,
+                    poller=poller,
+                    fuid=fuid,
+                    retry_after=retry_after,
+                    request_log=request_log,
+                )
+                if self.cache:
+                    self._store_in_cache(cache_key, result)
 
             content = result
             success = True
-            log = {"run_time": time.time() - start_time}
+            log = {
+                "run_time": time.time() - start_time,
+                **cache_log,
+                **(poller.stats() if poller else {}),
+                **request_log,
+            }
             error = None
 
+        except DeadlineExceeded:
+            # The caller gave up, it reports the timeout itself
+            self.logger.warning(
+                json.dumps(
+                    {
+                        "fuid": fuid,
+                        "type": "document_intelligence",
+                        "message": "Deadline exceeded, analysis abandoned",
+                        "run_time": time.time() - start_time,
+                    }
+                )
+            )
+            log = {
+                "run_time": time.time() - start_time,
+                "deadline_exceeded": 1,
+                **cache_log,
+                **(poller.stats() if poller else {}),
+                **request_log,
+            }
+            self._record_metrics(log, success=False)
+            raise
         except Exception as e:
             self.logger.error(
                 {
-                    "fuid": self.fuid,
+                    "fuid": fuid,
                     "type": "document_intelligence",
                     "message": "Error with Document Intelligence",
                     "error_message": str(e),
@@ -191,12 +546,199 @@ class DocumentIntelligenceHandler:
             log = {
                 "traceback": traceback.format_exc(),
                 "run_time": time.time() - start_time,
+                **cache_log,
+                **(poller.stats() if poller else {}),
+                **request_log,
             }
 
-        self.fuid = None
+        self._record_metrics(log, success)
         return HandlerResult(
             content=content,
             success=success,
             log=log,
             error=error,
         )
+
+    def _store_in_cache(self, cache_key: str, result: Dict) -> None:
+        """Store a result in the cache, a full disk or unwritable cache directory only costs the next hit."""
+        try:
+            self.cache.set(cache_key, result)
+        except Exception as e:
+            # The analysis succeeded, the cache must not fail it
+            self.logger.warning(
+                json.dumps({"type": "document_intelligence", "message": f"Storing the result in the cache failed: {e}"})
+            )
+
+    def _record_metrics(self, log: Dict, success: bool) -> None:
+        """Send the numeric phase timings and counters of one call to the metrics sink."""
+        if not self.metrics_sink:
+            return
+        tags = {"model_id": self.model_id, "success": str(success).lower()}
+        try:
+            for key in METRIC_LOG_KEYS:
+                if isinstance(log.get(key), (int, float)):
+                    self.metrics_sink.record(f"document_intelligence_{key}", log[key], tags)
+            for key in METRIC_COUNT_KEYS:
+                if isinstance(log.get(key), (int, float)):
+                    self.metrics_sink.increment(f"document_intelligence_{key}", log[key], tags)
+            self.metrics_sink.flush()
+        except Exception as e:
+            # Metrics must never fail an analysis
+            self.logger.warning(
+                json.dumps({"type": "document_intelligence", "message": f"Metrics sink failed: {e}"})
+            )
+
+    @staticmethod
+    def _page_tree_counts(data: Union[bytes, mmap.mmap]) -> List[int]:
+        counts = [
+            int(match.group(1))
+            for match in re.finditer(rb"/Type\s*/Pages\b[^>]*?/Count\s+(\d+)", data)
+        ]
+        counts += [
+            int(match.group(1))
+            for match in re.finditer(rb"/Count\s+(\d+)[^>]*?/Type\s*/Pages\b", data)
+        ]
+        return counts
+
+    @staticmethod
+    def _object_streams(data: Union[bytes, mmap.mmap]) -> Iterator[bytes]:
+        """The decompressed content of the Flate encoded object streams (`/Type /ObjStm`) of a PDF 1.5+."""
+        for match in re.finditer(rb"/Type\s*/ObjStm\b", data):
+            dictionary_start = data.rfind(b"obj", 0, match.start())
+            stream = data.find(b"stream", match.end())
+            if stream < 0 or b"/FlateDecode" not in data[dictionary_start:stream]:
+                continue
+            start = stream + len(b"stream")
+            start += 2 if data[start : start + 2] == b"\r\n" else 1
+            end = data.find(b"endstream", start)
+            if end < 0:
+                continue
+            try:
+                # Trailing end-of-line bytes before `endstream` are ignored by the decompressor
+                yield zlib.decompressobj().decompress(data[start:end], MAX_OBJECT_STREAM_BYTES)
+            except zlib.error:
+                continue
+
+    @classmethod
+    def _count_pdf_pages_in(cls, data: Union[bytes, mmap.mmap]) -> Optional[int]:
+        if data[:5] != b"%PDF-":
+            return None
+        counts = cls._page_tree_counts(data)
+        if not counts and re.search(rb"/Type\s*/ObjStm\b", data):
+            # The page tree of PDF 1.5+ files is often compressed inside object streams
+            counts = [count for content in cls._object_streams(data) for count in cls._page_tree_counts(content)]
+        if counts:
+            return max(counts)
+        return len(re.findall(rb"/Type\s*/Page\b(?!s)", data)) or None
+
+    @classmethod
+    def count_pdf_pages(cls, document: Union[str, os.PathLike, bytes, bytearray, memoryview]) -> Optional[int]:
+        """Estimate the page count of a PDF without a PDF library.
+        Reads the largest `/Count` of the page tree, also inside Flate encoded object streams, falling
+        back to counting `/Type /Page` objects. Encrypted PDFs and page trees in object streams with
+        other filters cannot be read this way, their page count is None.
+        Args:
+            document (str | bytes): The path to the document or its raw bytes
+        Returns:
+            page_count (int | None): The page count, None if the file is not a PDF or it cannot be told
+        """
+        if not isinstance(document, (str, os.PathLike)):
+            return cls._count_pdf_pages_in(document)
+        if not os.path.getsize(document):
+            return None
+        with open(document, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return cls._count_pdf_pages_in(data)
+
+    @staticmethod
+    def page_ranges(page_count: int, pages_per_job: int) -> List[Tuple[int, int]]:
+        """Split `page_count` pages into consecutive (first, last) ranges of at most `pages_per_job` pages."""
+        return [
+            (first, min(first + pages_per_job - 1, page_count))
+            for first in range(1, page_count + 1, pages_per_job)
+        ]
+
+    def analyze_split(
+        self,
+        document: DocumentInput,
+        pages_per_job: int = 50,
+        page_count: Optional[int] = None,
+        max_workers: int = 4,
+        fuid: str | None = None,
+        **kwargs,
+    ) -> HandlerResult:
+        """
+        Analyze a long document as concurrent page-range jobs and merge them into one result.
+        The merged `analyzeResult` has the same shape as a single-job result: content is concatenated,
+        span offsets, page numbers and section pointers are fixed up (see `merge_analyze_results`).
+        Documents of at most `pages_per_job` pages, or whose page count is unknown, go through `__call__`.
+        The page count is estimated by `count_pdf_pages`; where it cannot tell, e.g. for encrypted
+        PDFs, the document is analyzed as one job and a warning is logged.
+
+        Args:
+            document (str | bytes | BinaryIO): The path to the document, its raw bytes or a binary
+                file object. File objects are read into memory once, so every job can upload them.
+            pages_per_job (int): The number of pages analyzed by each job.
+            page_count (int): The page count of the document. Estimated for PDFs if omitted.
+            max_workers (int): The maximum number of jobs in flight at the same time.
+            fuid (str): The file unique identifier for logging.
+            **kwargs: Passed on to `__call__` (timeout, initial_delay, max_delay).
+        Returns:
+            HandlerResult: The merged result of the analysis.
+        """
+        start_time = time.time()
+        fuid = fuid if fuid else str(uuid.uuid4())
+
+        if not isinstance(document, (str, os.PathLike, bytes, bytearray, memoryview)):
+            document = document.read()
+        if page_count is None and (not isinstance(document, (str, os.PathLike)) or os.path.exists(document)):
+            page_count = self.count_pdf_pages(document)
+            if page_count is None:
+                self.logger.warning(
+                    json.dumps(
+                        {
+                            "fuid": fuid,
+                            "type": "document_intelligence",
+                            "message": "Page count unknown (not a PDF, encrypted or an unreadable page tree), "
+                            "analyzing the document as one job",
+                        }
+                    )
+                )
+        if not page_count or page_count <= pages_per_job:
+            return self(document, fuid=fuid, **kwargs)
+
+        ranges = self.page_ranges(page_count, pages_per_job)
+        context = copy_context()
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(
+                pool.map(
+                    # Every job in a copy of the caller's context, so it keeps the caller's deadline
+                    lambda job: context.copy().run(
+                        self,
+                        document,
+                        fuid=f"{fuid}-{job[0]}",
+                        pages=f"{job[1][0]}-{job[1][1]}",
+                        **kwargs,
+                    ),
+                    enumerate(ranges),
+                )
+            )
+
+        log = {
+            "run_time": time.time() - start_time,
+            "page_ranges": [f"{first}-{last}" for first, last in ranges],
+            "jobs": [result.log for result in results],
+        }
+        failed = [result for result in results if not result.success]
+        if failed:
+            return HandlerResult(content=None, success=False, log=log, error=failed[0].error)
+
+        analyze_result = merge_analyze_results(
+            [result.content.get("analyzeResult", {}) for result in results],
+            first_pages=[first for first, _ in ranges],
+        )
+        return HandlerResult(
+            content={"status": "succeeded", "analyzeResult": analyze_result},
+            success=True,
+            log=log,
+        )
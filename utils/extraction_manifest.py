@@ -0,0 +1,208 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+from azure.storage.blob import BlobProperties, ContainerClient, ContentSettings
+
+
+def blob_fingerprint(properties: BlobProperties) -> Dict:
+    """
+    What identifies a version of a blob, taken from its properties or a listing entry.
+
+    Args:
+        properties (BlobProperties): From `get_blob_properties` or `list_blobs`.
+    Returns:
+        fingerprint (Dict): `etag`, `last_modified` (ISO 8601), `size` and `content_md5` (hex, None if the
+            service has none, e.g. for blobs uploaded as block lists).
+    """
+    content_md5 = properties.content_settings.content_md5 if properties.content_settings else None
+    return {
+        "etag": properties.etag,
+        "last_modified": properties.last_modified.isoformat() if properties.last_modified else None,
+        "size": properties.size,
+        "content_md5": bytes(content_md5).hex() if content_md5 else None,
+    }
+
+
+class ExtractionManifest:
+    logger = logging.getLogger("neuron_public")
+
+    def __init__(self, path: str):
+        """
+        Record of which version of every submission was extracted with which options, and where
+        its extraction artifact is, so unchanged submissions can be skipped on the next run.
+        Stored as one JSON file mapping the submission name to its entry. This class keeps it on
+        the local disk, `BlobExtractionManifest` in the results container.
+
+        Args:
+            path (str): The JSON file of the manifest. Created on the first `record`.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict]] = None
+        # Recorded entries not persisted yet
+        self._pending: Dict[str, Dict] = {}
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def _store(self, entries: Dict[str, Dict], updates: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Persist the manifest with `updates` applied and return the stored entries."""
+        entries = {**entries, **updates}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(entries, file, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        return entries
+
+    @property
+    def entries(self) -> Dict[str, Dict]:
+        """All entries, loaded once and kept in memory."""
+        with self._lock:
+            return self._loaded()
+
+    def _loaded(self) -> Dict[str, Dict]:
+        # Callers hold the lock
+        if self._entries is None:
+            self._entries = self._load()
+        return self._entries
+
+    def get(self, name: str) -> Optional[Dict]:
+        return self.entries.get(name)
+
+    @staticmethod
+    def is_unchanged(entry: Optional[Dict], fingerprint: Dict, options: Optional[Dict] = None) -> bool:
+        """
+        Whether `entry` was extracted from the blob version `fingerprint` describes with the same `options`.
+        Equal ETags mean the blob was not written since. A new ETag with the same Content-MD5 and size is a
+        re-upload of identical content.
+
+        Args:
+            entry (Dict): The manifest entry of the submission, None if it was never extracted.
+            fingerprint (Dict): The current `blob_fingerprint` of the submission.
+            options (Dict): The extraction options that change the artifact, e.g. `fill_spans`.
+        Returns:
+            unchanged (bool): True if the existing artifact can be reused.
+        """
+        if not entry or entry.get("options", {}) != (options or {}):
+            return False
+        if entry.get("etag") == fingerprint["etag"]:
+            return True
+        return bool(fingerprint["content_md5"]) and (
+            entry.get("content_md5") == fingerprint["content_md5"] and entry.get("size") == fingerprint["size"]
+        )
+
+    def record(
+        self,
+        name: str,
+        fingerprint: Dict,
+        result_blob: str,
+        options: Optional[Dict] = None,
+        sha256: Optional[str] = None,
+        flush: bool = True,
+    ) -> Dict:
+        """
+        Store the entry of a freshly extracted submission.
+
+        Args:
+            name (str): The submission blob name.
+            fingerprint (Dict): The `blob_fingerprint` of the version that was extracted.
+            result_blob (str): Path of the extraction artifact, `<container>/<name>.extracted.json`.
+            options (Dict): The extraction options that change the artifact.
+            sha256 (str): SHA-256 of the submission if it was downloaded, to recognise identical
+                content under a new ETag when the blob has no Content-MD5.
+            flush (bool): Persist the manifest right away. Batches record with False and `flush` once.
+        Returns:
+            entry (Dict): The stored entry.
+        """
+        entry = {
+            **fingerprint,
+            "sha256": sha256,
+            "options": options or {},
+            "result_blob": result_blob,
+            "extracted_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        with self._lock:
+            self._loaded()[name] = entry
+            self._pending[name] = entry
+        if flush:
+            self.flush()
+        return entry
+
+    def flush(self) -> None:
+        """Persist the entries recorded since the last flush."""
+        with self._lock:
+            if not self._pending:
+                return
+            self._entries = self._store(self._loaded(), self._pending)
+            self.logger.debug(
+                json.dumps(
+                    {"type": "extraction_manifest", "message": f"Stored {len(self._pending)} entries in {self.path}"}
+                )
+            )
+            self._pending = {}
+
+
+class BlobExtractionManifest(ExtractionManifest):
+    def __init__(self, container_client: ContainerClient, blob_name: str = "extraction_manifest.json"):
+        """
+        `ExtractionManifest` stored as a blob, e.g. next to the artifacts in the results container.
+        Writes are conditional on the ETag of the manifest that was read, so concurrent runs do not
+        drop each other's entries: on a conflict the manifest is re-read and the update applied again.
+
+        Args:
+            container_client (ContainerClient): The container holding the manifest.
+            blob_name (str): Name of the manifest blob.
+        """
+        super().__init__(f"{container_client.container_name}/{blob_name}")
+        self._blob_client = container_client.get_blob_client(blob_name)
+        self._etag: Optional[str] = None
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            downloader = self._blob_client.download_blob()
+        except ResourceNotFoundError:
+            self._etag = None
+            return {}
+        self._etag = downloader.properties.etag
+        return json.loads(downloader.readall() or b"{}")
+
+    def _store(self, entries: Dict[str, Dict], updates: Dict[str, Dict], max_attempts: int = 5) -> Dict[str, Dict]:
+        for _ in range(max_attempts):
+            merged = {**entries, **updates}
+            data = json.dumps(merged, indent=2, sort_keys=True).encode("utf-8")
+            content_settings = ContentSettings(content_type="application/json")
+            try:
+                if self._etag is None:
+                    # Only create it, another run may have written it since it was found missing
+                    result = self._blob_client.upload_blob(
+                        data, overwrite=False, content_settings=content_settings
+                    )
+                else:
+                    result = self._blob_client.upload_blob(
+                        data,
+                        overwrite=True,
+                        content_settings=content_settings,
+                        etag=self._etag,
+                        match_condition=MatchConditions.IfNotModified,
+                    )
+            except (ResourceExistsError, ResourceModifiedError):
+                self.logger.debug(
+                    json.dumps({"type": "extraction_manifest", "message": f"Write conflict on {self.path}, re-reading"})
+                )
+                entries = self._load()
+                continue
+            self._etag = result["etag"]
+            return merged
+        raise RuntimeError(f"Could not update {self.path} after {max_attempts} conflicting writes")
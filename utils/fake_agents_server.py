@@ -0,0 +1,435 @@
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler
+from typing import Any, Callable, Dict, List, Optional, Union
+from urllib.parse import parse_qs, urlparse
+
+from .fake_document_intelligence_server import _QuietHTTPServer
+
+# A scripted run: every step either asks for tool calls or ends the run with a message, e.g.
+# [{"tool_calls": [{"name": "list_rfi_blobs", "arguments": {}}]}, {"message": "Done"}]. A step can
+# also be a function of the outputs submitted for the previous step, to act on what the tools returned.
+# A step dict with "time" takes that many seconds instead of `step_time`, e.g. a long final answer
+Script = List[Union[Dict[str, Any], Callable[[List[str]], Dict[str, Any]]]]
+
+ACTIVE_STATUSES = ("queued", "in_progress", "requires_action", "cancelling")
+
+
+def _now() -> int:
+    return int(time.time())
+
+
+def _id(prefix: str) -> str:
+    return f"{prefix}_{uuid.uuid4().hex[:24]}"
+
+
+def _message_text(content: Any) -> str:
+    """The text of a message as posted, a string or a list of content blocks."""
+    if isinstance(content, str):
+        return content
+    return "\n".join(block.get("text", "") for block in content or [] if isinstance(block, dict))
+
+
+class FakeAgentsServer:
+    def __init__(
+        self,
+        script: Union[Script, Callable[[str], Script]],
+        step_time: float = 0.5,
+        latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Local stand-in for the Azure AI Agents API, for tests and benchmarks. The agent is replaced by
+        a script: a run waits `step_time` seconds, like the model generating, then asks for the tool
+        calls of its next step (`requires_action`) or posts the step's message and completes. Tool
+        outputs are recorded in `tool_outputs`. Runs can be polled or streamed as server-sent events,
+        like the service, so `AgentsClient` and `AIProjectClient(...).agents` work against it unchanged.
+        Supports threads, messages, runs (create, stream, get, submit tool outputs, cancel) and agents.
+
+        Usage:
+            with FakeAgentsServer([{"tool_calls": [...]}, {"message": "Done"}], step_time=0.2) as server:
+                agents = server.agents_client()
+
+        Args:
+            script (Script): The steps of every run, or a function returning them for the text of the
+                thread's last user message, e.g. to ask for the submission named in it.
+            step_time (float): Seconds before a run reaches its next step, after it was created or got
+                its tool outputs, unless the step has its own "time".
+            latency (float): Seconds every request takes before it is answered, like a network round trip.
+            host (str): Interface to bind to.
+            port (int): Port to bind to, 0 picks a free one.
+        """
+        self.script = script
+        self.step_time = step_time
+        self.latency = latency
+        self.threads: Dict[str, Dict] = {}
+        self.runs: Dict[str, Dict] = {}
+        self.agents: Dict[str, Dict] = {}
+        self.tool_outputs: List[Dict] = []
+        self.request_counts = {
+            "create_run": 0, "stream_run": 0, "get_run": 0, "submit_tool_outputs": 0, "list_messages": 0, "other": 0,
+        }
+        self._lock = threading.Lock()
+        self._server = _QuietHTTPServer((host, port), self._make_request_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint(self) -> str:
+        """The project endpoint, as in PROJECT_ENDPOINT."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/projects/fake"
+
+    @property
+    def client_kwargs(self) -> Dict:
+        """Arguments for `AgentsClient` or `AIProjectClient`: any credential, without the HTTPS-only bearer token policy."""
+        from azure.core.credentials import AccessToken
+        from azure.core.pipeline.policies import SansIOHTTPPolicy
+
+        class FakeCredential:
+            def get_token(self, *scopes, **kwargs):
+                return AccessToken("fake-token", _now() + 3600)
+
+        return {"endpoint": self.endpoint, "credential": FakeCredential(), "authentication_policy": SansIOHTTPPolicy()}
+
+    def agents_client(self):
+        from azure.ai.agents import AgentsClient
+
+        return AgentsClient(**self.client_kwargs)
+
+    def start(self) -> "FakeAgentsServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeAgentsServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # State, callers hold the lock
+
+    def _new_thread(self) -> Dict:
+        thread = {"id": _id("thread"), "object": "thread", "created_at": _now(), "metadata": {}, "messages": []}
+        self.threads[thread["id"]] = thread
+        return thread
+
+    def _add_message(self, thread_id: str, role: str, text: str, run_id: Optional[str] = None) -> Dict:
+        thread = self.threads[thread_id]
+        message = {
+            "id": _id("msg"),
+            "object": "thread.message",
+            "created_at": _now(),
+            "thread_id": thread_id,
+            "status": "completed",
+            "role": role,
+            "content": [{"type": "text", "text": {"value": text, "annotations": []}}],
+            "attachments": [],
+            "metadata": {},
+            "assistant_id": thread.get("agent_id") if role == "assistant" else None,
+            "run_id": run_id,
+        }
+        thread["messages"].append(message)
+        return message
+
+    def _new_run(self, thread_id: str, agent_id: str) -> Dict:
+        thread = self.threads[thread_id]
+        thread["agent_id"] = agent_id
+        last_user_text = next(
+            (m["content"][0]["text"]["value"] for m in reversed(thread["messages"]) if m["role"] == "user"), ""
+        )
+        script = self.script(last_user_text) if callable(self.script) else self.script
+        run = {
+            "id": _id("run"),
+            "thread_id": thread_id,
+            "agent_id": agent_id,
+            "status": "queued",
+            "created_at": _now(),
+            "steps": list(script),
+            "step": 0,
+            "ready_at": 0.0,
+            "tool_calls": [],
+            "outputs": [],
+        }
+        run["ready_at"] = time.time() + self._step_time(run)
+        self.runs[run["id"]] = run
+        return run
+
+    def _step_time(self, run: Dict) -> float:
+        """Seconds until the run's next step, its own "time" if it is a dict that has one."""
+        step = run["steps"][run["step"]] if run["step"] < len(run["steps"]) else None
+        return step.get("time", self.step_time) if isinstance(step, dict) else self.step_time
+
+    def _advance(self, run: Dict) -> List[Dict]:
+        """Move the run to its next step if it is due, returns the messages it posted."""
+        if run["status"] not in ("queued", "in_progress") or time.time() < run["ready_at"]:
+            if run["status"] == "queued":
+                run["status"] = "in_progress"
+            return []
+        step = run["steps"][run["step"]] if run["step"] < len(run["steps"]) else {"message": "Done."}
+        run["step"] += 1
+        if callable(step):
+            step = step(run["outputs"])
+        if step.get("tool_calls"):
+            run["tool_calls"] = [
+                {
+                    "id": _id("call"),
+                    "type": "function",
+                    "function": {"name": call["name"], "arguments": json.dumps(call.get("arguments", {}))},
+                }
+                for call in step["tool_calls"]
+            ]
+            run["status"] = "requires_action"
+            return []
+        run["status"] = "completed"
+        run["completed_at"] = _now()
+        return [self._add_message(run["thread_id"], "assistant", step.get("message", ""), run_id=run["id"])]
+
+    def _submit(self, run: Dict, tool_outputs: List[Dict]) -> Optional[str]:
+        """Record the outputs of the pending tool calls, returns an error message if they do not match."""
+        if run["status"] != "requires_action":
+            return f"Run {run['id']} is {run['status']}, not requires_action"
+        expected = {call["id"] for call in run["tool_calls"]}
+        submitted = {output.get("tool_call_id") for output in tool_outputs}
+        if submitted != expected:
+            return f"Expected outputs for {sorted(expected)}, got {sorted(submitted)}"
+        calls = {call["id"]: call for call in run["tool_calls"]}
+        # In the order of the calls, as the next step reads them
+        order = {call["id"]: index for index, call in enumerate(run["tool_calls"])}
+        run["outputs"] = [
+            output.get("output") for output in sorted(tool_outputs, key=lambda output: order[output["tool_call_id"]])
+        ]
+        for output in tool_outputs:
+            call = calls[output["tool_call_id"]]
+            self.tool_outputs.append(
+                {"run_id": run["id"], "tool_call_id": call["id"], "name": call["function"]["name"], "output": output.get("output")}
+            )
+        run["tool_calls"] = []
+        run["status"] = "in_progress"
+        run["ready_at"] = time.time() + self._step_time(run)
+        return None
+
+    @staticmethod
+    def _run_json(run: Dict) -> Dict:
+        body = {
+            "id": run["id"],
+            "object": "thread.run",
+            "thread_id": run["thread_id"],
+            "assistant_id": run["agent_id"],
+            "status": run["status"],
+            "required_action": None,
+            "last_error": None,
+            "model": "fake",
+            "instructions": "",
+            "tools": [],
+            "created_at": run["created_at"],
+            "completed_at": run.get("completed_at"),
+            "metadata": {},
+            "parallel_tool_calls": True,
+        }
+        if run["status"] == "requires_action":
+            body["required_action"] = {
+                "type": "submit_tool_outputs",
+                "submit_tool_outputs": {"tool_calls": run["tool_calls"]},
+            }
+        return body
+
+    def _make_request_handler(self):
+        fake = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, body: Dict):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _not_found(self, what: str = "Resource"):
+                self._send_json(404, {"error": {"code": "NotFound", "message": f"{what} not found"}})
+
+            def _body(self) -> Dict:
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def _route(self):
+                path = urlparse(self.path).path
+                match = re.search(r"/(threads|assistants)(/.*)?$", path)
+                return (match.group(1), [part for part in (match.group(2) or "").split("/") if part]) if match else (None, [])
+
+            def _count(self, name: str):
+                with fake._lock:
+                    fake.request_counts[name] += 1
+
+            def _stream(self, run: Dict, created: bool):
+                """Server-sent events of the run until it requires action or ends, like the service."""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                def send(event: str, data: Any):
+                    self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                with fake._lock:
+                    if created:
+                        send("thread.run.created", fake._run_json(run))
+                    fake._advance(run)
+                    send(f"thread.run.{run['status']}", fake._run_json(run))
+                while True:
+                    with fake._lock:
+                        messages = fake._advance(run)
+                        status = run["status"]
+                        wait = run["ready_at"] - time.time()
+                    if status not in ("queued", "in_progress"):
+                        break
+                    # Wakes up in between to see a cancelled run
+                    time.sleep(min(max(wait, 0.001), 0.1))
+                with fake._lock:
+                    for message in messages:
+                        send("thread.message.created", message)
+                        send("thread.message.completed", message)
+                    send(f"thread.run.{status}", fake._run_json(run))
+                self.wfile.write(b"event: done\ndata: [DONE]\n\n")
+                self.wfile.flush()
+
+            def do_POST(self):
+                time.sleep(fake.latency)
+                body = self._body()
+                collection, parts = self._route()
+                if collection == "assistants" and not parts:
+                    self._count("other")
+                    agent = {"id": _id("asst"), "object": "assistant", "created_at": _now(), "tools": [], "metadata": {}, **body}
+                    with fake._lock:
+                        fake.agents[agent["id"]] = agent
+                    self._send_json(200, agent)
+                    return
+                if collection != "threads":
+                    self._not_found()
+                    return
+                if not parts:
+                    self._count("other")
+                    with fake._lock:
+                        thread = fake._new_thread()
+                    self._send_json(200, {key: value for key, value in thread.items() if key != "messages"})
+                    return
+                with fake._lock:
+                    thread = fake.threads.get(parts[0])
+                if thread is None:
+                    self._not_found("Thread")
+                    return
+                if parts[1:] == ["messages"]:
+                    self._count("other")
+                    with fake._lock:
+                        message = fake._add_message(thread["id"], body.get("role", "user"), _message_text(body.get("content")))
+                    self._send_json(200, message)
+                    return
+                if parts[1:] == ["runs"]:
+                    self._count("stream_run" if body.get("stream") else "create_run")
+                    with fake._lock:
+                        run = fake._new_run(thread["id"], body.get("assistant_id") or body.get("agent_id"))
+                    if body.get("stream"):
+                        self._stream(run, created=True)
+                    else:
+                        with fake._lock:
+                            self._send_json(200, fake._run_json(run))
+                    return
+                with fake._lock:
+                    run = fake.runs.get(parts[2]) if len(parts) == 4 and parts[1] == "runs" else None
+                if run is None:
+                    self._not_found("Run")
+                    return
+                if parts[3] == "submit_tool_outputs":
+                    self._count("submit_tool_outputs")
+                    with fake._lock:
+                        error = fake._submit(run, body.get("tool_outputs") or [])
+                    if error:
+                        self._send_json(400, {"error": {"code": "invalid_request", "message": error}})
+                    elif body.get("stream"):
+                        self._stream(run, created=False)
+                    else:
+                        with fake._lock:
+                            self._send_json(200, fake._run_json(run))
+                    return
+                if parts[3] == "cancel":
+                    self._count("other")
+                    with fake._lock:
+                        if run["status"] in ACTIVE_STATUSES:
+                            run["status"] = "cancelled"
+                        self._send_json(200, fake._run_json(run))
+                    return
+                self._not_found()
+
+            def do_GET(self):
+                time.sleep(fake.latency)
+                collection, parts = self._route()
+                if collection == "assistants" and len(parts) == 1:
+                    self._count("other")
+                    with fake._lock:
+                        agent = fake.agents.get(parts[0]) or {"id": parts[0], "object": "assistant", "created_at": _now(), "model": "fake", "tools": [], "metadata": {}}
+                    self._send_json(200, agent)
+                    return
+                with fake._lock:
+                    thread = fake.threads.get(parts[0]) if collection == "threads" and parts else None
+                if thread is None:
+                    self._not_found("Thread")
+                    return
+                if parts[1:] == ["messages"]:
+                    self._count("list_messages")
+                    query = parse_qs(urlparse(self.path).query)
+                    limit = int(query.get("limit", ["20"])[0])
+                    with fake._lock:
+                        messages = list(thread["messages"])
+                    if query.get("order", ["desc"])[0] == "desc":
+                        messages.reverse()
+                    # Pages continue after the last id of the previous one, the client stops at a null last_id
+                    if "after" in query:
+                        ids = [message["id"] for message in messages]
+                        after = query["after"][0]
+                        messages = messages[ids.index(after) + 1:] if after in ids else []
+                    page = messages[:limit]
+                    self._send_json(
+                        200,
+                        {
+                            "object": "list",
+                            "data": page,
+                            "first_id": page[0]["id"] if page else None,
+                            "last_id": page[-1]["id"] if page else None,
+                            "has_more": len(messages) > limit,
+                        },
+                    )
+                    return
+                if len(parts) == 3 and parts[1] == "runs":
+                    self._count("get_run")
+                    with fake._lock:
+                        run = fake.runs.get(parts[2])
+                        if run is not None:
+                            fake._advance(run)
+                            body = fake._run_json(run)
+                    if run is None:
+                        self._not_found("Run")
+                    else:
+                        self._send_json(200, body)
+                    return
+                self._not_found()
+
+        return RequestHandler
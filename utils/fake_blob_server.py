@@ -0,0 +1,294 @@
+import base64
+import hashlib
+import re
+import threading
+import time
+import uuid
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+from .fake_document_intelligence_server import _QuietHTTPServer
+
+# Account name and key of the Azurite storage emulator, the key is not checked
+ACCOUNT_NAME = "devstoreaccount1"
+ACCOUNT_KEY = "Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw=="
+
+
+def _md5(data: bytes) -> str:
+    return base64.b64encode(hashlib.md5(data).digest()).decode("ascii")
+
+
+class _Blob:
+    __slots__ = ("data", "content_type", "content_encoding", "content_md5", "etag", "last_modified")
+
+    def __init__(self, data: bytes, content_type: str, content_encoding: Optional[str], content_md5: Optional[str] = None):
+        self.data = data
+        self.content_type = content_type
+        self.content_encoding = content_encoding
+        # Base64 MD5, which the service only computes for single put uploads
+        self.content_md5 = content_md5
+        self.etag = f'"0x{uuid.uuid4().hex[:15].upper()}"'
+        self.last_modified = formatdate(time.time(), usegmt=True)
+
+
+class FakeBlobServer:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        bandwidth: Optional[float] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Local, Azurite-style stand-in for Azure Blob Storage, for tests and benchmarks.
+        Supports creating containers, uploading blobs (single put and block lists), ranged downloads,
+        blob properties and paged listing, which is what `azure-storage-blob` needs for the tools.
+        Requests are not authenticated.
+
+        Usage:
+            with FakeBlobServer(latency=0.02) as server:
+                os.environ["AZURE_STORAGE_CONNECTION_STRING"] = server.connection_string
+
+        Args:
+            latency (float): Seconds every request takes before it is answered, like a network round trip.
+            bandwidth (float): If set, bytes per second a single response body is sent with.
+            host (str): Interface to bind to.
+            port (int): Port to bind to, 0 picks a free one.
+        """
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.containers: Dict[str, Dict[str, _Blob]] = {}
+        self.request_counts = {"get": 0, "put": 0, "head": 0, "list": 0}
+        self._blocks: Dict[Tuple[str, str, str], bytes] = {}
+        self._lock = threading.Lock()
+        self._server = _QuietHTTPServer((host, port), self._make_request_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def account_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/{ACCOUNT_NAME}"
+
+    @property
+    def connection_string(self) -> str:
+        return (
+            f"DefaultEndpointsProtocol=http;AccountName={ACCOUNT_NAME};"
+            f"AccountKey={ACCOUNT_KEY};BlobEndpoint={self.account_url};"
+        )
+
+    def put_blob(self, container: str, name: str, data: bytes, content_type: str = "application/octet-stream") -> None:
+        """Store a blob directly, creating the container if needed."""
+        with self._lock:
+            self.containers.setdefault(container, {})[name] = _Blob(data, content_type, None, _md5(data))
+
+    def start(self) -> "FakeBlobServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeBlobServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _make_request_handler(self):
+        fake = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _parse(self):
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                parts = unquote(url.path).lstrip("/").split("/", 2)
+                container = parts[1] if len(parts) > 1 else ""
+                blob = parts[2] if len(parts) > 2 else ""
+                return container, blob, query
+
+            def _send(self, status: int, body: bytes = b"", headers: Optional[Dict] = None):
+                self.send_response(status)
+                self.send_header("x-ms-request-id", str(uuid.uuid4()))
+                self.send_header("x-ms-version", self.headers.get("x-ms-version", "2025-01-05"))
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                if self.command == "HEAD" or not body:
+                    return
+                if not fake.bandwidth:
+                    self.wfile.write(body)
+                    return
+                # Paced in slices so large bodies take as long as on a slower link
+                start, step = time.perf_counter(), 64 * 1024
+                for offset in range(0, len(body), step):
+                    self.wfile.write(body[offset : offset + step])
+                    delay = start + (offset + step) / fake.bandwidth - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
+            def _send_error(self, status: int, code: str):
+                body = f'<?xml version="1.0" encoding="utf-8"?><Error><Code>{code}</Code><Message>{code}</Message></Error>'
+                self._send(status, body.encode("utf-8"), {"Content-Type": "application/xml", "x-ms-error-code": code})
+
+            def _blob_headers(self, blob: _Blob) -> Dict:
+                headers = {
+                    "ETag": blob.etag,
+                    "Last-Modified": blob.last_modified,
+                    "Content-Type": blob.content_type,
+                    "x-ms-blob-type": "BlockBlob",
+                    "Accept-Ranges": "bytes",
+                }
+                if blob.content_encoding:
+                    headers["Content-Encoding"] = blob.content_encoding
+                if blob.content_md5:
+                    headers["Content-MD5"] = blob.content_md5
+                return headers
+
+            def _read_body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+            def do_PUT(self):
+                time.sleep(fake.latency)
+                container, name, query = self._parse()
+                body = self._read_body()
+                with fake._lock:
+                    fake.request_counts["put"] += 1
+                    if query.get("restype") == "container":
+                        if container in fake.containers:
+                            self._send_error(409, "ContainerAlreadyExists")
+                        else:
+                            fake.containers[container] = {}
+                            self._send(201, headers={"ETag": '"0x1"', "Last-Modified": formatdate(usegmt=True)})
+                        return
+                    if container not in fake.containers:
+                        self._send_error(404, "ContainerNotFound")
+                        return
+                    if query.get("comp") == "block":
+                        fake._blocks[(container, name, query["blockid"])] = body
+                        self._send(201)
+                        return
+                    existing = fake.containers[container].get(name)
+                    if_match, if_none_match = self.headers.get("If-Match"), self.headers.get("If-None-Match")
+                    if if_none_match == "*" and existing is not None:
+                        self._send_error(409, "BlobAlreadyExists")
+                        return
+                    if if_match and (existing is None or if_match not in ("*", existing.etag)):
+                        self._send_error(412, "ConditionNotMet")
+                        return
+                    content_md5 = None
+                    if query.get("comp") == "blocklist":
+                        block_ids = [element.text for element in ElementTree.fromstring(body)]
+                        body = b"".join(fake._blocks.pop((container, name, block_id)) for block_id in block_ids)
+                    else:
+                        content_md5 = _md5(body)
+                    blob = _Blob(
+                        body,
+                        self.headers.get("x-ms-blob-content-type") or "application/octet-stream",
+                        self.headers.get("x-ms-blob-content-encoding"),
+                        content_md5,
+                    )
+                    fake.containers[container][name] = blob
+                self._send(
+                    201,
+                    headers={
+                        "ETag": blob.etag,
+                        "Last-Modified": blob.last_modified,
+                        "Content-MD5": blob.content_md5 or "",
+                        "x-ms-request-server-encrypted": "false",
+                    },
+                )
+
+            def do_HEAD(self):
+                time.sleep(fake.latency)
+                container, name, _ = self._parse()
+                with fake._lock:
+                    fake.request_counts["head"] += 1
+                    blob = fake.containers.get(container, {}).get(name)
+                if blob is None:
+                    self._send_error(404, "BlobNotFound")
+                    return
+                self.send_response(200)
+                for key, value in {**self._blob_headers(blob), "Content-Length": str(len(blob.data))}.items():
+                    self.send_header(key, value)
+                self.end_headers()
+
+            def do_GET(self):
+                time.sleep(fake.latency)
+                container, name, query = self._parse()
+                if query.get("comp") == "list":
+                    self._list(container, query)
+                    return
+                with fake._lock:
+                    fake.request_counts["get"] += 1
+                    blob = fake.containers.get(container, {}).get(name)
+                if blob is None:
+                    self._send_error(404, "BlobNotFound")
+                    return
+
+                size = len(blob.data)
+                match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("x-ms-range") or self.headers.get("Range") or "")
+                if not match:
+                    self._send(200, blob.data, self._blob_headers(blob))
+                    return
+                start = int(match.group(1))
+                if start >= size:
+                    self._send_error(416, "InvalidRange")
+                    return
+                end = min(int(match.group(2)) if match.group(2) else size - 1, size - 1)
+                headers = {**self._blob_headers(blob), "Content-Range": f"bytes {start}-{end}/{size}"}
+                # Ranged reads carry the MD5 of the whole blob separately, Content-MD5 only for the range if asked
+                if headers.pop("Content-MD5", None):
+                    headers["x-ms-blob-content-md5"] = blob.content_md5
+                if self.headers.get("x-ms-range-get-content-md5") == "true":
+                    headers["Content-MD5"] = _md5(blob.data[start : end + 1])
+                self._send(206, blob.data[start : end + 1], headers)
+
+            def _list(self, container: str, query: Dict):
+                with fake._lock:
+                    fake.request_counts["list"] += 1
+                    if container not in fake.containers:
+                        self._send_error(404, "ContainerNotFound")
+                        return
+                    prefix = query.get("prefix", "")
+                    names = sorted(name for name in fake.containers[container] if name.startswith(prefix))
+                    names = [name for name in names if name > query.get("marker", "")]
+                    page_size = int(query.get("maxresults") or 5000)
+                    page, rest = names[:page_size], names[page_size:]
+                    blobs = "".join(
+                        "<Blob><Name>{}</Name><Properties><Last-Modified>{}</Last-Modified><Etag>{}</Etag>"
+                        "<Content-Length>{}</Content-Length><Content-Type>{}</Content-Type><Content-MD5>{}</Content-MD5>"
+                        "<BlobType>BlockBlob</BlobType></Properties></Blob>".format(
+                            escape(name),
+                            blob.last_modified,
+                            blob.etag,
+                            len(blob.data),
+                            blob.content_type,
+                            blob.content_md5 or "",
+                        )
+                        for name, blob in ((name, fake.containers[container][name]) for name in page)
+                    )
+                next_marker = escape(page[-1]) if rest else ""
+                body = (
+                    '<?xml version="1.0" encoding="utf-8"?>'
+                    f'<EnumerationResults ServiceEndpoint="{fake.account_url}/" ContainerName="{escape(container)}">'
+                    f"<Prefix>{escape(prefix)}</Prefix><MaxResults>{page_size}</MaxResults>"
+                    f"<Blobs>{blobs}</Blobs><NextMarker>{next_marker}</NextMarker></EnumerationResults>"
+                )
+                self._send(200, body.encode("utf-8"), {"Content-Type": "application/xml"})
+
+        return RequestHandler
@@ -0,0 +1,222 @@
+import base64
+import json
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Clients closing pooled keep-alive connections is expected, not an error
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class FakeDocumentIntelligenceServer:
+    def __init__(
+        self,
+        processing_time: float = 0.5,
+        post_latency: float = 0.0,
+        retry_after: Optional[float] = None,
+        max_posts_per_second: Optional[float] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Local stand-in for the Azure Document Intelligence analyze API, for tests and benchmarks.
+        It accepts `POST .../{model_type}/{model_id}:analyze` and answers `GET` on the returned
+        `Operation-Location` with `running` until `processing_time` has passed, then `succeeded`.
+
+        Usage:
+            with FakeDocumentIntelligenceServer(processing_time=0.2) as server:
+                os.environ["DOCUMENT_INTELLIGENCE_ENDPOINT"] = server.endpoint
+
+        Args:
+            processing_time (float): Seconds an analysis stays `running` after it was posted.
+            post_latency (float): Seconds every POST takes before it is answered.
+            retry_after (float): If set, sent as `Retry-After` on the POST and on `running` responses.
+            max_posts_per_second (float): If set, POSTs above this rate are answered with 429.
+            host (str): Interface to bind to.
+            port (int): Port to bind to, 0 picks a free one.
+        """
+        self.processing_time = processing_time
+        self.post_latency = post_latency
+        self.retry_after = retry_after
+        self.max_posts_per_second = max_posts_per_second
+        self._post_times = []
+        self.operations: Dict[str, Dict] = {}
+        self.request_counts = {"post": 0, "get": 0, "throttled": 0}
+        self._lock = threading.Lock()
+        self._server = _QuietHTTPServer((host, port), self._make_request_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeDocumentIntelligenceServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeDocumentIntelligenceServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def analyze_result(self, document: bytes, pages: Optional[str] = None) -> Dict:
+        """The `analyzeResult` returned for a document. Override to script other results.
+        Args:
+            document (bytes): The posted document
+            pages (str): The requested page range, e.g. "3-4"
+        """
+        if not pages:
+            return {
+                "apiVersion": "2024-11-30",
+                "content": f"Fake analysis of {len(document)} bytes",
+                "pages": [{"pageNumber": 1, "spans": [{"offset": 0, "length": 0}]}],
+                "tables": [],
+            }
+
+        first, _, last = pages.partition("-")
+        content, page_results = "", []
+        for page_number in range(int(first), int(last or first) + 1):
+            text = f"Page {page_number}"
+            page_results.append(
+                {"pageNumber": page_number, "spans": [{"offset": len(content), "length": len(text)}]}
+            )
+            content += text + "\n"
+        return {
+            "apiVersion": "2024-11-30",
+            "content": content.rstrip("\n"),
+            "pages": page_results,
+            "tables": [],
+        }
+
+    def _throttled(self) -> bool:
+        """Sliding one-second window over the accepted POSTs."""
+        if self.max_posts_per_second is None:
+            return False
+        now = time.time()
+        with self._lock:
+            self._post_times = [t for t in self._post_times if now - t < 1]
+            if len(self._post_times) >= self.max_posts_per_second:
+                self.request_counts["throttled"] += 1
+                return True
+            self._post_times.append(now)
+            return False
+
+    def _make_request_handler(self):
+        fake = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _retry_after_headers(self) -> Dict:
+                if fake.retry_after is None:
+                    return {}
+                return {"Retry-After": str(fake.retry_after)}
+
+            def _send_json(self, status: int, body: Dict, headers: Optional[Dict] = None):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _read_body(self) -> bytes:
+                if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+                    return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                # Streams of unknown length are sent in chunks
+                body = b""
+                while True:
+                    size = int(self.rfile.readline().split(b";")[0], 16)
+                    chunk = self.rfile.read(size + 2)
+                    if not size:
+                        return body
+                    body += chunk[:-2]
+
+            def do_POST(self):
+                body = self._read_body()
+                match = re.match(r"^/documentintelligence/(\w+)/([^/:]+):analyze", self.path)
+                if not match:
+                    self._send_json(404, {"error": {"message": "Not found"}})
+                    return
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    document = base64.b64decode(json.loads(body or b"{}").get("base64Source", ""))
+                else:
+                    document = body
+
+                if fake._throttled():
+                    self._send_json(
+                        429,
+                        {"error": {"code": "429", "message": "Rate limit is exceeded."}},
+                        headers={"Retry-After": "1"},
+                    )
+                    return
+
+                time.sleep(fake.post_latency)
+                operation_id = str(uuid.uuid4())
+                with fake._lock:
+                    fake.request_counts["post"] += 1
+                    fake.operations[operation_id] = {
+                        "created": time.time(),
+                        "document": document,
+                        "pages": parse_qs(urlparse(self.path).query).get("pages", [None])[0],
+                    }
+                location = (
+                    f"{fake.endpoint}/documentintelligence/{match.group(1)}/"
+                    f"{match.group(2)}/analyzeResults/{operation_id}"
+                )
+                self._send_json(
+                    202,
+                    {},
+                    headers={"Operation-Location": location, **self._retry_after_headers()},
+                )
+
+            def do_GET(self):
+                match = re.match(r"^/documentintelligence/\w+/[^/]+/analyzeResults/([\w-]+)", self.path)
+                with fake._lock:
+                    fake.request_counts["get"] += 1
+                    operation = fake.operations.get(match.group(1)) if match else None
+                if operation is None:
+                    self._send_json(404, {"error": {"message": "Operation not found"}})
+                    return
+                if time.time() - operation["created"] < fake.processing_time:
+                    self._send_json(200, {"status": "running"}, headers=self._retry_after_headers())
+                    return
+                self._send_json(
+                    200,
+                    {
+                        "status": "succeeded",
+                        "analyzeResult": fake.analyze_result(
+                            operation["document"], operation["pages"]
+                        ),
+                    },
+                )
+
+        return RequestHandler
@@ -2,6 +2,8 @@ from typing import Any, Dict, Optional
 
 
 class HandlerResult:
+    __slots__ = ("content", "success", "log", "error")
+
     def __init__(
         self,
         content: Any,
@@ -0,0 +1,36 @@
+import functools
+import threading
+from typing import Callable, List, TypeVar
+
+T = TypeVar("T")
+
+
+def once(factory: Callable[[], T]) -> Callable[[], T]:
+    """
+    Build a client on its first use and return the same instance afterwards.
+    Unlike `functools.lru_cache`, concurrent first calls wait for one `factory` call instead of each
+    building their own client, so e.g. a handler with a rate limiter is never duplicated.
+    `reset()` on the returned function drops the instance, the next call builds a new one.
+
+    Args:
+        factory (Callable): Builds the client, called without arguments.
+    Returns:
+        get (Callable): Returns the client.
+    """
+    lock = threading.Lock()
+    instance: List[T] = []
+
+    @functools.wraps(factory)
+    def get() -> T:
+        if not instance:
+            with lock:
+                if not instance:
+                    instance.append(factory())
+        return instance[0]
+
+    def reset() -> None:
+        with lock:
+            instance.clear()
+
+    get.reset = reset
+    return get
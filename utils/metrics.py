@@ -0,0 +1,160 @@
+import atexit
+import bisect
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class MetricsSink:
+    """Receives one observation per metric and handler call. Subclass it to plug in a metrics backend."""
+
+    def record(self, name: str, value: float, tags: Dict[str, str]) -> None:
+        raise NotImplementedError
+
+    def increment(self, name: str, value: float, tags: Dict[str, str]) -> None:
+        """Add `value` to a counter, e.g. polls or retries. Recorded as an observation unless overridden."""
+        self.record(name, value, tags)
+
+    def flush(self) -> None:
+        """Called once after all observations of a handler call were recorded."""
+
+
+class CallbackMetricsSink(MetricsSink):
+    def __init__(
+        self,
+        callback: Callable[[str, float, Dict[str, str]], None],
+        prefix: str = "",
+        counter_callback: Optional[Callable[[str, float, Dict[str, str]], None]] = None,
+    ):
+        """
+        StatsD-style sink that forwards every observation to a callback, e.g. a StatsD client's `timing`.
+
+        Usage:
+            sink = CallbackMetricsSink(
+                lambda name, value, tags: statsd.timing(name, value * 1000, tags=tags),
+                counter_callback=lambda name, value, tags: statsd.increment(name, value, tags=tags),
+            )
+
+        Args:
+            callback (Callable): Called with (name, value, tags) for every observation.
+            prefix (str): Prepended to every metric name.
+            counter_callback (Callable): Called for counters instead of `callback`, if given.
+        """
+        self.callback = callback
+        self.prefix = prefix
+        self.counter_callback = counter_callback
+
+    def record(self, name: str, value: float, tags: Dict[str, str]) -> None:
+        self.callback(f"{self.prefix}{name}", value, tags)
+
+    def increment(self, name: str, value: float, tags: Dict[str, str]) -> None:
+        (self.counter_callback or self.callback)(f"{self.prefix}{name}", value, tags)
+
+
+class PrometheusTextFileSink(MetricsSink):
+    # Seconds
+    DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+    def __init__(
+        self,
+        path: str,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        byte_buckets: Sequence[float] = (1e4, 1e5, 1e6, 1e7, 5e7, 1e8, 5e8),
+        labels: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Keeps a histogram per metric and label set, and a `_total` counter per counted metric, and
+        rewrites them to a Prometheus text file after every handler call, for the node_exporter
+        textfile collector. p50/p95 per `model_id` can then be computed with `histogram_quantile`.
+        Every process needs a file of its own and labels that tell it apart, see `for_process`.
+
+        Args:
+            path (str): The `.prom` file to write, replaced atomically.
+            buckets (Sequence[float]): Upper bounds of the histogram buckets for timings.
+            byte_buckets (Sequence[float]): Upper bounds of the buckets for metrics ending in `_bytes`.
+            labels (Dict[str, str]): Added to every series, e.g. the process.
+        """
+        self.path = path
+        self.buckets = sorted(buckets)
+        self.byte_buckets = sorted(byte_buckets)
+        self.labels = tuple(sorted((labels or {}).items()))
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], List] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+    @classmethod
+    def for_process(cls, directory: str, name: str, **kwargs) -> "PrometheusTextFileSink":
+        """
+        A sink writing `<name>.<pid>.prom` in `directory`, its series labelled with `process` and `pid`,
+        so runners and batch workers using the same tools do not overwrite each other's metrics.
+        The file is removed when the process exits, so the collector does not keep exporting the
+        series of every past pid. Files of processes killed without exiting (SIGKILL, OOM) stay behind
+        and have to be deleted with the directory, e.g. on deploy.
+        """
+        pid = str(os.getpid())
+        sink = cls(os.path.join(directory, f"{name}.{pid}.prom"), labels={"process": name, "pid": pid}, **kwargs)
+        atexit.register(sink.close)
+        return sink
+
+    def record(self, name: str, value: float, tags: Dict[str, str]) -> None:
+        buckets = self.byte_buckets if name.endswith("_bytes") else self.buckets
+        key = (name, tuple(sorted(tags.items())))
+        with self._lock:
+            # [bucket counts..., sum, count]
+            histogram = self._histograms.setdefault(key, [0] * len(buckets) + [0.0, 0])
+            index = bisect.bisect_left(buckets, value)
+            for bucket in range(index, len(buckets)):
+                histogram[bucket] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def increment(self, name: str, value: float, tags: Dict[str, str]) -> None:
+        key = (f"{name}_total", tuple(sorted(tags.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._closed:
+                self._write()
+
+    def close(self) -> None:
+        """Remove the file, later observations are no longer written."""
+        with self._lock:
+            self._closed = True
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def _labels(self, tags: Tuple[Tuple[str, str], ...], extra: Optional[Tuple[str, str]] = None) -> str:
+        items = list(self.labels) + list(tags) + ([extra] if extra else [])
+        if not items:
+            return ""
+        return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}"
+
+    def _write(self) -> None:
+        lines = []
+        for name in sorted({name for name, _ in self._histograms}):
+            lines.append(f"# TYPE {name} histogram")
+            buckets = self.byte_buckets if name.endswith("_bytes") else self.buckets
+            for (metric, tags), histogram in sorted(self._histograms.items()):
+                if metric != name:
+                    continue
+                for bound, count in zip(buckets, histogram):
+                    lines.append(f"{name}_bucket{self._labels(tags, ('le', repr(float(bound))))} {count}")
+                lines.append(f"{name}_bucket{self._labels(tags, ('le', '+Inf'))} {histogram[-1]}")
+                lines.append(f"{name}_sum{self._labels(tags)} {histogram[-2]}")
+                lines.append(f"{name}_count{self._labels(tags)} {histogram[-1]}")
+        for name in sorted({name for name, _ in self._counters}):
+            lines.append(f"# TYPE {name} counter")
+            for (metric, tags), value in sorted(self._counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{self._labels(tags)} {value}")
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.path)
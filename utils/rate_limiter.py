@@ -0,0 +1,88 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Optional
+
+from .deadline import sleep
+
+
+class TokenBucketRateLimiter:
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        state_path: Optional[str] = None,
+        name: str = "document_intelligence",
+    ):
+        """
+        Token bucket that can be shared between threads, and between processes through SQLite.
+        `acquire` reserves tokens and sleeps until they are available, so callers are served in
+        the order they asked, at `rate` tokens per second with bursts of up to `capacity`.
+
+        Args:
+            rate (float): Tokens added to the bucket per second, i.e. the sustained request rate.
+            capacity (float): Maximum tokens in the bucket, i.e. the allowed burst. Defaults to `rate`.
+            state_path (str): Optional SQLite file holding the bucket, to share it between processes
+                such as `run_RFI_agent.py` and `Doc_processing_agent.py`. In-process only if omitted.
+            name (str): Name of the bucket in the SQLite file, buckets with the same name are shared.
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.state_path = state_path
+        self.name = name
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.time()
+
+        if self.state_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+            with closing(self._connect()) as connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL, updated REAL)"
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.state_path, timeout=30, isolation_level=None)
+
+    def _refill(self, tokens: float, updated: float, now: float) -> float:
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+    def _reserve(self, tokens: float) -> float:
+        """Take `tokens` from the bucket, going negative if needed, and return how long to wait."""
+        now = time.time()
+        if not self.state_path:
+            with self._lock:
+                self._tokens = self._refill(self._tokens, self._updated, now) - tokens
+                self._updated = now
+                available = self._tokens
+        else:
+            with closing(self._connect()) as connection:
+                connection.execute("BEGIN IMMEDIATE")
+                row = connection.execute(
+                    "SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                current = self.capacity if row is None else self._refill(row[0], row[1], now)
+                available = current - tokens
+                connection.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                    (self.name, available, now),
+                )
+                connection.execute("COMMIT")
+        return max(0.0, -available / self.rate)
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until `tokens` are available.
+        Args:
+            tokens (float): The number of tokens to take, 1 per request
+        Returns:
+            wait (float): Seconds spent waiting for the tokens
+        Raises:
+            DeadlineExceeded: If the tokens only become available after the current deadline. They
+                stay reserved, so callers behind this one keep their place in the queue.
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            sleep(wait, "The rate limiter")
+        return wait
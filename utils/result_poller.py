@@ -0,0 +1,97 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+
+class ResultPoller:
+    def __init__(
+        self,
+        timeout: float = 600,
+        initial_delay: float = 0.25,
+        max_delay: float = 5,
+        backoff_factor: float = 2,
+        jitter: float = 0.25,
+        honor_retry_after: bool = True,
+    ):
+        """
+        Delay schedule for polling a long running operation until a total deadline.
+        Delays start at `initial_delay` and grow by `backoff_factor` up to `max_delay`, each one
+        randomized by +/- `jitter`. A `Retry-After` header from the service takes precedence.
+        One instance tracks one operation, create a new one per document.
+
+        Args:
+            timeout (float): Total seconds to wait for the result, counted from the creation of the poller.
+            initial_delay (float): The first delay in seconds.
+            max_delay (float): Upper bound of a single delay in seconds.
+            backoff_factor (float): Multiplier applied to the delay after every poll.
+            jitter (float): Relative random spread applied to every computed delay.
+            honor_retry_after (bool): Use the service's `Retry-After` header when it is present.
+        """
+        self.timeout = timeout
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+        self.honor_retry_after = honor_retry_after
+
+        self.poll_count = 0
+        self.poll_wait = 0.0
+        self.time_to_first_result: Optional[float] = None
+        self._delay = initial_delay
+        self._start = time.monotonic()
+        self._deadline = self._start + timeout
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Parse a `Retry-After` header given either in seconds or as an HTTP date."""
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+    def remaining(self) -> float:
+        return self._deadline - time.monotonic()
+
+    def next_delay(self, retry_after: Optional[str] = None) -> float:
+        """Return how long to wait before the next poll.
+        Args:
+            retry_after (str): The `Retry-After` header of the last response, if any
+        Returns:
+            delay (float): Seconds to wait, never past the deadline
+        Raises:
+            TimeoutError: If the deadline has already passed
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise TimeoutError(
+                f"Deadline of {self.timeout}s reached for Document Intelligence after {self.poll_count} polls"
+            )
+
+        delay = self.parse_retry_after(retry_after) if self.honor_retry_after else None
+        if delay is None:
+            delay = self._delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+            self._delay = min(self._delay * self.backoff_factor, self.max_delay)
+
+        delay = min(delay, remaining)
+        self.poll_wait += delay
+        return delay
+
+    def record_poll(self) -> None:
+        self.poll_count += 1
+
+    def record_result(self) -> None:
+        self.time_to_first_result = time.monotonic() - self._start
+
+    def stats(self) -> Dict:
+        return {
+            "poll_count": self.poll_count,
+            "poll_wait": self.poll_wait,
+            "time_to_first_result": self.time_to_first_result,
+        }
@@ -0,0 +1,346 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from utils.deadline import Deadline, deadline_scope
+from utils.tool_calls import run_tool_calls
+
+if TYPE_CHECKING:
+    from azure.ai.agents import AgentsClient
+    from azure.ai.agents.models import ThreadRun
+
+logger = logging.getLogger("neuron_public")
+
+ACTIVE_STATUSES = ("queued", "in_progress", "requires_action", "cancelling")
+
+
+class _StreamUnavailable(Exception):
+    """The service refused to stream the run before creating it."""
+
+
+class _RunCanceller:
+    def __init__(self, agents: "AgentsClient", deadline: Optional[Deadline]):
+        """Cancels a run once, when its deadline has passed or on request."""
+        self.agents = agents
+        self.deadline = deadline
+        self.requested_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    @property
+    def requested(self) -> bool:
+        return self.requested_at is not None
+
+    @property
+    def due(self) -> bool:
+        return self.deadline is not None and self.deadline.expired and not self.requested
+
+    def watch(self, run: "ThreadRun") -> None:
+        """Cancel the run at the deadline from a timer, for a stream blocked waiting for its next event."""
+        if self.deadline is not None and self._timer is None:
+            self._timer = threading.Timer(self.deadline.remaining(), self.cancel, args=(run,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def cancel(self, run: "ThreadRun") -> None:
+        from azure.core.exceptions import HttpResponseError
+
+        with self._lock:
+            if self.requested:
+                return
+            self.requested_at = time.monotonic()
+        logger.warning(json.dumps({"type": "run_driver", "run_id": run.id, "message": "Run deadline exceeded, cancelling the run"}))
+        try:
+            self.agents.runs.cancel(thread_id=run.thread_id, run_id=run.id)
+        except HttpResponseError as e:
+            # The run ended in the meantime
+            logger.warning(json.dumps({"type": "run_driver", "run_id": run.id, "message": f"Cancelling failed: {e}"}))
+
+    def stop(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+
+
+class ToolRegistry:
+    def __init__(self):
+        """
+        The local tools an agent can call, by name. Every tool takes the parsed arguments of the call
+        and returns its output, a string as is or anything else serialized as JSON. Calling the
+        registry with a tool call runs the tool, so it can be passed to `run_tool_calls` and `RunDriver`.
+
+        Usage:
+            tools = ToolRegistry()
+
+            @tools.register("list_rfi_blobs")
+            def list_blobs_tool(args):
+                return {"files": list_rfi_blobs(args.get("prefix", ""))}
+        """
+        self._tools: Dict[str, Callable[[Dict], Any]] = {}
+
+    def register(self, name: str) -> Callable[[Callable[[Dict], Any]], Callable[[Dict], Any]]:
+        """Decorator adding a tool under `name`."""
+
+        def decorator(function: Callable[[Dict], Any]) -> Callable[[Dict], Any]:
+            self.add(name, function)
+            return function
+
+        return decorator
+
+    def add(self, name: str, function: Callable[[Dict], Any]) -> None:
+        self._tools[name] = function
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._tools)
+
+    def __call__(self, tool_call: Any) -> str:
+        name = tool_call.function.name
+        function = self._tools.get(name)
+        if function is None:
+            return json.dumps({"error": f"unknown tool {name}"})
+        output = function(json.loads(tool_call.function.arguments or "{}"))
+        return output if isinstance(output, str) else json.dumps(output, ensure_ascii=False)
+
+
+class RunStats:
+    def __init__(self, mode: str):
+        """
+        Where the time of one run went.
+
+        Args:
+            mode (str): "stream" or "poll".
+        """
+        self.mode = mode
+        self.run_id: Optional[str] = None
+        self.status: Optional[str] = None
+        # requires_action steps and the tool calls in them
+        self.steps = 0
+        self.tool_calls = 0
+        # Status requests of the polling loop
+        self.polls = 0
+        self.tool_seconds = 0.0
+        self.wall_seconds = 0.0
+        # Tool calls abandoned at their deadline, and whether the run was cancelled at its own
+        self.timed_out_tools = 0
+        self.deadline_exceeded = False
+
+    @property
+    def idle_seconds(self) -> float:
+        """Time not spent in tools, waiting for the model, the service or the next poll."""
+        return max(self.wall_seconds - self.tool_seconds, 0.0)
+
+    def as_dict(self) -> Dict:
+        return {
+            "run_id": self.run_id,
+            "status": self.status,
+            "mode": self.mode,
+            "steps": self.steps,
+            "tool_calls": self.tool_calls,
+            "polls": self.polls,
+            "timed_out_tools": self.timed_out_tools,
+            "deadline_exceeded": self.deadline_exceeded,
+            "tool_seconds": round(self.tool_seconds, 3),
+            "idle_seconds": round(self.idle_seconds, 3),
+            "wall_seconds": round(self.wall_seconds, 3),
+        }
+
+    def __str__(self) -> str:
+        return (
+            f"Run {self.run_id} {self.status} in {self.wall_seconds:.2f}s ({self.mode}): {self.steps} steps, "
+            f"{self.tool_calls} tool calls, {self.tool_seconds:.2f}s in tools, {self.idle_seconds:.2f}s idle, "
+            f"{self.polls} polls"
+            + (f", {self.timed_out_tools} tool calls timed out" if self.timed_out_tools else "")
+            + (", cancelled at its deadline" if self.deadline_exceeded else "")
+        )
+
+
+def print_step(tool_calls: List[Any], durations: List[Dict]) -> None:
+    """Print the tool calls of a step with their durations, as the runners show them."""
+    print("\nAgent requested tool calls:")
+    for tool_call, duration in zip(tool_calls, durations):
+        print(
+            f"- {tool_call.function.name} with args {tool_call.function.arguments}: "
+            f"{duration['seconds']:.2f}s{'' if duration['ok'] else ', timed out' if duration.get('timed_out') else ', failed'}"
+        )
+
+
+class RunDriver:
+    def __init__(
+        self,
+        agents: "AgentsClient",
+        tools: Callable[[Any], str],
+        stream: Optional[bool] = None,
+        min_poll_interval: float = 0.1,
+        max_poll_interval: float = 2.0,
+        poll_backoff: float = 1.5,
+        max_tool_workers: Optional[int] = None,
+        on_step: Optional[Callable[[List[Any], List[Dict]], None]] = None,
+        deadline: Optional[float] = None,
+        tool_timeout: Optional[float] = None,
+        cancel_grace: float = 10.0,
+    ):
+        """
+        Runs an agent on a thread until it ends, answering its tool calls, for all runners.
+        Streams the run's events by default, so a step is handled as soon as the service emits it
+        and no status requests are made. If streaming is turned off or the service refuses it, the
+        run is polled, every `min_poll_interval` seconds right after a change and `poll_backoff`
+        times slower while nothing changes, up to `max_poll_interval`.
+
+        With a `deadline`, the run is cancelled once it has taken that long, and the tools it calls
+        stop waiting for Document Intelligence and blob storage at it, so a batch job's runs end in
+        bounded time. A deadline set by the caller with `deadline_scope` applies as well.
+
+        Args:
+            agents (AgentsClient): `AIProjectClient(...).agents`.
+            tools (Callable): Returns the output of a tool call, e.g. a `ToolRegistry`.
+            stream (bool): Use the streaming run API, AGENT_RUN_STREAM (default "1") if omitted.
+            min_poll_interval (float): Seconds between status requests after a change.
+            max_poll_interval (float): Longest wait between status requests.
+            poll_backoff (float): Factor the wait grows by while the status stays the same.
+            max_tool_workers (int): Tool calls of one step running at the same time, see `run_tool_calls`.
+            on_step (Callable): Called with the tool calls and durations of every step, e.g. `print_step`.
+            deadline (float): Seconds a run may take, AGENT_RUN_DEADLINE (default none) if omitted.
+            tool_timeout (float): Seconds a tool call may take, see `run_tool_calls`.
+            cancel_grace (float): Seconds to wait for a cancelled run to reach its final status.
+        """
+        self.agents = agents
+        self.tools = tools
+        self.stream = os.environ.get("AGENT_RUN_STREAM", "1") == "1" if stream is None else stream
+        self.min_poll_interval = min_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.poll_backoff = poll_backoff
+        self.max_tool_workers = max_tool_workers
+        self.on_step = on_step
+        if deadline is None:
+            deadline = float(os.environ.get("AGENT_RUN_DEADLINE") or 0)
+        self.deadline = deadline or None
+        self.tool_timeout = tool_timeout
+        self.cancel_grace = cancel_grace
+
+    def run(self, thread_id: str, agent_id: str, **run_kwargs) -> Tuple["ThreadRun", RunStats]:
+        """
+        Create a run of the agent on the thread and drive it until it is completed, failed,
+        cancelled or expired.
+
+        Args:
+            thread_id (str): The thread, with the user's message already posted.
+            agent_id (str): The agent.
+            **run_kwargs: Passed on to `runs.stream` or `runs.create`, e.g. `additional_instructions`.
+        Returns:
+            run (ThreadRun): The run in its final status.
+            stats (RunStats): Steps, tool calls, polls and timings of the run.
+        """
+        with deadline_scope(self.deadline) as deadline:
+            canceller = _RunCanceller(self.agents, deadline)
+            try:
+                if self.stream:
+                    try:
+                        return self._run_streaming(thread_id, agent_id, run_kwargs, canceller)
+                    except _StreamUnavailable as e:
+                        logger.warning(json.dumps({"type": "run_driver", "message": f"Streaming refused, polling instead: {e}"}))
+                return self._run_polling(thread_id, agent_id, run_kwargs, canceller)
+            finally:
+                canceller.stop()
+
+    def _step(self, run: "ThreadRun", stats: RunStats) -> List[Dict]:
+        tool_calls = run.required_action.submit_tool_outputs.tool_calls
+        start = time.perf_counter()
+        tool_outputs, durations = run_tool_calls(
+            tool_calls, self.tools, max_workers=self.max_tool_workers, timeout=self.tool_timeout
+        )
+        stats.tool_seconds += time.perf_counter() - start
+        stats.steps += 1
+        stats.tool_calls += len(tool_calls)
+        stats.timed_out_tools += sum(duration["timed_out"] for duration in durations)
+        if self.on_step:
+            self.on_step(tool_calls, durations)
+        return tool_outputs
+
+    def _finish(
+        self, run: "ThreadRun", stats: RunStats, start: float, canceller: _RunCanceller
+    ) -> Tuple["ThreadRun", RunStats]:
+        stats.run_id, stats.status = run.id, str(getattr(run.status, "value", run.status))
+        # The timer may cancel a run that has just completed, which the service refuses
+        stats.deadline_exceeded = canceller.requested and stats.status != "completed"
+        stats.wall_seconds = time.perf_counter() - start
+        logger.debug(json.dumps({"type": "run_driver", **stats.as_dict()}))
+        return run, stats
+
+    def _run_streaming(
+        self, thread_id: str, agent_id: str, run_kwargs: Dict, canceller: _RunCanceller
+    ) -> Tuple["ThreadRun", RunStats]:
+        from azure.ai.agents.models import AgentEventHandler, SubmitToolOutputsAction, ThreadRun
+        from azure.core.exceptions import HttpResponseError
+
+        stats = RunStats("stream")
+        start = time.perf_counter()
+        handler = AgentEventHandler()
+        try:
+            stream = self.agents.runs.stream(thread_id=thread_id, agent_id=agent_id, event_handler=handler, **run_kwargs)
+        except HttpResponseError as e:
+            # Nothing was created yet, so the run can still be polled instead
+            if e.status_code in (400, 404, 405, 501):
+                raise _StreamUnavailable(str(e)) from e
+            raise
+        run = None
+        with stream as events:
+            for _, data, _ in events:
+                if not isinstance(data, ThreadRun):
+                    continue
+                run = data
+                # The stream ends with the cancelled run, as the service emits it
+                canceller.watch(run)
+                if run.status == "requires_action" and isinstance(run.required_action, SubmitToolOutputsAction):
+                    tool_outputs = self._step(run, stats)
+                    if canceller.requested or canceller.due:
+                        # Not submitted, so the stream ends here and polling cancels the run
+                        break
+                    # The events after the outputs continue on the same handler
+                    self.agents.runs.submit_tool_outputs_stream(
+                        thread_id=thread_id, run_id=run.id, tool_outputs=tool_outputs, event_handler=handler
+                    )
+        if run is None:
+            raise RuntimeError(f"The run stream on thread {thread_id} ended without a run")
+        if run.status in ACTIVE_STATUSES:
+            # The stream ended early, e.g. the connection dropped, follow the run by polling
+            return self._poll(run, stats, start, canceller)
+        return self._finish(run, stats, start, canceller)
+
+    def _run_polling(
+        self, thread_id: str, agent_id: str, run_kwargs: Dict, canceller: _RunCanceller
+    ) -> Tuple["ThreadRun", RunStats]:
+        stats = RunStats("poll")
+        start = time.perf_counter()
+        run = self.agents.runs.create(thread_id=thread_id, agent_id=agent_id, **run_kwargs)
+        return self._poll(run, stats, start, canceller)
+
+    def _poll(
+        self, run: "ThreadRun", stats: RunStats, start: float, canceller: _RunCanceller
+    ) -> Tuple["ThreadRun", RunStats]:
+        interval = self.min_poll_interval
+        while run.status in ACTIVE_STATUSES:
+            if canceller.due:
+                canceller.cancel(run)
+                interval = self.min_poll_interval
+            if canceller.requested and time.monotonic() - canceller.requested_at > self.cancel_grace:
+                logger.warning(json.dumps({"type": "run_driver", "run_id": run.id, "message": "The cancelled run did not end in time"}))
+                break
+            if run.status == "requires_action" and not canceller.requested:
+                tool_outputs = self._step(run, stats)
+                if canceller.due:
+                    continue
+                run = self.agents.runs.submit_tool_outputs(thread_id=run.thread_id, run_id=run.id, tool_outputs=tool_outputs)
+                interval = self.min_poll_interval
+                continue
+            deadline = canceller.deadline
+            # Wake up at the deadline to cancel the run, not one poll interval later
+            time.sleep(interval if deadline is None or canceller.requested else min(interval, deadline.remaining()))
+            previous = run.status
+            run = self.agents.runs.get(thread_id=run.thread_id, run_id=run.id)
+            stats.polls += 1
+            # Poll quickly again right after a change, as the next one often follows soon
+            interval = self.min_poll_interval if run.status != previous else min(interval * self.poll_backoff, self.max_poll_interval)
+        return self._finish(run, stats, start, canceller)
@@ -0,0 +1,250 @@
+import re
+from typing import Any, Callable, Dict, List
+
+# Python types of every JSON Schema type, bool is excluded from the numeric types below
+JSON_TYPES = {
+    "object": (dict,),
+    "array": (list, tuple),
+    "string": (str,),
+    "integer": (int, float),
+    "number": (int, float),
+    "boolean": (bool,),
+    "null": (type(None),),
+}
+
+# Keywords that only annotate and never fail validation
+ANNOTATIONS = {"$schema", "$id", "title", "description", "default", "examples", "format", "$comment"}
+
+# (value, path, errors), appends an error dict per violation
+Check = Callable[[Any, str, List[Dict]], None]
+
+
+def _type_name(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "integer" if value.is_integer() else "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, (list, tuple)):
+        return "array"
+    if isinstance(value, dict):
+        return "object"
+    return type(value).__name__
+
+
+def _error(errors: List[Dict], path: str, keyword: str, message: str) -> None:
+    errors.append({"path": path, "field": re.split(r"[.\[]", path, maxsplit=1)[0], "error": keyword, "message": message})
+
+
+def _child(path: str, key: str) -> str:
+    return f"{path}.{key}" if path else key
+
+
+def _type_check(types: List[str]) -> Check:
+    python_types = tuple({python_type for name in types for python_type in JSON_TYPES[name]})
+    allows_bool = "boolean" in types
+    only_floats_if_integer = "integer" in types and "number" not in types
+    expected = " or ".join(types)
+
+    def check(value, path, errors):
+        if isinstance(value, python_types) and (allows_bool or not isinstance(value, bool)):
+            # 1.0 is an integer in JSON Schema, 1.5 is not
+            if not (only_floats_if_integer and isinstance(value, float) and not value.is_integer()):
+                return
+        _error(errors, path, "type", f"expected {expected}, got {_type_name(value)}")
+
+    return check
+
+
+def _compile(schema: Dict) -> Check:
+    if not isinstance(schema, dict):
+        raise ValueError(f"Expected a schema object, got {schema!r}")
+    unsupported = set(schema) - ANNOTATIONS - {
+        "type", "enum", "const", "required", "properties", "additionalProperties", "items",
+        "minItems", "maxItems", "minLength", "maxLength", "pattern", "minimum", "maximum",
+    }
+    if unsupported:
+        raise ValueError(f"Unsupported schema keywords: {', '.join(sorted(unsupported))}")
+
+    checks: List[Check] = []
+    if "type" in schema:
+        types = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+        checks.append(_type_check(types))
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                _error(errors, path, "enum", f"expected one of {allowed}, got {value!r}")
+
+        checks.append(check_enum)
+    if "const" in schema:
+        const = schema["const"]
+
+        def check_const(value, path, errors):
+            if value != const:
+                _error(errors, path, "const", f"expected {const!r}, got {value!r}")
+
+        checks.append(check_const)
+
+    # Keywords of one type only apply to values of that type
+    object_checks = _object_checks(schema)
+    if object_checks:
+        checks.append(_for_type(dict, object_checks))
+    array_checks = _array_checks(schema)
+    if array_checks:
+        checks.append(_for_type((list, tuple), array_checks))
+    string_checks = _string_checks(schema)
+    if string_checks:
+        checks.append(_for_type(str, string_checks))
+    number_checks = _number_checks(schema)
+    if number_checks:
+        checks.append(_for_type((int, float), number_checks, exclude=bool))
+
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value, path, errors):
+        for check in checks:
+            check(value, path, errors)
+
+    return check_all
+
+
+def _for_type(types, checks: List[Check], exclude=None) -> Check:
+    def check(value, path, errors):
+        if isinstance(value, types) and not (exclude and isinstance(value, exclude)):
+            for type_check in checks:
+                type_check(value, path, errors)
+
+    return check
+
+
+def _object_checks(schema: Dict) -> List[Check]:
+    checks = []
+    required = list(schema.get("required", []))
+    if required:
+
+        def check_required(value, path, errors):
+            for name in required:
+                if name not in value:
+                    _error(errors, _child(path, name), "required", "is required")
+
+        checks.append(check_required)
+    properties = {name: _compile(subschema) for name, subschema in schema.get("properties", {}).items()}
+    additional = schema.get("additionalProperties", True)
+    additional_check = _compile(additional) if isinstance(additional, dict) else None
+    if properties or additional is not True:
+
+        def check_properties(value, path, errors):
+            for name, item in value.items():
+                check = properties.get(name)
+                if check is not None:
+                    check(item, _child(path, name), errors)
+                elif additional_check is not None:
+                    additional_check(item, _child(path, name), errors)
+                elif additional is False:
+                    _error(errors, _child(path, name), "additionalProperties", "is not allowed")
+
+        checks.append(check_properties)
+    return checks
+
+
+def _array_checks(schema: Dict) -> List[Check]:
+    checks = []
+    if "items" in schema:
+        item_check = _compile(schema["items"])
+
+        def check_items(value, path, errors):
+            for index, item in enumerate(value):
+                item_check(item, f"{path}[{index}]", errors)
+
+        checks.append(check_items)
+    if "minItems" in schema or "maxItems" in schema:
+        minimum, maximum = schema.get("minItems", 0), schema.get("maxItems")
+
+        def check_length(value, path, errors):
+            if len(value) < minimum or (maximum is not None and len(value) > maximum):
+                _error(errors, path, "items", f"expected {minimum} to {'any' if maximum is None else maximum} items, got {len(value)}")
+
+        checks.append(check_length)
+    return checks
+
+
+def _string_checks(schema: Dict) -> List[Check]:
+    checks = []
+    if "minLength" in schema or "maxLength" in schema:
+        minimum, maximum = schema.get("minLength", 0), schema.get("maxLength")
+
+        def check_length(value, path, errors):
+            if len(value) < minimum or (maximum is not None and len(value) > maximum):
+                _error(errors, path, "length", f"expected {minimum} to {'any' if maximum is None else maximum} characters, got {len(value)}")
+
+        checks.append(check_length)
+    if "pattern" in schema:
+        pattern = re.compile(schema["pattern"])
+
+        def check_pattern(value, path, errors):
+            if not pattern.search(value):
+                _error(errors, path, "pattern", f"does not match {pattern.pattern!r}")
+
+        checks.append(check_pattern)
+    return checks
+
+
+def _number_checks(schema: Dict) -> List[Check]:
+    checks = []
+    if "minimum" in schema:
+        minimum = schema["minimum"]
+
+        def check_minimum(value, path, errors):
+            if value < minimum:
+                _error(errors, path, "minimum", f"expected at least {minimum}, got {value}")
+
+        checks.append(check_minimum)
+    if "maximum" in schema:
+        maximum = schema["maximum"]
+
+        def check_maximum(value, path, errors):
+            if value > maximum:
+                _error(errors, path, "maximum", f"expected at most {maximum}, got {value}")
+
+        checks.append(check_maximum)
+    return checks
+
+
+class SchemaValidator:
+    def __init__(self, schema: Dict):
+        """
+        A JSON Schema compiled once into nested checks, so validating a record only walks the record.
+        Supports the keywords RFI schemas use: type, enum, const, required, properties,
+        additionalProperties, items, min/maxItems, min/maxLength, pattern, minimum and maximum.
+        Others, such as $ref or anyOf, raise a ValueError when compiling instead of being ignored.
+
+        Args:
+            schema (Dict): The parsed schema.
+        """
+        self.schema = schema
+        self._check = _compile(schema)
+
+    def errors(self, instance: Any) -> List[Dict]:
+        """
+        All violations of the schema, empty if `instance` is valid.
+
+        Args:
+            instance (Any): The parsed JSON value, e.g. an RFI record.
+        Returns:
+            errors (List[Dict]): `path` of the value (e.g. "coverage_regions[2]"), top-level `field`,
+                failed keyword as `error` and a `message`. Missing required fields come first.
+        """
+        errors: List[Dict] = []
+        self._check(instance, "", errors)
+        return errors
+
+    def is_valid(self, instance: Any) -> bool:
+        return not self.errors(instance)
@@ -0,0 +1,203 @@
+from typing import Dict, List, Literal, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+# Cell properties read from a Document Intelligence table and their defaults when missing
+CELL_DEFAULTS = {"rowIndex": 0, "columnIndex": 0, "rowSpan": 1, "columnSpan": 1, "content": "", "kind": "content"}
+CELL_COLUMNS = list(CELL_DEFAULTS)
+
+# Cell kinds that mark header rows
+HEADER_KINDS = ("columnHeader",)
+# Cell kinds that label rows or columns, repeated across their span by fill_spans="headers"
+LABEL_KINDS = ("columnHeader", "rowHeader", "stubHead")
+
+# True repeats every merged cell, "headers" only labels: header cells and the first column
+FillSpans = Union[bool, Literal["headers"]]
+
+
+def _cell_arrays(table: Dict, properties: Sequence[str] = CELL_COLUMNS) -> Dict[str, np.ndarray]:
+    """One array per requested cell property, built with one comprehension each instead of a loop over cells."""
+    cells = table.get("cells") or []
+    arrays = {}
+    for name in properties:
+        default = CELL_DEFAULTS[name]
+        arrays[name] = np.array(
+            [cell.get(name) or default for cell in cells],
+            dtype=object if isinstance(default, str) else np.int64,
+        )
+        if name in ("rowSpan", "columnSpan"):
+            np.maximum(arrays[name], 1, out=arrays[name])
+    return arrays
+
+
+def table_cells_frame(table: Dict) -> pd.DataFrame:
+    """
+    All cells of a table as one DataFrame with a row per cell, missing properties filled with
+    their defaults (index 0, span 1, empty content, "content" kind).
+
+    Args:
+        table (Dict): A table of an `analyzeResult`.
+    Returns:
+        cells (pd.DataFrame): Columns `rowIndex`, `columnIndex`, `rowSpan`, `columnSpan`, `content`, `kind`.
+    """
+    return pd.DataFrame(_cell_arrays(table), columns=CELL_COLUMNS)
+
+
+def _positions(cells: Dict[str, np.ndarray], fill_spans: FillSpans):
+    """Cell index, row and column of every grid position the cells cover."""
+    rows = cells["rowIndex"]
+    columns = cells["columnIndex"]
+    if not fill_spans:
+        return np.arange(len(rows)), rows, columns
+
+    row_spans = cells["rowSpan"]
+    column_spans = cells["columnSpan"]
+    if fill_spans == "headers":
+        # Row labels of grouped tables are rarely marked as rowHeader, the first column is taken as labels
+        is_label = columns == 0
+        for kind in LABEL_KINDS:
+            is_label |= cells["kind"] == kind
+        row_spans = np.where(is_label, row_spans, 1)
+        column_spans = np.where(is_label, column_spans, 1)
+    counts = row_spans * column_spans
+    cell_index = np.repeat(np.arange(len(rows)), counts)
+    # Position of every covered slot within its cell, row-major
+    slot = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return (
+        cell_index,
+        rows[cell_index] + slot // column_spans[cell_index],
+        columns[cell_index] + slot % column_spans[cell_index],
+    )
+
+
+def _fill_grid(table: Dict, cells: Dict[str, np.ndarray], fill_spans: FillSpans) -> np.ndarray:
+    row_count = int(table.get("rowCount") or 0)
+    column_count = int(table.get("columnCount") or 0)
+    grid = np.full((row_count, column_count), "", dtype=object)
+    cell_index, rows, columns = _positions(cells, fill_spans)
+    inside = (rows >= 0) & (rows < row_count) & (columns >= 0) & (columns < column_count)
+    # Later cells win where cells overlap, as in the row by row loop this replaces
+    grid[rows[inside], columns[inside]] = cells["content"][cell_index[inside]]
+    return grid
+
+
+def _count_header_rows(table: Dict, cells: Dict[str, np.ndarray]) -> int:
+    is_header = np.isin(cells["kind"], HEADER_KINDS)
+    if not is_header.any():
+        return 0
+    _, rows, _ = _positions({name: values[is_header] for name, values in cells.items()}, fill_spans=True)
+    row_count = int(table.get("rowCount") or 0)
+    header_rows = np.zeros(row_count + 1, dtype=bool)
+    header_rows[rows[(rows >= 0) & (rows < row_count)]] = True
+    # The first row that is not a header row
+    return int(np.argmin(header_rows))
+
+
+def table_to_array(table: Dict, fill_spans: FillSpans = True) -> np.ndarray:
+    """
+    Materialize a table as a 2D object array of cell contents in one vectorized assignment.
+
+    Args:
+        table (Dict): A table of an `analyzeResult`.
+        fill_spans (bool | str): Repeat the content of merged cells in every row and column they span.
+            "headers" only repeats header cells and the cells of the first column, which label the rows.
+            Only the top-left position of a merged cell is set otherwise.
+    Returns:
+        grid (np.ndarray): Array of shape (rowCount, columnCount), empty strings where no cell is.
+    """
+    if fill_spans == "headers":
+        properties = CELL_COLUMNS
+    elif fill_spans:
+        properties = CELL_COLUMNS[:5]
+    else:
+        properties = ["rowIndex", "columnIndex", "content"]
+    return _fill_grid(table, _cell_arrays(table, properties), fill_spans)
+
+
+def detect_header_rows(table: Dict) -> int:
+    """
+    Number of leading rows covered by column header cells, including the rows a merged header spans.
+
+    Args:
+        table (Dict): A table of an `analyzeResult`.
+    Returns:
+        header_rows (int): 0 if the table has no column header cells in its first row.
+    """
+    return _count_header_rows(table, _cell_arrays(table, ["rowIndex", "columnIndex", "rowSpan", "columnSpan", "kind"]))
+
+
+def table_metadata(table: Dict, header_rows: Optional[int] = None) -> Dict:
+    """
+    JSON serializable description of where a table is and how it is shaped.
+
+    Args:
+        table (Dict): A table of an `analyzeResult`.
+        header_rows (int): The table's `detect_header_rows`, computed if omitted.
+    Returns:
+        metadata (Dict): Row and column counts, header rows, page numbers, bounding regions and caption.
+    """
+    bounding_regions = table.get("boundingRegions") or []
+    return {
+        "rowCount": int(table.get("rowCount") or 0),
+        "columnCount": int(table.get("columnCount") or 0),
+        "headerRows": detect_header_rows(table) if header_rows is None else header_rows,
+        "pageNumbers": sorted({region.get("pageNumber") for region in bounding_regions if "pageNumber" in region}),
+        "boundingRegions": bounding_regions,
+        "caption": (table.get("caption") or {}).get("content"),
+    }
+
+
+def _column_names(header: np.ndarray) -> List[str]:
+    """Join the header rows of every column into one unique name."""
+    names, seen = [], {}
+    for index, parts in enumerate(header.T):
+        # Merged header cells repeat across rows, keep every distinct part once
+        name = " / ".join(dict.fromkeys(part for part in parts if part)) or f"column_{index}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}_{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def table_to_dataframe(table: Dict, fill_spans: bool = True) -> pd.DataFrame:
+    """
+    Turn a Document Intelligence table into a DataFrame. Header rows become the column names,
+    the remaining rows the data. `table_metadata` is kept in `DataFrame.attrs`.
+
+    Args:
+        table (Dict): A table of an `analyzeResult`.
+        fill_spans (bool): Repeat the content of merged cells in every row and column they span.
+    Returns:
+        frame (pd.DataFrame): One row per body row of the table.
+    """
+    cells = _cell_arrays(table)
+    grid = _fill_grid(table, cells, fill_spans)
+    header_rows = _count_header_rows(table, cells)
+    frame = pd.DataFrame(grid[header_rows:], columns=_column_names(grid[:header_rows]))
+    frame.attrs.update(table_metadata(table, header_rows=header_rows))
+    return frame
+
+
+def tables_to_dataframes(tables: List[Dict], fill_spans: bool = True) -> List[pd.DataFrame]:
+    """`table_to_dataframe` for every table of an `analyzeResult`."""
+    return [table_to_dataframe(table, fill_spans=fill_spans) for table in tables or []]
+
+
+def table_to_grid(table: Dict, fill_spans: FillSpans = "headers") -> List[List[str]]:
+    """
+    The table as a JSON serializable list of rows.
+
+    Args:
+        table (Dict): A table of an `analyzeResult`.
+        fill_spans (bool | str): Which merged cells to repeat, see `table_to_array`. By default
+            merged headers and row labels are repeated, so every row and column keeps its labels,
+            while merged values stay in one place. False gives the list of lists
+            `extract_text_tables` had before the table engine.
+    Returns:
+        grid (List[List[str]]): rowCount lists of columnCount cell contents.
+    """
+    return table_to_array(table, fill_spans=fill_spans).tolist()
@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextvars import copy_context
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.deadline import Deadline, DeadlineExceeded, deadline_scope
+
+logger = logging.getLogger("neuron_public")
+
+
+def _timeout_output(name: str, seconds: float) -> str:
+    return json.dumps(
+        {
+            "error": "timeout",
+            "tool": name,
+            "timeout_seconds": round(seconds, 1),
+            "message": f"{name} did not finish within {seconds:.0f}s and was abandoned. "
+            "Retry it with less work, e.g. a single file, or continue without its result.",
+        }
+    )
+
+
+def run_tool_calls(
+    tool_calls: Sequence[Any],
+    handler: Callable[[Any], str],
+    max_workers: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Run the tool calls of one requires_action step concurrently, so the step takes as long as its
+    slowest call instead of the sum of all. A call that raises gets its error as output, so the
+    other outputs are still submitted and the agent can react to it.
+
+    Every call runs under a deadline of `timeout` seconds from its start, cut to the deadline of the
+    caller (e.g. the run's), which Document Intelligence polling and blob I/O stop at. A call still
+    running when its deadline has passed is abandoned: its thread is left to finish in the background
+    and the call gets a timeout error as output, so a hanging service cannot block the run.
+
+    Args:
+        tool_calls (Sequence): The `submit_tool_outputs.tool_calls` of the run.
+        handler (Callable): Returns the output string of one tool call.
+        max_workers (int): The maximum number of tool calls running at the same time, AGENT_TOOL_WORKERS
+            (default 8) if omitted. Read when called, so a runner's `load_dotenv` applies.
+        timeout (float): Seconds a call may take, AGENT_TOOL_TIMEOUT (default 300) if omitted, 0 for no limit.
+    Returns:
+        tool_outputs (List[Dict]): `tool_call_id` and `output` per call, in the order of `tool_calls`.
+        durations (List[Dict]): `tool_call_id`, `name`, `seconds`, `ok` and `timed_out` per call, in the same order.
+    """
+
+    def run(index: int, done: queue.Queue) -> None:
+        tool_call = tool_calls[index]
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            output, ok = handler(tool_call), True
+        except DeadlineExceeded:
+            output, ok, timed_out = None, False, True
+        except Exception as e:
+            logger.exception(f"Tool call {tool_call.function.name} failed")
+            output, ok = json.dumps({"error": f"{type(e).__name__}: {e}"}), False
+        done.put((index, output, time.perf_counter() - start, ok, timed_out))
+
+    if max_workers is None:
+        max_workers = int(os.environ.get("AGENT_TOOL_WORKERS", "8"))
+    max_workers = max(1, min(max_workers, len(tool_calls)))
+    if timeout is None:
+        timeout = float(os.environ.get("AGENT_TOOL_TIMEOUT", "300"))
+
+    # Results of abandoned calls that finish later go to this queue, which nobody reads any more
+    done: queue.Queue = queue.Queue()
+    waiting = deque(range(len(tool_calls)))
+    running: Dict[int, Tuple[Optional[Deadline], float]] = {}
+    results: Dict[int, Tuple[str, float, bool, bool]] = {}
+    while waiting or running:
+        while waiting and len(running) < max_workers:
+            index = waiting.popleft()
+            # The call's thread gets the caller's context with the deadline of the call in it
+            with deadline_scope(timeout or None) as deadline:
+                context = copy_context()
+            running[index] = (deadline, time.monotonic())
+            threading.Thread(target=context.run, args=(run, index, done), daemon=True).start()
+
+        deadlines = [deadline.remaining() for deadline, _ in running.values() if deadline is not None]
+        try:
+            index, output, seconds, ok, timed_out = done.get(timeout=min(deadlines) if deadlines else None)
+        except queue.Empty:
+            for index, (deadline, start) in list(running.items()):
+                if deadline is not None and deadline.expired:
+                    del running[index]
+                    name = tool_calls[index].function.name
+                    logger.warning(json.dumps({"type": "tool_calls", "message": f"Abandoned {name} after its deadline"}))
+                    results[index] = (_timeout_output(name, deadline.expires_at - start), time.monotonic() - start, False, True)
+            continue
+        if index not in running:
+            continue
+        deadline, start = running.pop(index)
+        if timed_out:
+            output = _timeout_output(tool_calls[index].function.name, deadline.expires_at - start if deadline else seconds)
+        results[index] = (output, seconds, ok, timed_out)
+
+    tool_outputs, durations = [], []
+    for index, tool_call in enumerate(tool_calls):
+        output, seconds, ok, timed_out = results[index]
+        tool_outputs.append({"tool_call_id": tool_call.id, "output": output})
+        durations.append(
+            {
+                "tool_call_id": tool_call.id,
+                "name": tool_call.function.name,
+                "seconds": round(seconds, 3),
+                "ok": ok,
+                "timed_out": timed_out,
+            }
+        )
+    logger.debug(json.dumps({"type": "tool_calls", "durations": durations}))
+    return tool_outputs, durations